@@ -0,0 +1,444 @@
+#
+#
+#
+import csv
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from itertools import islice
+from .models import AddressBook, NoteBook, Record, Note
+from . import config
+
+# Колонки файлів імпорту/експорту
+CONTACT_FIELDS = ("name", "phone", "email", "birthday", "address")
+NOTE_FIELDS = ("id", "created_at", "text", "tags")
+
+# Розділювач тегів у CSV (у JSON Lines теги - список)
+CSV_TAG_SEPARATOR = ";"
+
+# Розширення файлу -> формат
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".json": "jsonl"}
+
+
+def detect_format(path: str, fmt: str = None) -> str:
+    """Формат файлу: явно вказаний або за розширенням"""
+    if fmt is None:
+        fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+        if fmt is None:
+            raise ValueError(
+                f"Невідомий формат файлу '{path}'. Використовуйте .csv або .jsonl (або --format)."
+            )
+    elif fmt not in ("csv", "jsonl"):
+        raise ValueError(f"Невідомий формат '{fmt}'. Дозволені: csv, jsonl.")
+    return fmt
+
+
+def reject_path_for(path: str) -> str:
+    """Файл відхилених рядків за замовчуванням: contacts.csv -> contacts.rejected.csv"""
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.rejected{ext}"
+
+
+class ImportResult:
+    """Підсумок імпорту"""
+
+    def __init__(self, reject_path: str):
+        self.imported = 0
+        self.rejected = 0
+        self.reject_path = reject_path
+
+
+# --- Читання ---
+
+
+def _read_csv(f, required: str):
+    reader = csv.DictReader(f)
+    if reader.fieldnames is None:
+        return
+    if required not in reader.fieldnames:
+        raise ValueError(f"У файлі немає обов'язкової колонки '{required}'.")
+    for row in reader:
+        # Зайві значення без заголовка DictReader кладе під ключ None
+        row.pop(None, None)
+        # line_num - номер рядка файлу, на якому закінчився запис
+        yield reader.line_num, row, None
+
+
+def _parse_json_line(line: str) -> tuple:
+    """(словник значень, помилка або None) для одного рядка JSON Lines"""
+    try:
+        row = json.loads(line)
+    except json.JSONDecodeError as e:
+        return {"raw": line.rstrip("\r\n")}, f"Невірний JSON: {e.msg}"
+    if not isinstance(row, dict):
+        return {"raw": line.rstrip("\r\n")}, "Рядок має бути JSON-об'єктом."
+    return row, None
+
+
+def _read_jsonl(f):
+    for line_no, line in enumerate(f, start=1):
+        if not line.strip():
+            continue
+        row, error = _parse_json_line(line)
+        yield line_no, row, error
+
+
+def read_rows(f, fmt: str, required: str):
+    """
+    Генератор (номер рядка, словник значень, помилка розбору або None).
+    Читає файл по одному запису - пам'ять не залежить від розміру файлу
+    """
+    if fmt == "csv":
+        return _read_csv(f, required)
+    return _read_jsonl(f)
+
+
+def _value(row: dict, key: str):
+    """Значення колонки; порожні значення вважаються відсутніми"""
+    value = row.get(key)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+# --- Перетворення рядків ---
+
+
+def contact_from_row(row: dict) -> Record:
+    """Створює контакт з рядка файлу; перевірка - тими самими полями, що й add-contact"""
+    name = _value(row, "name")
+    if not name:
+        raise ValueError("Ім'я не може бути порожнім.")
+    record = Record(name)
+    phone, email = _value(row, "phone"), _value(row, "email")
+    birthday, address = _value(row, "birthday"), _value(row, "address")
+    if phone:
+        record.add_phone(phone)
+    if email:
+        record.add_email(email)
+    if birthday:
+        record.add_birthday(birthday)
+    if address:
+        record.add_address(address)
+    return record
+
+
+def note_from_row(row: dict) -> Note:
+    """
+    Створює нотатку з рядка файлу. ID з файлу не використовується -
+    книга присвоює новий, щоб не перетерти наявні нотатки
+    """
+    text = _value(row, "text")
+    if not text:
+        raise ValueError("Текст нотатки не може бути порожнім.")
+    note = Note(text)
+    created_at = _value(row, "created_at")
+    if created_at:
+        try:
+            note.created_at = datetime.fromisoformat(created_at)
+        except ValueError:
+            raise ValueError(f"Невірна дата створення '{created_at}'. Очікується ISO 8601.")
+    tags = row.get("tags") or []
+    if isinstance(tags, str):
+        tags = tags.split(CSV_TAG_SEPARATOR)
+    for tag in tags:
+        tag = str(tag).strip()
+        if tag:
+            note.add_tag(tag)
+    return note
+
+
+def contact_to_row(record: Record) -> dict:
+    return {
+        "name": record.name.value,
+        "phone": record.phone.value if record.phone else "",
+        "email": record.email.value if record.email else "",
+        "birthday": str(record.birthday) if record.birthday else "",
+        "address": record.address.value if record.address else "",
+    }
+
+
+def note_to_row(note: Note, fmt: str) -> dict:
+    tags = [tag.value for tag in note.tags]
+    return {
+        "id": note.id,
+        "created_at": note.created_at.isoformat(timespec="seconds"),
+        "text": note.text,
+        "tags": CSV_TAG_SEPARATOR.join(tags) if fmt == "csv" else tags,
+    }
+
+
+# --- Файли відхилених рядків ---
+
+
+class _RejectWriter:
+    """
+    Пише відхилені рядки у файл того ж формату з колонками 'line' та 'error'
+    попереду, тож виправлений файл можна імпортувати повторно.
+    Файл створюється лише при першому відхиленому рядку
+    """
+
+    def __init__(self, path: str, fmt: str, fields: tuple):
+        self.path = path
+        self.fmt = fmt
+        self.fields = ("line", "error") + fields
+        self._file = None
+        self._writer = None
+
+    def write(self, line_no: int, row: dict, error: str):
+        if self._file is None:
+            self._file = open(self.path, "w", newline="", encoding="utf-8")
+            if self.fmt == "csv":
+                self._writer = csv.DictWriter(
+                    self._file, fieldnames=self.fields, extrasaction="ignore"
+                )
+                self._writer.writeheader()
+        entry = {"line": line_no, "error": error, **row}
+        if self.fmt == "csv":
+            self._writer.writerow(entry)
+        else:
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+# --- Імпорт ---
+
+
+def _import(book, path, fmt, reject_path, chunk_size, fields, required, add_row) -> ImportResult:
+    """
+    Спільний цикл імпорту: рядки читаються потоково і додаються групами по
+    chunk_size у book.batch(), тож кожна група фіксується одним записом.
+    Невдалі рядки не зупиняють імпорт, а потрапляють у файл відхилених
+    """
+    fmt = detect_format(path, fmt)
+    reject_path = reject_path or reject_path_for(path)
+    chunk_size = chunk_size or config.IMPORT_CHUNK_SIZE
+    result = ImportResult(reject_path)
+    rejects = _RejectWriter(reject_path, fmt, fields)
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = read_rows(f, fmt, required)
+            while True:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    break
+                with book.batch():
+                    for line_no, row, error in chunk:
+                        if error is None:
+                            try:
+                                add_row(row)
+                                result.imported += 1
+                                continue
+                            except ValueError as e:
+                                error = str(e)
+                        rejects.write(line_no, row, error)
+                        result.rejected += 1
+    finally:
+        rejects.close()
+    return result
+
+
+def import_contacts(
+    book: AddressBook, path: str, fmt=None, reject_path=None, chunk_size=None, workers=None
+) -> ImportResult:
+    """
+    Імпортує контакти з CSV / JSON Lines (колонки CONTACT_FIELDS, 'name' обов'язкова).
+    Контакти з уже наявними іменами відхиляються, як і в add-contact.
+    workers > 1 - розбір і перевірка рядків у кількох процесах (0 - за кількістю ядер)
+    """
+    workers = config.IMPORT_WORKERS if workers is None else workers
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    if workers > 1:
+        return _import_contacts_parallel(book, path, fmt, reject_path, workers)
+
+    def add_row(row):
+        record = contact_from_row(row)
+        if book.find(record.name.value):
+            raise ValueError(f"Контакт '{record.name.value}' вже існує.")
+        book.check_unique(record.name.value, _value(row, "phone"), _value(row, "email"))
+        book.add_record(record)
+
+    return _import(book, path, fmt, reject_path, chunk_size, CONTACT_FIELDS, "name", add_row)
+
+
+def import_notes(
+    notes: NoteBook, path: str, fmt=None, reject_path=None, chunk_size=None
+) -> ImportResult:
+    """Імпортує нотатки з CSV / JSON Lines (колонки NOTE_FIELDS, 'text' обов'язкова)"""
+
+    def add_row(row):
+        notes.add_note(note_from_row(row))
+
+    return _import(notes, path, fmt, reject_path, chunk_size, NOTE_FIELDS, "text", add_row)
+
+
+# --- Паралельний імпорт контактів ---
+
+
+def _byte_ranges(path: str, start: int, chunk_bytes: int):
+    """Ділить файл від позиції start на діапазони байтів, що закінчуються на межі рядка"""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            # Дочитуємо рядок до кінця, щоб не розрізати запис
+            f.readline()
+            end = f.tell()
+            yield start, end
+            start = end
+
+
+def _parse_contact_range(path: str, fmt: str, start: int, end: int, fieldnames) -> tuple:
+    """
+    Виконується в окремому процесі: розбирає та перевіряє рядки діапазону байтів.
+    Повертає (кількість рядків, прийняті, відхилені), де прийняті - компактні кортежі
+    (рядок, ім'я, телефон, email, день народження як ordinal, адреса),
+    відхилені - (рядок, словник значень, помилка). Номери рядків - від початку діапазону
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+    lines = text.split("\n")
+    if lines[-1] == "":
+        lines.pop()
+    accepted, rejected = [], []
+    for line_no, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        if fmt == "csv":
+            values = next(csv.reader([line]))
+            row, error = dict(zip(fieldnames, values)), None
+            # Непарна кількість лапок - значення переноситься на наступний рядок
+            # (або лапку не закрито); такий рядок відхиляється, імпорт триває
+            if line.count('"') % 2:
+                error = (
+                    "Непарна кількість лапок: значення з переносом рядка"
+                    " імпортуються лише в одному процесі (--workers 1)."
+                )
+        else:
+            row, error = _parse_json_line(line)
+        if error is None:
+            try:
+                record = contact_from_row(row)
+            except ValueError as e:
+                error = str(e)
+            else:
+                accepted.append(
+                    (
+                        line_no,
+                        record.name.value,
+                        record.phone.value if record.phone else None,
+                        record.email.value if record.email else None,
+                        record.birthday.value.toordinal() if record.birthday else None,
+                        record.address.value if record.address else None,
+                    )
+                )
+                continue
+        rejected.append((line_no, row, error))
+    return len(lines), accepted, rejected
+
+
+def _import_contacts_parallel(book, path, fmt, reject_path, workers) -> ImportResult:
+    """
+    Файл ділиться на діапазони по config.IMPORT_CHUNK_BYTES; процеси розбирають
+    і перевіряють їх (strptime, regex email), а основний процес по черзі
+    додає готові записи в книгу - одна група book.batch() на діапазон.
+    Паралельно в роботі щонайбільше 2 * workers діапазонів, тож пам'ять обмежена
+    """
+    fmt = detect_format(path, fmt)
+    reject_path = reject_path or reject_path_for(path)
+    result = ImportResult(reject_path)
+    rejects = _RejectWriter(reject_path, fmt, CONTACT_FIELDS)
+
+    fieldnames, start, line_offset = None, 0, 0
+    if fmt == "csv":
+        with open(path, "rb") as f:
+            header = f.readline().decode("utf-8")
+            start = f.tell()
+        if not header.strip():
+            return result
+        fieldnames = next(csv.reader([header]))
+        if "name" not in fieldnames:
+            raise ValueError("У файлі немає обов'язкової колонки 'name'.")
+        line_offset = 1
+
+    ranges = _byte_ranges(path, start, config.IMPORT_CHUNK_BYTES)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+
+            def submit_next():
+                byte_range = next(ranges, None)
+                if byte_range is not None:
+                    pending.append(
+                        pool.submit(_parse_contact_range, path, fmt, *byte_range, fieldnames)
+                    )
+
+            for _ in range(2 * workers):
+                submit_next()
+            # Результати обробляються в порядку файлу - так само, як при звичайному імпорті
+            while pending:
+                n_lines, accepted, rejected = pending.popleft().result()
+                submit_next()
+                with book.batch():
+                    for line_no, name, phone, email, birthday, address in accepted:
+                        birthday = date.fromordinal(birthday) if birthday else None
+                        record = Record._restore(name, phone, email, birthday, address)
+                        try:
+                            if book.find(name):
+                                raise ValueError(f"Контакт '{name}' вже існує.")
+                            book.check_unique(name, phone, email)
+                        except ValueError as e:
+                            row = {k: v for k, v in contact_to_row(record).items() if v}
+                            rejected.append((line_no, row, str(e)))
+                            continue
+                        book.add_record(record)
+                        result.imported += 1
+                for line_no, row, error in sorted(rejected, key=lambda item: item[0]):
+                    rejects.write(line_offset + line_no, row, error)
+                    result.rejected += 1
+                line_offset += n_lines
+    finally:
+        rejects.close()
+    return result
+
+
+# --- Експорт ---
+
+
+def _export(path, fmt, fields, rows) -> int:
+    """Пише рядки у файл по одному, не збираючи їх у пам'яті"""
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        else:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+                count += 1
+    return count
+
+
+def export_contacts(book: AddressBook, path: str, fmt=None) -> int:
+    """Експортує всі контакти; повертає їх кількість"""
+    fmt = detect_format(path, fmt)
+    rows = (contact_to_row(record) for record in book.data.values())
+    return _export(path, fmt, CONTACT_FIELDS, rows)
+
+
+def export_notes(notes: NoteBook, path: str, fmt=None) -> int:
+    """Експортує всі нотатки; повертає їх кількість"""
+    fmt = detect_format(path, fmt)
+    rows = (note_to_row(note, fmt) for note in notes.data.values())
+    return _export(path, fmt, NOTE_FIELDS, rows)
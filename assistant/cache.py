@@ -0,0 +1,47 @@
+#
+#
+#
+from collections import OrderedDict
+from . import config
+from . import stats
+
+
+class QueryCache:
+    """
+    LRU-кеш результатів пошукових команд: ключ - команда та нормалізовані
+    аргументи (запит у нижньому регістрі тощо), до кожного запису додається
+    версія книг, з якими його обчислено (AddressBook/NoteBook.query_version).
+    Запис зі старою версією не повертається, а перераховується, тож будь-яка
+    зміна книги (включно з Record.add_*, Note.add_tag, update_text) робить
+    попередні результати недійсними. Розмір - config.QUERY_CACHE_SIZE
+    (0 - кеш вимкнено); влучання та промахи рахуються в stats.STATS.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: tuple, version: tuple, compute):
+        """Результат для ключа з кешу, якщо версія збігається, інакше compute()"""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self._entries.move_to_end(key)
+            stats.STATS.count("query_cache.hit")
+            return entry[1]
+        stats.STATS.count("query_cache.miss")
+        result = compute()
+        if config.QUERY_CACHE_SIZE > 0:
+            self._entries[key] = (version, result)
+            self._entries.move_to_end(key)
+        while len(self._entries) > max(config.QUERY_CACHE_SIZE, 0):
+            self._entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        self._entries.clear()
+
+
+# Кеш запитів поточного процесу
+QUERY_CACHE = QueryCache()
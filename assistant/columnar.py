@@ -0,0 +1,628 @@
+#
+#
+#
+import json
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import MutableMapping
+from datetime import date, datetime
+from .models import AddressBook, NoteBook, Record, Note, _first_tag_key
+from .storage import SnapshotBackend, snapshot_meta
+
+# Формат файлу:
+# MAGIC | колонки (кожна вирівняна на 8 байт) | футер JSON | <offset футера><MAGIC>
+# Рядкова колонка - це масив зсувів ("<ім'я>.off", n+1 чисел) і блоб UTF-8 ("<ім'я>.blob")
+MAGIC = b"ASCOL001"
+_TRAILER = struct.Struct("<Q8s")
+
+# Біти присутності необов'язкових полів контакту (порожній рядок != None)
+_HAS_PHONE = 1
+_HAS_EMAIL = 2
+_HAS_ADDRESS = 4
+
+
+class _ColumnWriter:
+    """Послідовно пише колонки у файл і запам'ятовує їх розташування"""
+
+    def __init__(self, f):
+        self.f = f
+        self.columns = {}
+        f.write(MAGIC)
+
+    def _align(self):
+        padding = -self.f.tell() % 8
+        if padding:
+            self.f.write(b"\0" * padding)
+
+    def add_bytes(self, name: str, data: bytes, typecode: str = "B"):
+        self._align()
+        self.columns[name] = [self.f.tell(), len(data), typecode]
+        self.f.write(data)
+
+    def add_array(self, name: str, values: array):
+        self.add_bytes(name, values.tobytes(), values.typecode)
+
+    def add_strings(self, name: str, values: list):
+        offsets = array("Q", [0])
+        blob = bytearray()
+        for value in values:
+            blob += value.encode("utf-8")
+            offsets.append(len(blob))
+        self.add_array(name + ".off", offsets)
+        self.add_bytes(name + ".blob", bytes(blob))
+
+    def finish(self, **meta):
+        footer = json.dumps({"columns": self.columns, **meta}).encode("utf-8")
+        offset = self.f.tell()
+        self.f.write(footer)
+        self.f.write(_TRAILER.pack(offset, MAGIC))
+
+
+class _StringColumn:
+    """Рядкова колонка поверх mmap: значення декодуються лише при зверненні"""
+
+    def __init__(self, mm: mmap.mmap, offsets: memoryview, blob_start: int):
+        self._mm = mm
+        self._offsets = offsets
+        self._start = blob_start
+
+    def raw(self, row: int) -> bytes:
+        return self._mm[self._start + self._offsets[row] : self._start + self._offsets[row + 1]]
+
+    def __getitem__(self, row: int) -> str:
+        return self.raw(row).decode("utf-8")
+
+    def find_rows(self, needle: bytes) -> set:
+        """
+        Номери рядків, значення яких містять needle.
+        Пошук іде прямо по блобу (mmap.find), без створення рядків Python
+        """
+        rows = set()
+        offsets, start = self._offsets, self._start
+        end = start + offsets[len(offsets) - 1]
+        pos = self._mm.find(needle, start, end)
+        while pos != -1:
+            row = bisect_right(offsets, pos - start) - 1
+            row_end = start + offsets[row + 1]
+            if pos + len(needle) <= row_end:
+                rows.add(row)
+                # Решту цього значення можна не переглядати
+                pos = self._mm.find(needle, row_end, end)
+            else:
+                # Збіг перетнув межу двох значень - шукаємо далі
+                pos = self._mm.find(needle, pos + 1, end)
+        return rows
+
+
+class _ColumnReader:
+    """Відкриває знімок через mmap; колонки читаються без копіювання"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        size = len(self._mm)
+        if size < len(MAGIC) + _TRAILER.size or self._mm[: len(MAGIC)] != MAGIC:
+            raise ValueError("Невірний формат колонкового знімка.")
+        footer_offset, magic = _TRAILER.unpack(self._mm[size - _TRAILER.size :])
+        if magic != MAGIC:
+            raise ValueError("Колонковий знімок пошкоджено.")
+        self.meta = json.loads(self._mm[footer_offset : size - _TRAILER.size])
+        self._columns = self.meta["columns"]
+
+    def array(self, name: str) -> memoryview:
+        offset, length, typecode = self._columns[name]
+        return memoryview(self._mm)[offset : offset + length].cast(typecode)
+
+    def strings(self, name: str) -> _StringColumn:
+        blob_offset = self._columns[name + ".blob"][0]
+        return _StringColumn(self._mm, self.array(name + ".off"), blob_offset)
+
+
+class _LazyRows(MutableMapping):
+    """
+    Лінивий словник поверх колонок знімка та змін поточного сеансу.
+    Об'єкти (Record/Note) створюються лише при першому зверненні до рядка.
+    Нові записи тримаються окремо (в порядку додавання) після рядків знімка.
+    Підкласи визначають _row_of, _key_of та _create.
+    """
+
+    def __init__(self, n_rows: int):
+        self._n = n_rows
+        self._loaded = {}  # рядок -> створений або замінений об'єкт
+        self._dirty = set()  # рядки, чиї колонки застаріли
+        self._deleted = set()
+        self._appended = {}  # ключ -> новий об'єкт
+
+    def _row_of(self, key):
+        raise NotImplementedError
+
+    def _key_of(self, row: int):
+        raise NotImplementedError
+
+    def _create(self, row: int):
+        raise NotImplementedError
+
+    def materialized(self):
+        """Уже створені об'єкти (без читання решти рядків знімка)"""
+        yield from self._loaded.values()
+        yield from self._appended.values()
+
+    def _get_row(self, row: int):
+        obj = self._loaded.get(row)
+        if obj is None:
+            obj = self._create(row)
+            self._loaded[row] = obj
+        return obj
+
+    def _live_row(self, key):
+        row = self._row_of(key)
+        if row is None or row in self._deleted:
+            return None
+        return row
+
+    def __getitem__(self, key):
+        if key in self._appended:
+            return self._appended[key]
+        row = self._live_row(key)
+        if row is None:
+            raise KeyError(key)
+        return self._get_row(row)
+
+    def __contains__(self, key):
+        return key in self._appended or self._live_row(key) is not None
+
+    def __setitem__(self, key, obj):
+        row = None if key in self._appended else self._live_row(key)
+        if row is None:
+            self._appended[key] = obj
+        else:
+            self._loaded[row] = obj
+            self._dirty.add(row)
+
+    def __delitem__(self, key):
+        if key in self._appended:
+            del self._appended[key]
+            return
+        row = self._live_row(key)
+        if row is None:
+            raise KeyError(key)
+        self._deleted.add(row)
+        self._dirty.discard(row)
+        self._loaded.pop(row, None)
+
+    def mark_dirty(self, key):
+        """Об'єкт змінено - колонки для його рядка більше не актуальні"""
+        if key not in self._appended:
+            row = self._live_row(key)
+            if row is not None:
+                self._dirty.add(row)
+
+    def __len__(self):
+        return self._n - len(self._deleted) + len(self._appended)
+
+    def __iter__(self):
+        for row in range(self._n):
+            if row not in self._deleted:
+                yield self._key_of(row)
+        yield from list(self._appended)
+
+    def values(self):
+        for row in range(self._n):
+            if row not in self._deleted:
+                yield self._get_row(row)
+        yield from list(self._appended.values())
+
+    def items(self):
+        for key in self:
+            yield key, self[key]
+
+    def _search(self, column_rows: set, match) -> list:
+        """
+        Поєднує збіги з колонок (для незмінених рядків) з перевіркою
+        match(obj) для змінених рядків і нових записів
+        """
+        rows = column_rows - self._deleted - self._dirty
+        rows.update(row for row in self._dirty if match(self._loaded[row]))
+        found = [self._get_row(row) for row in sorted(rows)]
+        found.extend(obj for obj in self._appended.values() if match(obj))
+        return found
+
+    def _clean(self, row: int) -> bool:
+        return row not in self._dirty and row not in self._deleted
+
+
+class _LazyContacts(_LazyRows):
+    """ім'я -> Record поверх колонок контактів"""
+
+    def __init__(self, reader: _ColumnReader, book: AddressBook):
+        super().__init__(reader.meta["contacts"] if reader else 0)
+        self._book = book
+        if reader:
+            self.name = reader.strings("c.name")
+            self.phone = reader.strings("c.phone")
+            self.email = reader.strings("c.email")
+            self.address = reader.strings("c.address")
+            self.birthday = reader.array("c.birthday")
+            self.flags = reader.array("c.flags")
+            self.by_name = reader.array("c.by_name")
+            self.search_columns = [
+                reader.strings(name)
+                for name in ("c.name_lc", "c.phone", "c.email_lc", "c.address_lc", "c.birthday_text")
+            ]
+
+    def _row_of(self, name):
+        if not self._n or not isinstance(name, str):
+            return None
+        # Двійковий пошук по рядках, відсортованих за байтами імені
+        needle = name.encode("utf-8")
+        lo, hi = 0, self._n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.name.raw(self.by_name[mid]) < needle:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._n and self.name.raw(self.by_name[lo]) == needle:
+            return self.by_name[lo]
+        return None
+
+    def _key_of(self, row: int):
+        obj = self._loaded.get(row)
+        return obj.name.value if obj is not None else self.name[row]
+
+    def raw_row(self, row: int) -> tuple:
+        """(name, phone, email, address, birthday_ordinal) без створення Record"""
+        flags = self.flags[row]
+        return (
+            self.name[row],
+            self.phone[row] if flags & _HAS_PHONE else None,
+            self.email[row] if flags & _HAS_EMAIL else None,
+            self.address[row] if flags & _HAS_ADDRESS else None,
+            self.birthday[row] or None,
+        )
+
+    def _create(self, row: int) -> Record:
+        name, phone, email, address, birthday = self.raw_row(row)
+        record = Record._restore(
+            name, phone, email, date.fromordinal(birthday) if birthday else None, address
+        )
+        record._book = self._book
+        return record
+
+    def rows(self):
+        """Рядки для запису знімка: незмінені беруться прямо з колонок"""
+        for row in range(self._n):
+            if self._clean(row):
+                yield self.raw_row(row)
+            elif row not in self._deleted:
+                yield _record_row(self._get_row(row))
+        for record in list(self._appended.values()):
+            yield _record_row(record)
+
+    def birthdays(self):
+        """Пари (ім'я, дата народження): незмінені рядки читаються прямо з колонок"""
+        for row in range(self._n):
+            if self._clean(row):
+                if self.birthday[row]:
+                    yield self.name[row], date.fromordinal(self.birthday[row])
+            elif row not in self._deleted:
+                record = self._get_row(row)
+                if record.birthday:
+                    yield record.name.value, record.birthday.value
+        for name, record in list(self._appended.items()):
+            if record.birthday:
+                yield name, record.birthday.value
+
+    def contact_keys(self):
+        """Трійки (ім'я, телефон, email): незмінені рядки читаються прямо з колонок"""
+        for row in range(self._n):
+            if self._clean(row):
+                flags = self.flags[row]
+                yield (
+                    self.name[row],
+                    self.phone[row] if flags & _HAS_PHONE else None,
+                    self.email[row] if flags & _HAS_EMAIL else None,
+                )
+            elif row not in self._deleted:
+                record = self._get_row(row)
+                yield (
+                    record.name.value,
+                    record.phone.value if record.phone else None,
+                    record.email.value if record.email else None,
+                )
+        for name, record in list(self._appended.items()):
+            yield (
+                name,
+                record.phone.value if record.phone else None,
+                record.email.value if record.email else None,
+            )
+
+    def search(self, query_lower: str) -> list:
+        if not self._n:
+            column_rows = set()
+        elif not query_lower:
+            column_rows = set(range(self._n))
+        else:
+            needle = query_lower.encode("utf-8")
+            column_rows = set()
+            for column in self.search_columns:
+                column_rows |= column.find_rows(needle)
+        return self._search(column_rows, lambda record: record.matches(query_lower))
+
+
+class _LazyNotes(_LazyRows):
+    """ID -> Note поверх колонок нотаток"""
+
+    def __init__(self, reader: _ColumnReader, notes: NoteBook):
+        super().__init__(reader.meta["notes"] if reader else 0)
+        self._notes = notes
+        if reader:
+            self.ids = reader.array("n.id")
+            self.created = reader.array("n.created")
+            self.text = reader.strings("n.text")
+            self.text_lc = reader.strings("n.text_lc")
+            self.tag_start = reader.array("n.tag_start")
+            self.tag = reader.strings("n.tag")
+            self.tag_lc = reader.strings("n.tag_lc")
+
+    def max_id(self) -> int:
+        return self.ids[self._n - 1] if self._n else 0
+
+    def _row_of(self, note_id):
+        if not self._n or not isinstance(note_id, int):
+            return None
+        row = bisect_left(self.ids, note_id)
+        if row < self._n and self.ids[row] == note_id:
+            return row
+        return None
+
+    def _key_of(self, row: int):
+        return self.ids[row]
+
+    def raw_row(self, row: int) -> tuple:
+        """(id, created_at timestamp, text, tags) без створення Note"""
+        tags = tuple(self.tag[i] for i in range(self.tag_start[row], self.tag_start[row + 1]))
+        return self.ids[row], self.created[row], self.text[row], tags
+
+    def _create(self, row: int) -> Note:
+        note_id, created_at, text, tags = self.raw_row(row)
+        note = Note._restore(note_id, text, datetime.fromtimestamp(created_at), tags)
+        note._book = self._notes
+        return note
+
+    def rows(self):
+        for row in range(self._n):
+            if self._clean(row):
+                yield self.raw_row(row)
+            elif row not in self._deleted:
+                yield _note_row(self._get_row(row))
+        for note in list(self._appended.values()):
+            yield _note_row(note)
+
+    def sort_keys(self):
+        """Пари (ID, перший тег у нижньому регістрі): незмінені рядки - з колонок"""
+        for row in range(self._n):
+            if self._clean(row):
+                start = self.tag_start[row]
+                yield self.ids[row], self.tag_lc[start] if start < self.tag_start[row + 1] else ""
+            elif row not in self._deleted:
+                note = self._get_row(row)
+                yield note.id, _first_tag_key(note)
+        for note_id, note in list(self._appended.items()):
+            yield note_id, _first_tag_key(note)
+
+    def search_text(self, query_lower: str) -> list:
+        if not self._n:
+            column_rows = set()
+        elif not query_lower:
+            column_rows = set(range(self._n))
+        else:
+            column_rows = self.text_lc.find_rows(query_lower.encode("utf-8"))
+        return self._search(column_rows, lambda note: query_lower in note.text.lower())
+
+    def search_tag(self, query_lower: str) -> list:
+        column_rows = set()
+        if self._n:
+            if query_lower:
+                tag_rows = self.tag_lc.find_rows(query_lower.encode("utf-8"))
+                # Рядок тегу -> рядок нотатки за таблицею початків
+                column_rows = {bisect_right(self.tag_start, i) - 1 for i in tag_rows}
+            else:
+                column_rows = {
+                    row
+                    for row in range(self._n)
+                    if self.tag_start[row + 1] > self.tag_start[row]
+                }
+        return self._search(
+            column_rows,
+            lambda note: any(query_lower in tag.value.lower() for tag in note.tags),
+        )
+
+
+def _record_row(record: Record) -> tuple:
+    return (
+        record.name.value,
+        record.phone.value if record.phone else None,
+        record.email.value if record.email else None,
+        record.address.value if record.address else None,
+        record.birthday.value.toordinal() if record.birthday else None,
+    )
+
+
+def _note_row(note: Note) -> tuple:
+    return note.id, note.created_at.timestamp(), note.text, tuple(t.value for t in note.tags)
+
+
+class ColumnarAddressBook(AddressBook):
+    """Адресна книга поверх колонкового знімка: записи створюються ліниво"""
+
+    def __init__(self, reader: _ColumnReader = None):
+        super().__init__()
+        self.data = _LazyContacts(reader, self)
+
+    def _adopt(self, other: AddressBook):
+        # Записи створюються ліниво, тож прив'язуємо заново лише вже створені
+        self.data = other.data
+        self.data._book = self
+        for record in self.data.materialized():
+            record._book = self
+        self._data_replaced()
+        self._trigrams = None
+        self._birthdays = None
+        self._phones = None
+        self._emails = None
+        self._fuzzy = None
+
+    def _record_changed(self, record: Record, field: str, value: str):
+        self.data.mark_dirty(record.name.value)
+        super()._record_changed(record, field, value)
+
+    def search(self, query: str) -> list[Record]:
+        return self.data.search(query.lower())
+
+    def _birthday_items(self):
+        return self.data.birthdays()
+
+    def _contact_keys(self):
+        return self.data.contact_keys()
+
+
+class ColumnarNoteBook(NoteBook):
+    """Книга нотаток поверх колонкового знімка: нотатки створюються ліниво"""
+
+    def __init__(self, reader: _ColumnReader = None):
+        super().__init__()
+        self.data = _LazyNotes(reader, self)
+        # ID видалених нотаток не видаються повторно: лічильник зберігається у футері
+        # (знімки попередніх версій його не мають)
+        saved_next_id = reader.meta.get("next_id", 1) if reader is not None else 1
+        self._next_id = max(self.data.max_id() + 1, saved_next_id)
+
+    def _adopt(self, other: NoteBook):
+        self.data = other.data
+        self.data._notes = self
+        for note in self.data.materialized():
+            note._book = self
+        self._data_replaced()
+        self._next_id = other._next_id
+        self._text_index = None
+        self._tag_index = None
+        self._by_id = None
+        self._by_first_tag = None
+
+    def _note_changed(self, note: Note, event: str, value: str):
+        self.data.mark_dirty(note.id)
+        super()._note_changed(note, event, value)
+
+    def search_by_text(self, query: str, mode: str = "substring") -> list:
+        if mode != "substring":
+            return super().search_by_text(query, mode)
+        return self.data.search_text(query.lower())
+
+    def search_by_tag(self, tag_query: str, mode: str = "substring") -> list:
+        if mode != "substring":
+            return super().search_by_tag(tag_query, mode)
+        return self.data.search_tag(tag_query.lower())
+
+    def _sort_keys(self):
+        return self.data.sort_keys()
+
+
+def _meta_of(reader: _ColumnReader) -> dict:
+    if "generation" not in reader.meta:
+        # Знімок попередніх версій: журнал був один, спільний
+        return snapshot_meta(journals={"": reader.meta.get("journal_seq", 0)})
+    return snapshot_meta(reader.meta["generation"], reader.meta["journals"])
+
+
+class ColumnarBackend(SnapshotBackend):
+    """
+    Колонковий знімок (mmap/struct/array) + журнал змін.
+    Відкриття не читає дані: колонки відображаються в пам'ять,
+    а Record/Note створюються лише при зверненні.
+    """
+
+    def _read_snapshot(self) -> tuple:
+        if not os.path.exists(self.path) or not os.path.getsize(self.path):
+            return ColumnarAddressBook(), ColumnarNoteBook(), snapshot_meta()
+        try:
+            reader = _ColumnReader(self.path)
+        except (ValueError, KeyError):
+            os.replace(self.path, self.path + ".corrupt")
+            return ColumnarAddressBook(), ColumnarNoteBook(), snapshot_meta()
+        book, notes = ColumnarAddressBook(reader), ColumnarNoteBook(reader)
+        return book, notes, _meta_of(reader)
+
+    def _read_generation(self) -> int:
+        if not os.path.exists(self.path) or not os.path.getsize(self.path):
+            return 0
+        try:
+            # Відкриття читає лише заголовок та опис колонок у кінці файлу
+            return _meta_of(_ColumnReader(self.path))["generation"]
+        except (ValueError, KeyError):
+            return -1
+
+    def _write_snapshot(self, f, book: AddressBook, notes: NoteBook, meta: dict):
+        if isinstance(book.data, _LazyContacts):
+            contact_rows = list(book.data.rows())
+        else:
+            contact_rows = [_record_row(record) for record in book.data.values()]
+        if isinstance(notes.data, _LazyNotes):
+            note_rows = list(notes.data.rows())
+        else:
+            note_rows = [_note_row(notes.data[i]) for i in sorted(notes.data.keys())]
+
+        writer = _ColumnWriter(f)
+        names = [row[0] for row in contact_rows]
+        writer.add_strings("c.name", names)
+        writer.add_strings("c.phone", [row[1] or "" for row in contact_rows])
+        writer.add_strings("c.email", [row[2] or "" for row in contact_rows])
+        writer.add_strings("c.address", [row[3] or "" for row in contact_rows])
+        writer.add_array("c.birthday", array("i", (row[4] or 0 for row in contact_rows)))
+        writer.add_array(
+            "c.flags",
+            array(
+                "B",
+                (
+                    (_HAS_PHONE if row[1] is not None else 0)
+                    | (_HAS_EMAIL if row[2] is not None else 0)
+                    | (_HAS_ADDRESS if row[3] is not None else 0)
+                    for row in contact_rows
+                ),
+            ),
+        )
+        encoded = [name.encode("utf-8") for name in names]
+        writer.add_array(
+            "c.by_name", array("Q", sorted(range(len(names)), key=encoded.__getitem__))
+        )
+        # Колонки для пошуку: ті самі значення, що порівнює Record.matches
+        writer.add_strings("c.name_lc", [name.lower() for name in names])
+        writer.add_strings("c.email_lc", [(row[2] or "").lower() for row in contact_rows])
+        writer.add_strings("c.address_lc", [(row[3] or "").lower() for row in contact_rows])
+        writer.add_strings(
+            "c.birthday_text",
+            [
+                date.fromordinal(row[4]).strftime("%d.%m.%Y") if row[4] else ""
+                for row in contact_rows
+            ],
+        )
+
+        writer.add_array("n.id", array("q", (row[0] for row in note_rows)))
+        writer.add_array("n.created", array("d", (row[1] for row in note_rows)))
+        writer.add_strings("n.text", [row[2] for row in note_rows])
+        writer.add_strings("n.text_lc", [row[2].lower() for row in note_rows])
+        tag_start = array("Q", [0])
+        tags = []
+        for row in note_rows:
+            tags.extend(row[3])
+            tag_start.append(len(tags))
+        writer.add_array("n.tag_start", tag_start)
+        writer.add_strings("n.tag", tags)
+        writer.add_strings("n.tag_lc", [tag.lower() for tag in tags])
+
+        writer.finish(
+            contacts=len(contact_rows), notes=len(note_rows), next_id=notes._next_id, **meta
+        )
@@ -17,4 +17,165 @@ DATA_FILENAME = "assistant_data.pkl"
 # Цей код автоматично з'єднує папку та ім'я файлу
 # os.path.join("DB", "file.pkl") -> "DB/file.pkl"
 # os.path.join(".", "file.pkl")  -> "file.pkl" (або просто "file.pkl")
-DEFAULT_STORAGE_PATH = os.path.join(DATA_DIR, DATA_FILENAME)
\ No newline at end of file
+DEFAULT_STORAGE_PATH = os.path.join(DATA_DIR, DATA_FILENAME)
+
+# --- Журнал змін ---
+
+# Кожна зміна контактів/нотаток дописується у журнал сеансу поруч зі знімком
+# (DB/assistant_data.<сеанс>.journal), тож дані переживають аварійне завершення
+JOURNAL_ENABLED = True
+
+# Розширення файлу журналу
+JOURNAL_SUFFIX = ".journal"
+
+# Розмір журналу (в байтах), після якого він згортається у новий знімок
+# (для великих книг поріг дорівнює розміру самого знімка)
+JOURNAL_COMPACT_THRESHOLD = 1024 * 1024
+
+# Викликати fsync після кожного запису (захист від вимкнення живлення,
+# але повільніше). Для kill -9 достатньо звичайного flush.
+JOURNAL_FSYNC = False
+
+
+# --- Контакти ---
+
+# Не дозволяти двом контактам мати однаковий телефон / email
+# (add-contact, update-contact та імпорт відхиляють такі значення)
+UNIQUE_PHONES = False
+UNIQUE_EMAILS = False
+
+# Скільки найближчих контактів показує find-contact -f без --limit
+FUZZY_TOP_K = 10
+
+# Скільки результатів пошуку (find-contact, find-note, find-tag, birthdays)
+# тримати в кеші запитів; кеш скидається будь-якою зміною книг. 0 - вимкнено
+QUERY_CACHE_SIZE = 128
+
+
+# --- Спільний доступ ---
+
+# Кілька процесів можуть працювати з тими самими даними: кожен пише власний
+# журнал (DB/assistant_data.<сеанс>.journal), а знімок замінюється під
+# блокуванням файлу DB/assistant_data.pkl.lock (fcntl; на Windows - без блокування).
+# Якщо інший процес зберіг дані раніше, зміни сеансу об'єднуються з його змінами.
+
+# Скільки секунд чекати, поки інший процес звільнить дані, перш ніж здатися
+LOCK_TIMEOUT = 10
+
+# Повідомляти користувача, якщо очікування тривало довше (в секундах)
+LOCK_WAIT_NOTICE = 0.2
+
+
+# --- Вивід ---
+
+# Розмір сторінки для ключа --page (show-all, show-notes, find-* тощо),
+# якщо --limit не вказано
+PAGE_SIZE = 20
+
+# В інтерактивному режимі довгий вивід показується поекранно:
+# Enter - наступний екран, q - припинити вивід
+PAGER_ENABLED = True
+
+
+# --- Статистика ---
+
+# Скільки найгарячіших функцій записувати у звіт профілювання (ключ --profile)
+PROFILE_TOP = 25
+
+
+# --- Демон ---
+
+# Unix-сокет, на якому демон (python main.py --daemon) приймає команди.
+# Поки демон працює, main.py під'єднується до нього як клієнт
+# і не завантажує дані сам
+DAEMON_SOCKET = os.path.join(DATA_DIR, "assistant.sock")
+
+# Найбільший розмір одного кадру протоколу (в байтах)
+DAEMON_MAX_FRAME = 16 * 1024 * 1024
+
+# Скільки рядків потокового виводу передається одним кадром
+DAEMON_CHUNK_LINES = 200
+
+
+# --- Автозбереження ---
+
+# Фоновий потік періодично записує знімок, якщо дані змінились
+AUTOSAVE_ENABLED = True
+
+# Як часто (в секундах) перевіряти, чи є незбережені зміни
+AUTOSAVE_INTERVAL = 30
+
+# Мінімальна кількість змін з останнього збереження, щоб записати знімок
+AUTOSAVE_DIRTY_THRESHOLD = 1
+
+
+# --- Сховище ---
+
+# Яке сховище використовувати:
+# "pickle" - знімок у файлі DATA_FILENAME + журнал змін (за замовчуванням)
+# "sqlite" - база SQLite: кожна зміна пишеться окремим рядком,
+#            пошук виконується запитами до індексованих таблиць
+# "columnar" - колонковий знімок, що відкривається через mmap майже миттєво;
+#              контакти та нотатки створюються лише при зверненні
+# "sharded" - знімок pickle, поділений на файли-шарди + журнал змін:
+#             збереження переписує лише шарди, в яких щось змінилось
+STORAGE_BACKEND = "pickle"
+
+# Стиснення знімків pickle (і шардів "sharded"): None - без стиснення,
+# "zlib" (файл формату gzip), "bz2" або "lzma". Стиснення визначається за першими
+# байтами файлу, тож знімки, записані з іншим налаштуванням, читаються як завжди.
+# Порівняти розмір і швидкість: python -m benchmarks.compression
+SNAPSHOT_COMPRESSION = None
+
+# Ім'я файлу бази SQLite
+SQLITE_FILENAME = "assistant_data.sqlite3"
+
+# Ім'я файлу колонкового знімка (журнали змін лежать поруч: assistant_columns.<сеанс>.journal)
+COLUMNAR_FILENAME = "assistant_columns.col"
+
+# Ім'я маніфесту знімка з шардами (самі шарди - у папці assistant_shards.shards поруч)
+SHARDED_FILENAME = "assistant_shards.manifest"
+
+# Кількість шардів контактів (контакт потрапляє в шард за хешем імені)
+CONTACT_SHARDS = 64
+
+# Скільки послідовних ID нотаток припадає на один шард
+NOTE_SHARD_SIZE = 10_000
+
+# Скільки шардів читати одночасно (потоки) при завантаженні
+SHARD_LOAD_THREADS = 4
+
+# При першому запуску з SQLite перенести дані з існуючого pickle-файлу
+SQLITE_MIGRATE_PICKLE = True
+
+# Шляхи до файлів для кожного сховища
+STORAGE_PATHS = {
+    "pickle": DEFAULT_STORAGE_PATH,
+    "sqlite": os.path.join(DATA_DIR, SQLITE_FILENAME),
+    "columnar": os.path.join(DATA_DIR, COLUMNAR_FILENAME),
+    "sharded": os.path.join(DATA_DIR, SHARDED_FILENAME),
+}
+
+
+# --- Імпорт / експорт ---
+
+# Скільки рядків файлу імпорту фіксується разом
+# (одна транзакція SQLite / один запис журналу на диск)
+IMPORT_CHUNK_SIZE = 1000
+
+# Кількість процесів для розбору та перевірки файлу імпорту контактів
+# (1 - без паралельності, 0 - за кількістю ядер; змінюється ключем --workers)
+IMPORT_WORKERS = 1
+
+# Розмір частини файлу (в байтах), яку отримує один процес
+IMPORT_CHUNK_BYTES = 4 * 1024 * 1024
+
+
+# --- Паралельний пошук ---
+
+# Пошук підрядка в нотатках (find-note без ключа) ділиться між процесами,
+# якщо нотаток щонайменше стільки; менші книги шукаються в одному процесі
+PARALLEL_SCAN_THRESHOLD = 100_000
+
+# Кількість процесів пошуку (0 - за кількістю ядер, 1 - без паралельності)
+SCAN_WORKERS = 0
@@ -0,0 +1,325 @@
+#
+#
+#
+import asyncio
+import json
+import os
+import re
+import signal
+import socket
+import struct
+import sys
+from itertools import islice
+from . import config
+from . import styles
+from .handlers import ErrorResult, StreamResult, spool_stream
+from .storage import get_backend, load_data, pop_notices, save_data, start_autosave
+
+# Кадр протоколу: 4 байти довжини (big-endian) + JSON в UTF-8.
+# Запит клієнта: {"command": "...", "args": [...]}
+# Відповідь демона: нуль або більше {"lines": [...]}, потім {"end": true, ...}:
+#   "error" - повідомлення, якщо команда не виконалась (ErrorResult),
+#   "failed" - true, якщо помилка сталася посеред потокового виводу
+_HEADER = struct.Struct(">I")
+
+# Команда клієнта, що зупиняє демона (із збереженням даних)
+SHUTDOWN_COMMAND = "shutdown"
+
+# Кольори терміналу (ANSI), які демон додає до виводу
+_ANSI_RE = re.compile(r"\x1b\[[0-9;]*m")
+
+
+class ProtocolError(Exception):
+    """Пошкоджений або завеликий кадр"""
+
+
+def encode_frame(message: dict) -> bytes:
+    payload = json.dumps(message, ensure_ascii=False).encode("utf-8")
+    if len(payload) > config.DAEMON_MAX_FRAME:
+        raise ProtocolError(f"Кадр завеликий: {len(payload)} байт")
+    return _HEADER.pack(len(payload)) + payload
+
+
+def _decode_payload(payload: bytes) -> dict:
+    try:
+        message = json.loads(payload.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ProtocolError(f"Невірний кадр: {e}")
+    if not isinstance(message, dict):
+        raise ProtocolError("Кадр має бути JSON-об'єктом")
+    return message
+
+
+def _check_length(length: int):
+    if length > config.DAEMON_MAX_FRAME:
+        raise ProtocolError(f"Кадр завеликий: {length} байт")
+
+
+async def read_frame(reader: asyncio.StreamReader) -> dict:
+    """Наступний кадр або None, якщо з'єднання закрито між кадрами"""
+    try:
+        header = await reader.readexactly(_HEADER.size)
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            return None
+        raise ProtocolError("З'єднання обірвалось посеред кадру")
+    (length,) = _HEADER.unpack(header)
+    _check_length(length)
+    try:
+        payload = await reader.readexactly(length)
+    except asyncio.IncompleteReadError:
+        raise ProtocolError("З'єднання обірвалось посеред кадру")
+    return _decode_payload(payload)
+
+
+def socket_path(path: str = None) -> str:
+    return path or config.DAEMON_SOCKET
+
+
+def is_running(path: str = None) -> bool:
+    """Чи слухає демон на сокеті (а не лише лежить старий файл сокета)"""
+    path = socket_path(path)
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(path):
+        return False
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        return False
+    finally:
+        probe.close()
+    return True
+
+
+class Daemon:
+    """
+    Тримає книги в пам'яті та виконує команди клієнтів, що під'єднуються
+    до Unix-сокета. Команди виконуються по одній (asyncio.Lock на виконання
+    команди і формування всього її виводу), тож клієнти не бачать
+    напіввиконаних змін одне одного. Вивід надсилається вже без блокування,
+    тож клієнт, що не дочитує відповідь, не затримує інших.
+    Дані завантажує і зберігає лише демон.
+    """
+
+    def __init__(self, execute, path: str = None):
+        # execute(command, args, book, notes) - диспетчер команд (main.execute)
+        self.execute = execute
+        self.path = socket_path(path)
+        self.book = self.notes = self.autosaver = None
+        self._command_lock = None
+        self._stopping = None
+        # Під'єднані клієнти: writer -> задача, що їх обслуговує
+        self._clients = {}
+
+    async def serve(self):
+        if is_running(self.path):
+            raise RuntimeError(f"Демон вже працює ({self.path}).")
+        if os.path.exists(self.path):
+            # Файл лишився від демона, що завершився аварійно
+            os.remove(self.path)
+        storage_dir = os.path.dirname(self.path)
+        if storage_dir:
+            os.makedirs(storage_dir, exist_ok=True)
+
+        self.book, self.notes = load_data()
+        self.autosaver = start_autosave(self.book, self.notes)
+        self._command_lock = asyncio.Lock()
+        self._stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, self._stopping.set)
+
+        server = await asyncio.start_unix_server(self._handle_client, path=self.path)
+        # Доступ до сокета - лише власнику, як і до файлу даних
+        os.chmod(self.path, 0o600)
+        print(f"{styles.INFO}Демон слухає {self.path}", file=sys.stderr)
+        try:
+            async with server:
+                await self._stopping.wait()
+                # Від'єднуємо клієнтів і чекаємо, поки їх задачі завершаться
+                for writer in list(self._clients):
+                    writer.close()
+                await asyncio.gather(*self._clients.values(), return_exceptions=True)
+        finally:
+            # Спершу дочекаємося поточної команди, потім зберігаємо
+            async with self._command_lock:
+                self.autosaver.stop()
+                save_data(self.book, self.notes)
+                get_backend().close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            print(f"{styles.WARNING}Демон зупинено, дані збережено.", file=sys.stderr)
+
+    async def _handle_client(self, reader, writer):
+        self._clients[writer] = asyncio.current_task()
+        try:
+            while True:
+                request = await read_frame(reader)
+                if request is None:
+                    break
+                async with self._command_lock:
+                    lines, end = self._run_command(request)
+                # Відповідь передається вже без блокування: клієнт, що повільно
+                # читає (пейджер), не затримує команди інших клієнтів
+                await self._send_reply(lines, end, writer)
+        except (ProtocolError, ConnectionError) as e:
+            if not self._stopping.is_set():
+                print(f"{styles.ERROR}Клієнт від'єднаний: {e}", file=sys.stderr)
+        finally:
+            self._clients.pop(writer, None)
+            writer.close()
+
+    def _run_command(self, request: dict) -> tuple:
+        """
+        Виконує команду (під _command_lock) і повертає відповідь:
+        (рядки, кадр "end"). Потоковий вивід дочитується тут же
+        у тимчасовий файл (handlers.spool_stream), тож відповідь - знімок
+        стану книг на момент команди, і надсилати її можна без блокування
+        """
+        command = request.get("command")
+        args = request.get("args", [])
+        if not isinstance(command, str) or not isinstance(args, list):
+            return (), {"end": True, "error": "Невірний запит."}
+        if command == SHUTDOWN_COMMAND:
+            # Зупинка не залежить від того, чи дочитає клієнт відповідь
+            self._stopping.set()
+            return ["Демон зупиняється, дані буде збережено."], {"end": True}
+
+        with self.autosaver.lock:
+            result = self.execute(command, [str(arg) for arg in args], self.book, self.notes)
+            if isinstance(result, StreamResult):
+                lines = spool_stream(result)
+        for notice in pop_notices():
+            print(f"{styles.WARNING}{notice}", file=sys.stderr)
+        if isinstance(result, ErrorResult):
+            return (), {"end": True, "error": str(result)}
+        if isinstance(result, StreamResult):
+            return lines, {"end": True, "failed": result.error is not None}
+        return [str(result)], {"end": True}
+
+    async def _send_reply(self, lines, end: dict, writer):
+        """Рядки відповіді передаються порціями по config.DAEMON_CHUNK_LINES"""
+        try:
+            rows = iter(lines)
+            while True:
+                chunk = [line.rstrip("\n") for line in islice(rows, config.DAEMON_CHUNK_LINES)]
+                if not chunk:
+                    break
+                writer.write(encode_frame({"lines": chunk}))
+                await writer.drain()
+            writer.write(encode_frame(end))
+            await writer.drain()
+        finally:
+            close = getattr(lines, "close", None)
+            if close is not None:
+                close()
+
+
+def run_daemon(execute, path: str = None) -> int:
+    """Запускає демона на переднім плані; повертає код завершення"""
+    if not hasattr(socket, "AF_UNIX"):
+        print(f"{styles.ERROR}Режим демона потребує Unix-сокетів.", file=sys.stderr)
+        return 2
+    try:
+        asyncio.run(Daemon(execute, path).serve())
+    except RuntimeError as e:
+        print(f"{styles.ERROR}{e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+class Client:
+    """
+    Тонкий клієнт демона: одне постійне з'єднання, блокуючі запити.
+    execute() повертає ErrorResult або StreamResult, як і локальний диспетчер.
+    plain=True прибирає з відповідей кольори (для пакетного режиму).
+    """
+
+    def __init__(self, path: str = None, plain: bool = False):
+        self.path = socket_path(path)
+        self.plain = plain
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.connect(self.path)
+        self._file = self._sock.makefile("rb")
+        # Незавершена відповідь попереднього запиту (вивід прочитано не до кінця)
+        self._pending = None
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _read_frame(self) -> dict:
+        header = self._file.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ConnectionError("Демон закрив з'єднання.")
+        (length,) = _HEADER.unpack(header)
+        _check_length(length)
+        payload = self._file.read(length)
+        if len(payload) < length:
+            raise ConnectionError("Демон закрив з'єднання.")
+        frame = _decode_payload(payload)
+        if self.plain:
+            if "lines" in frame:
+                frame["lines"] = [_ANSI_RE.sub("", line) for line in frame["lines"]]
+            if frame.get("error"):
+                frame["error"] = _ANSI_RE.sub("", frame["error"])
+        return frame
+
+    def _drain(self):
+        if self._pending is not None:
+            self._pending.close()
+
+    def execute(self, command: str, args: list):
+        self._drain()
+        self._sock.sendall(encode_frame({"command": command, "args": args}))
+        frame = self._read_frame()
+        if frame.get("end") and frame.get("error"):
+            return ErrorResult(frame["error"])
+        result = StreamResult(None)
+        result.lines = self._pending = _Reply(self, frame, result)
+        return result
+
+
+class _Reply:
+    """
+    Рядки відповіді демона, що читаються кадр за кадром.
+    close() дочитує решту кадрів, щоб з'єднання було готове до наступного запиту.
+    """
+
+    def __init__(self, client: Client, frame: dict, result: StreamResult):
+        self._client = client
+        self._result = result
+        self._frame = frame
+        self._lines = iter(frame.get("lines", ()))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        for line in self._lines:
+            return line
+        while not self._frame.get("end"):
+            self._next_frame()
+            for line in self._lines:
+                return line
+        self.close()
+        raise StopIteration
+
+    def _next_frame(self):
+        self._frame = self._client._read_frame()
+        self._lines = iter(self._frame.get("lines", ()))
+        if self._frame.get("failed"):
+            self._result.error = ErrorResult("Помилка посеред виводу команди.")
+
+    def close(self):
+        while not self._frame.get("end"):
+            self._next_frame()
+        self._lines = iter(())
+        if self._client._pending is self:
+            self._client._pending = None
@@ -2,9 +2,15 @@
 #
 #
 import functools
-from .models import AddressBook, Record, NoteBook, Note
+import tempfile
+from itertools import islice
+from .models import AddressBook, Record, NoteBook, Note, phone_key, email_key
+from . import bulk
+from . import cache
 from . import styles
-from datetime import datetime
+from . import config
+from . import stats
+from datetime import datetime, date
 
 # Символи для "дерева"
 T_BRANCH = "├──"
@@ -70,6 +76,86 @@ def _parse_contact_args(args: list) -> dict:
     return parsed_data
 
 
+# Ключі сторінок для команд, що виводять списки
+PAGE_FLAGS = ("--offset", "--limit", "--page")
+
+
+def _parse_page_args(args: list) -> tuple:
+    """
+    Вилучає з аргументів ключі сторінок: --offset N, --limit N, --page N
+    (--page N - N-та сторінка розміром --limit, за замовч. config.PAGE_SIZE)
+    Повертає (решта аргументів, offset, limit); limit=None - без обмеження
+    """
+    rest, values = [], {}
+    i = 0
+    while i < len(args):
+        key = args[i]
+        if key not in PAGE_FLAGS:
+            rest.append(key)
+            i += 1
+            continue
+        if key in values:
+            raise ValueError(f"Ключ '{key}' може бути вказано лише один раз.")
+        if i + 1 >= len(args):
+            raise ValueError(f"Після '{key}' очікується число.")
+        try:
+            values[key] = int(args[i + 1])
+        except ValueError:
+            raise ValueError(f"Невірний формат для '{key}': '{args[i + 1]}'")
+        if values[key] < 0:
+            raise ValueError(f"Значення '{key}' не може бути від'ємним.")
+        i += 2
+
+    offset = values.get("--offset", 0)
+    limit = values.get("--limit")
+    if limit == 0:
+        raise ValueError("Значення '--limit' має бути більшим за 0.")
+    if "--page" in values:
+        if "--offset" in values:
+            raise ValueError("Ключі '--page' та '--offset' не можна поєднувати.")
+        if values["--page"] < 1:
+            raise ValueError("Сторінки нумеруються з 1.")
+        limit = limit or config.PAGE_SIZE
+        offset = (values["--page"] - 1) * limit
+    return rest, offset, limit
+
+
+def _cached(key: tuple, books: tuple, compute):
+    """
+    Результат пошуку з кешу запитів, якщо книги не змінились відтоді,
+    інакше compute(). key - команда та нормалізовані аргументи
+    """
+    version = tuple(book.query_version for book in books)
+    return cache.QUERY_CACHE.get(key, version, compute)
+
+
+def _normalize(query: str) -> str:
+    """Запит для ключа кешу, коли пошук не враховує регістр і кількість пробілів"""
+    return " ".join(query.lower().split())
+
+
+def _no_extra_args(args: list):
+    if args:
+        raise ValueError(f"Неочікувані аргументи: {' '.join(args)}")
+
+
+def _page(items, offset: int, limit):
+    """Зріз ітератора [offset, offset + limit) без створення списку"""
+    return islice(items, offset, None if limit is None else offset + limit)
+
+
+# Скільки байтів виводу spool_stream тримає в пам'яті (решта - у тимчасовому файлі)
+SPOOL_MEMORY_SIZE = 1 << 20
+
+
+class ErrorResult(str):
+    """
+    Повідомлення про помилку команди.
+    Виводиться як звичайний рядок, але дозволяє відрізнити невдалу команду
+    від успішної (наприклад, у пакетному режимі)
+    """
+
+
 # Декоратор для обробки помилок
 def input_error(func):
     """
@@ -81,20 +167,91 @@ def input_error(func):
         try:
             return func(*args, **kwargs)
         except ValueError as e:
-            return f"{styles.ERROR}ValueError: {e}"
+            return ErrorResult(f"{styles.ERROR}ValueError: {e}")
         except KeyError as e:
             # Змінено, щоб коректно показувати ID або Ім'я
-            return f"{styles.ERROR}KeyError: {e}"
+            return ErrorResult(f"{styles.ERROR}KeyError: {e}")
         except AttributeError:
-            return f"{styles.ERROR}AttributeError: Контакт не знайдено або невірний атрибут."
+            return ErrorResult(
+                f"{styles.ERROR}AttributeError: Контакт не знайдено або невірний атрибут."
+            )
         except IndexError:
-            return f"{styles.WARNING}Недостатньо аргументів."
+            return ErrorResult(f"{styles.WARNING}Недостатньо аргументів.")
         except Exception as e:
-            return f"{styles.ERROR}Сталася непередбачена помилка: {e}"
+            return ErrorResult(f"{styles.ERROR}Сталася непередбачена помилка: {e}")
 
     return inner
 
 
+class StreamResult:
+    """
+    Вивід команди, що формується рядок за рядком під час ітерації:
+    перший рядок готовий одразу, а пам'ять не росте з розміром книги.
+    Аргументи перевіряються ще до створення StreamResult (під input_error);
+    помилка посеред виводу стає останнім рядком і зберігається в self.error.
+    Якщо вивід прочитано не до кінця, його слід закрити через close().
+    str() збирає весь вивід, як у звичайних команд.
+    """
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.error = None
+
+    def __iter__(self):
+        try:
+            yield from self.lines
+        except Exception as e:
+            self.error = ErrorResult(f"{styles.ERROR}Сталася непередбачена помилка: {e}")
+            yield self.error
+
+    def close(self):
+        close = getattr(self.lines, "close", None)
+        if close is not None:
+            close()
+
+    def __str__(self):
+        return "\n".join(self)
+
+
+def spool_stream(result: StreamResult, keep: bool = True, keep_error: bool = True):
+    """
+    Дочитує потоковий вивід до кінця і закриває його, щоб передати вивід
+    уже після того, як звільнено блокування. Повертає тимчасовий файл з рядками
+    виводу (у пам'яті лише перші SPOOL_MEMORY_SIZE байтів) або (), якщо keep=False.
+    keep_error=False пропускає рядок помилки (result.error)
+    """
+    spool = None
+    if keep:
+        spool = tempfile.SpooledTemporaryFile(
+            max_size=SPOOL_MEMORY_SIZE, mode="w+", encoding="utf-8", newline="\n"
+        )
+    try:
+        for chunk in result:
+            if spool is not None and (keep_error or chunk is not result.error):
+                spool.write(chunk + "\n")
+    finally:
+        result.close()
+    if spool is None:
+        return ()
+    spool.seek(0)
+    return spool
+
+
+def _stream(header: str, items) -> StreamResult:
+    """Заголовок, а далі str() кожного елемента"""
+
+    def lines():
+        yield header
+        shown = False
+        for item in items:
+            shown = True
+            yield str(item)
+        if not shown:
+            yield f"{styles.WARNING}На цій сторінці немає записів."
+
+    return StreamResult(lines())
+
+
 # Функція для пошуку контакту
 def get_record(name: str, book: AddressBook) -> Record:
     """Знаходить запис або кидає KeyError"""
@@ -123,6 +280,7 @@ def add_contact(args: list, book: AddressBook) -> str:
 
     if book.find(data["name"]):
         raise ValueError(f"Контакт '{data['name']}' вже існує.")
+    book.check_unique(data["name"], data["phone"], data["email"])
 
     record = Record(data["name"])
     messages = []
@@ -171,6 +329,7 @@ def update_contact(args: list, book: AddressBook) -> str:
 
     if not any([data["phone"], data["email"], data["birthday"], data["address"]]):
         raise ValueError("Вкажіть хоча б одне поле для оновлення (-p, -e, -b, -a).")
+    book.check_unique(record.name.value, data["phone"], data["email"])
 
     messages = []
 
@@ -238,17 +397,19 @@ def show_contact(args: list, book: AddressBook) -> str:
 
 
 @input_error
-def show_all(args: list, book: AddressBook) -> str:
+def show_all(args: list, book: AddressBook) -> StreamResult:
     """
-    Показує всі контакти. 'args' не використовується
+    Показує всі контакти
+    Приймає: [--limit N] [--offset N | --page N]
     """
+    args, offset, limit = _parse_page_args(args)
+    _no_extra_args(args)
     if not book.data:
         return f"{styles.WARNING}Адресна книга порожня."
 
-    response = [f"{styles.SUCCESS}--- Всі Контакти ---"]
-    for record in book.data.values():
-        response.append(str(record))
-    return "\n".join(response)
+    return _stream(
+        f"{styles.SUCCESS}--- Всі Контакти ---", _page(book.data.values(), offset, limit)
+    )
 
 
 @input_error
@@ -297,7 +458,11 @@ def birthdays(args: list, book: AddressBook) -> str:
         except ValueError:
             raise ValueError(f"Невірний формат для кількості днів: '{args_list[0]}'")
 
-    upcoming = book.get_upcoming_birthdays(days, reference_date=reference_date)
+    upcoming = _cached(
+        ("birthdays", days, reference_date or date.today()),
+        (book,),
+        lambda: book.get_upcoming_birthdays(days, reference_date=reference_date),
+    )
 
     if reference_date:
         start_day_str = f"з {reference_date.strftime('%d.%m.%Y')}"
@@ -322,27 +487,68 @@ def birthdays(args: list, book: AddressBook) -> str:
     return "\n".join(response)
 
 
+# Точний пошук контакту за полем:
+# ключ -> (метод книги, назва поля для повідомлень, нормалізація значення)
+_LOOKUP_FLAGS = {
+    "-p": ("find_by_phone", "телефоном", phone_key),
+    "-e": ("find_by_email", "email", email_key),
+}
+
+
 @input_error
-def find_contact(args: list, book: AddressBook) -> str:
+def find_contact(args: list, book: AddressBook) -> StreamResult:
     """
-    Пошук контактів за текстом
-    Приймає: [query...]
+    Пошук контактів за текстом, нечіткий пошук (з помилками друку)
+    або точний пошук за телефоном / email
+    Приймає: [query...] | -f [query...] | -p [phone] | -e [email] [--limit N] [--offset N | --page N]
     """
+    args, offset, limit = _parse_page_args(args)
+    if args and args[0] == "-f":
+        query = " ".join(args[1:])
+        if not query:
+            raise ValueError("Після ключа '-f' вкажіть запит.")
+        # Рахуються лише перші k найближчих - стільки, скільки буде показано
+        k = offset + (limit or config.FUZZY_TOP_K)
+        found = _cached(
+            ("find-contact", "-f", _normalize(query), k), (book,), lambda: book.fuzzy_search(query, k)
+        )
+        if not found:
+            return f"{styles.WARNING}Не знайдено контактів, схожих на '{query}'."
+        return _stream(
+            f"{styles.SUCCESS}Контакти, схожі на '{query}':",
+            (f"{record} {styles.INFO}(помилок: {distance})" for record, distance in found[offset:]),
+        )
+    if args and args[0] in _LOOKUP_FLAGS:
+        method, field, normalize = _LOOKUP_FLAGS[args[0]]
+        value = " ".join(args[1:])
+        if not value:
+            raise ValueError(f"Після ключа '{args[0]}' вкажіть значення.")
+        found = _cached(
+            ("find-contact", args[0], normalize(value)),
+            (book,),
+            lambda: getattr(book, method)(value),
+        )
+        if not found:
+            return f"{styles.WARNING}Не знайдено контактів з {field} '{value}'."
+        return _stream(
+            f"{styles.SUCCESS}Контакти з {field} '{value}':", _page(found, offset, limit)
+        )
+
     query = " ".join(args)
     if not query:
         raise ValueError("Введіть пошуковий запит.")
 
-    found = book.search(query)
+    found = _cached(("find-contact", query.lower()), (book,), lambda: book.search(query))
 
     if not found:
         return (
             f"{styles.WARNING}Не знайдено контактів, що відповідають запиту '{query}'."
         )
 
-    response = [f"{styles.SUCCESS}Контакти, що відповідають запиту '{query}':"]
-    for record in found:
-        response.append(str(record))
-    return "\n".join(response)
+    return _stream(
+        f"{styles.SUCCESS}Контакти, що відповідають запиту '{query}':",
+        _page(found, offset, limit),
+    )
 
 
 # --- НОТАТКИ ---
@@ -384,52 +590,103 @@ def add_tag(args: list, notes: NoteBook) -> str:
 
 
 @input_error
-def show_notes(args: list, notes: NoteBook) -> str:
-    """Показує всі нотатки"""
+def show_notes(args: list, notes: NoteBook) -> StreamResult:
+    """
+    Показує всі нотатки (за ID)
+    Приймає: [--limit N] [--offset N | --page N]
+    """
+    args, offset, limit = _parse_page_args(args)
+    _no_extra_args(args)
     if not notes.data:
         return f"{styles.WARNING}Книга нотаток порожня."
 
-    response = [f"{styles.SUCCESS}--- Всі Нотатки ---"]
-    # Сортуємо за ID (int) перед виводом
-    for note_id in sorted(notes.data.keys()):
-        response.append(str(notes.data[note_id]))
-    return "\n".join(response)
+    # Книга тримає нотатки впорядкованими за ID, сортувати не потрібно
+    return _stream(f"{styles.SUCCESS}--- Всі Нотатки ---", notes.sorted_by_id(offset, limit))
+
+
+# Ключі режимів пошуку find-note
+NOTE_SEARCH_FLAGS = {"-w": "word", "-p": "prefix", "-ph": "phrase"}
 
 
 @input_error
-def find_note(args: list, notes: NoteBook) -> str:
+def find_note(args: list, notes: NoteBook) -> StreamResult:
     """
     Пошук нотаток за текстом
-    Приймає: [query...]
+    Приймає: [-w | -p | -ph | --top N] [query...] [--limit N] [--offset N | --page N]
+    Без ключа шукає підрядок; -w - усі слова, -p - префікси слів, -ph - фраза;
+    --top N - N найрелевантніших нотаток (BM25 за текстом і тегами)
     """
+    args, offset, limit = _parse_page_args(args)
+    if args and args[0] == "--top":
+        if len(args) < 2 or not args[1].isdigit() or int(args[1]) < 1:
+            raise ValueError("Після '--top' очікується додатне число.")
+        top = int(args[1])
+        query = " ".join(args[2:])
+        if not query:
+            raise ValueError("Введіть пошуковий запит.")
+        found = _cached(
+            ("find-note", "--top", _normalize(query), top), (notes,), lambda: notes.rank_by_text(query, top)
+        )
+        if not found:
+            return f"{styles.WARNING}Не знайдено нотаток зі словами '{query}'."
+        return _stream(
+            f"{styles.SUCCESS}Найрелевантніші нотатки для запиту '{query}':",
+            (f"{styles.INFO}Оцінка: {score:.2f}\n{note}" for note, score in _page(found, offset, limit)),
+        )
+
+    mode = "substring"
+    if args and args[0] in NOTE_SEARCH_FLAGS:
+        mode = NOTE_SEARCH_FLAGS[args[0]]
+        args = args[1:]
+        if not args:
+            raise ValueError("Введіть пошуковий запит.")
     query = " ".join(args)
-    found = notes.search_by_text(query)
+    # Підрядок шукається як є (з пробілами), решта режимів - за словами
+    key = query.lower() if mode == "substring" else _normalize(query)
+    found = _cached(
+        ("find-note", mode, key), (notes,), lambda: notes.search_by_text(query, mode=mode)
+    )
 
     if not found:
         return f"{styles.WARNING}Не знайдено нотаток, що містять '{query}'."
 
-    response = [f"{styles.SUCCESS}Нотатки, що відповідають запиту '{query}':"]
-    for note in found:
-        response.append(str(note))
-    return "\n".join(response)
+    return _stream(
+        f"{styles.SUCCESS}Нотатки, що відповідають запиту '{query}':",
+        _page(found, offset, limit),
+    )
+
+
+# Ключі режимів пошуку find-tag
+TAG_SEARCH_FLAGS = {"-e": "exact", "-p": "prefix"}
 
 
 @input_error
-def find_tag(args: list, notes: NoteBook) -> str:
+def find_tag(args: list, notes: NoteBook) -> StreamResult:
     """
     Пошук нотаток за тегом
-    Приймає: [tag_query]
+    Приймає: [-e | -p] [tag_query] [--limit N] [--offset N | --page N]
+    Без ключа шукає підрядок у тегах; -e - точний збіг, -p - початок тегу
     """
+    args, offset, limit = _parse_page_args(args)
+    mode = "substring"
+    if args and args[0] in TAG_SEARCH_FLAGS:
+        mode = TAG_SEARCH_FLAGS[args[0]]
+        args = args[1:]
+        if not args:
+            raise ValueError("Введіть тег для пошуку.")
     tag_query = " ".join(args)
-    found = notes.search_by_tag(tag_query)
+    found = _cached(
+        ("find-tag", mode, tag_query.lower()),
+        (notes,),
+        lambda: notes.search_by_tag(tag_query, mode=mode),
+    )
 
     if not found:
         return f"{styles.WARNING}Не знайдено нотаток з тегом '{tag_query}'."
 
-    response = [f"{styles.SUCCESS}Нотатки з тегом '{tag_query}':"]
-    for note in found:
-        response.append(str(note))
-    return "\n".join(response)
+    return _stream(
+        f"{styles.SUCCESS}Нотатки з тегом '{tag_query}':", _page(found, offset, limit)
+    )
 
 
 @input_error
@@ -470,19 +727,180 @@ def update_note(args: list, notes: NoteBook) -> str:
 
 
 @input_error
-def sort_notes_by_tags(args: list, notes: NoteBook) -> str:
+def sort_notes_by_tags(args: list, notes: NoteBook) -> StreamResult:
     """
     Сортує та виводить нотатки за тегами (за алфавітом першого тега)
-    'args' не використовується
+    Приймає: [--limit N] [--offset N | --page N]
     """
-    sorted_notes = notes.sort_by_tags()
-
-    if not sorted_notes:
+    args, offset, limit = _parse_page_args(args)
+    _no_extra_args(args)
+    if not notes.data:
         return f"{styles.WARNING}Книга нотаток порожня, нічого сортувати."
 
-    response = [f"{styles.SUCCESS}--- Нотатки, відсортовані за тегами ---"]
-    for note in sorted_notes:
-        response.append(str(note))
+    return _stream(
+        f"{styles.SUCCESS}--- Нотатки, відсортовані за тегами ---",
+        notes.sort_by_tags(offset, limit),
+    )
+
+
+# --- ІМПОРТ / ЕКСПОРТ ---
+
+
+def _parse_file_args(args: list, allowed: tuple = ("--format",)) -> tuple:
+    """
+    Парсить [файл] та ключі з 'allowed' (--format csv|jsonl, --reject файл, --workers N)
+    Повертає (шлях, словник ключ без "--" -> значення)
+    """
+    if not args:
+        raise IndexError
+    path, options = args[0], {}
+    i = 1
+    while i < len(args):
+        key = args[i]
+        if key not in allowed:
+            raise ValueError(f"Невідомий ключ '{key}'. Дозволені: {', '.join(allowed)}.")
+        if i + 1 >= len(args):
+            raise ValueError(f"Відсутнє значення для ключа '{key}'")
+        options[key[2:]] = args[i + 1]
+        i += 2
+    if "format" in options:
+        options["format"] = options["format"].lower()
+    if "workers" in options:
+        try:
+            options["workers"] = int(options["workers"])
+        except ValueError:
+            raise ValueError(f"Невірний формат для '--workers': '{options['workers']}'")
+        if options["workers"] < 0:
+            raise ValueError("Значення '--workers' не може бути від'ємним.")
+    return path, options
+
+
+def _import_summary(what: str, result: bulk.ImportResult) -> str:
+    message = f"{styles.SUCCESS}Імпортовано {what}: {result.imported}."
+    if result.rejected:
+        message += (
+            f"\n{styles.WARNING}Відхилено рядків: {result.rejected}"
+            f" (деталі у файлі '{result.reject_path}')."
+        )
+    return message
+
+
+@input_error
+def import_contacts(args: list, book: AddressBook) -> str:
+    """
+    Імпортує контакти з CSV / JSON Lines
+    Приймає: [файл] (опціонально: --format csv|jsonl --reject [файл] --workers N)
+    --workers: кількість процесів для розбору файлу (0 - за кількістю ядер)
+    """
+    path, options = _parse_file_args(args, ("--format", "--reject", "--workers"))
+    try:
+        result = bulk.import_contacts(
+            book,
+            path,
+            options.get("format"),
+            options.get("reject"),
+            workers=options.get("workers"),
+        )
+    except OSError as e:
+        raise ValueError(f"Не вдалося прочитати файл '{path}': {e.strerror}")
+    return _import_summary("контактів", result)
+
+
+@input_error
+def export_contacts(args: list, book: AddressBook) -> str:
+    """
+    Експортує контакти у CSV / JSON Lines
+    Приймає: [файл] (опціонально: --format csv|jsonl)
+    """
+    path, options = _parse_file_args(args)
+    try:
+        count = bulk.export_contacts(book, path, options.get("format"))
+    except OSError as e:
+        raise ValueError(f"Не вдалося записати файл '{path}': {e.strerror}")
+    return f"{styles.SUCCESS}Експортовано контактів: {count} у файл '{path}'."
+
+
+@input_error
+def import_notes(args: list, notes: NoteBook) -> str:
+    """
+    Імпортує нотатки з CSV / JSON Lines (нотатки отримують нові ID)
+    Приймає: [файл] (опціонально: --format csv|jsonl --reject [файл])
+    """
+    path, options = _parse_file_args(args, ("--format", "--reject"))
+    try:
+        result = bulk.import_notes(notes, path, options.get("format"), options.get("reject"))
+    except OSError as e:
+        raise ValueError(f"Не вдалося прочитати файл '{path}': {e.strerror}")
+    return _import_summary("нотаток", result)
+
+
+@input_error
+def export_notes(args: list, notes: NoteBook) -> str:
+    """
+    Експортує нотатки у CSV / JSON Lines
+    Приймає: [файл] (опціонально: --format csv|jsonl)
+    """
+    path, options = _parse_file_args(args)
+    try:
+        count = bulk.export_notes(notes, path, options.get("format"))
+    except OSError as e:
+        raise ValueError(f"Не вдалося записати файл '{path}': {e.strerror}")
+    return f"{styles.SUCCESS}Експортовано нотаток: {count} у файл '{path}'."
+
+
+# --- СТАТИСТИКА ---
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.2f}"
+
+
+@input_error
+def show_stats(args: list) -> str:
+    """
+    Показує статистику сеансу: команди та операції збереження
+    Приймає: [--reset] - очистити лічильники
+    """
+    session = stats.STATS
+    if args == ["--reset"]:
+        session.reset()
+        return f"{styles.SUCCESS}Статистику очищено."
+    _no_extra_args(args)
+    if not session.commands and not session.operations:
+        return f"{styles.WARNING}Статистика порожня: ще не виконано жодної команди."
+
+    response = [
+        f"{styles.SUCCESS}--- Команди (час у мс, вивід у символах) ---",
+        f"{styles.HIGHLIGHT}{'Команда':<16}{'Викликів':>9}{'Помилок':>9}"
+        f"{'p50':>9}{'p95':>9}{'p99':>9}{'Макс.':>9}{'Вивід':>9}",
+    ]
+    for name, command in sorted(session.commands.items()):
+        latency = command.latency
+        response.append(
+            f"{styles.INFO}{name:<16}{command.calls:>9}{command.errors:>9}"
+            f"{_ms(latency.percentile(50)):>9}{_ms(latency.percentile(95)):>9}"
+            f"{_ms(latency.percentile(99)):>9}{_ms(latency.max):>9}"
+            f"{command.output_total // command.calls:>9}"
+        )
+    if session.operations:
+        response.append(f"{styles.SUCCESS}--- Операції (час у мс) ---")
+        response.append(
+            f"{styles.HIGHLIGHT}{'Операція':<16}{'Разів':>9}{'Всього':>11}{'Сер.':>9}{'Макс.':>9}"
+        )
+        for name, histogram in sorted(session.operations.items()):
+            response.append(
+                f"{styles.INFO}{name:<16}{histogram.count:>9}{_ms(histogram.total):>11}"
+                f"{_ms(histogram.total / histogram.count):>9}{_ms(histogram.max):>9}"
+            )
+    hits = session.counters.get("query_cache.hit", 0)
+    misses = session.counters.get("query_cache.miss", 0)
+    if hits or misses:
+        response.append(f"{styles.SUCCESS}--- Кеш запитів ---")
+        response.append(
+            f"{styles.INFO}Влучань: {hits}, промахів: {misses}"
+            f" ({hits / (hits + misses):.0%} влучань), записів: {len(cache.QUERY_CACHE)}"
+            f" з {config.QUERY_CACHE_SIZE}"
+        )
     return "\n".join(response)
 
 
@@ -503,7 +921,17 @@ def show_help(args: list) -> str:
         f"{G}--- Загальні Команди ---",
         f"  {H}hello{C}: Вітання.",
         f"  {H}help{C}: Ця довідка.",
+        f"  {H}stats {C}[--reset]: Статистика сеансу: виклики, помилки та час команд (p50/p95/p99),",
+        f"    {C}розмір виводу, час завантаження та збереження даних.",
         f"  {H}exit{C} (або {H}close{C}): Зберегти дані та вийти.",
+        f"  {H}shutdown{C}: Зупинити демона й зберегти дані (лише при роботі через демона).",
+        "",
+        f"{G}--- Сторінки ---",
+        f"  {C}Команди, що виводять списки (show-all, find-contact, show-notes, find-note,",
+        f"  {C}find-tag, sort-notes), приймають:",
+        f"    {H}--limit N{C}: показати не більше N записів.",
+        f"    {H}--offset N{C}: пропустити перші N записів.",
+        f"    {H}--page N{C}: показати N-ту сторінку (розміром --limit, за замовч. {config.PAGE_SIZE}).",
         "",
         f"{G}--- Робота з Контактами ---",
         f"  {H}add-contact {C}-n [Ім'я] [Опції...]",
@@ -520,12 +948,17 @@ def show_help(args: list) -> str:
         f"    {C}Показує детальну інформацію про один контакт.",
         f'    {E}Приклад: show-contact "John Doe"',
         "",
-        f"  {H}show-all",
+        f"  {H}show-all {C}[--limit N] [--offset N | --page N]",
         f"    {C}Показує список всіх контактів.",
+        f"    {E}Приклад: show-all --page 2 --limit 50",
         "",
-        f"  {H}find-contact {C}[Запит]",
+        f"  {H}find-contact {C}[Запит] [--limit N] [--offset N | --page N]",
         f"    {C}Шукає контакти за збігом в імені, телефоні, email тощо.",
+        f"    {C}Точний пошук: {H}find-contact -p [телефон]{C} або {H}find-contact -e [email]",
+        f"    {C}Пошук з помилками друку: {H}find-contact -f [запит]{C} (найближчі спершу)",
         f"    {E}Приклад: find-contact John",
+        f'    {E}Приклад: find-contact -p "+38 (050) 123-45-67"',
+        f"    {E}Приклад: find-contact -f Jhon Smiht",
         "",
         f"  {H}birthdays {C}[N] [-d DD.MM.YYYY]",
         f"    {C}Показує дні народження протягом {H}N{C} днів (за замовч. 7).",
@@ -543,7 +976,7 @@ def show_help(args: list) -> str:
         f"    {C}Оновлює текст нотатки за її ID.",
         f"    {E}Приклад: update-note 12 \"Це оновлений текст.\"",
         "",
-        f"  {H}show-notes",
+        f"  {H}show-notes {C}[--limit N] [--offset N | --page N]",
         f"    {C}Показує список всіх нотаток (відсортованих за ID).",
         "",
         f"  {H}delete-note {C}[ID нотатки]",
@@ -554,15 +987,40 @@ def show_help(args: list) -> str:
         f"    {C}Додає один або декілька тегів до нотатки.",
         f"    {E}Приклад: add-tag 12 work python",
         "",
-        f"  {H}find-note {C}[Запит...]",
-        f"    {C}Шукає нотатки, в тексті яких є збіг.",
+        f"  {H}find-note {C}[-w | -p | -ph | --top N] [Запит...] [--limit N] [--offset N | --page N]",
+        f"    {C}Шукає нотатки, в тексті яких є збіг (підрядок).",
+        f"    {C}{H}-w{C}: усі слова запиту, {H}-p{C}: слова, що починаються з запиту, {H}-ph{C}: точна фраза.",
+        f"    {H}--top N{C}: N найрелевантніших нотаток за словами в тексті та тегах (від найкращої).",
         f"    {E}Приклад: find-note перша",
+        f"    {E}Приклад: find-note -ph перша нотатка",
+        f"    {E}Приклад: find-note --top 20 звіт бюджет",
         "",
-        f"  {H}find-tag {C}[Запит тега]",
+        f"  {H}find-tag {C}[-e | -p] [Запит тега] [--limit N] [--offset N | --page N]",
         f"    {C}Шукає нотатки, що мають тег, який містить запит.",
+        f"    {C}{H}-e{C}: тег точно дорівнює запиту, {H}-p{C}: тег починається з запиту.",
         f"    {E}Приклад: find-tag work",
+        f"    {E}Приклад: find-tag -e python",
         "",
-        f"  {H}sort-notes",
+        f"  {H}sort-notes {C}[--limit N] [--offset N | --page N]",
         f"    {C}Сортує нотатки за алфавітом (на основі першого тега).",
+        "",
+        f"{G}--- Імпорт та Експорт ---",
+        f"  {H}import-contacts {C}[Файл] [--format csv|jsonl] [--reject Файл] [--workers N]",
+        f"    {C}Імпортує контакти з CSV або JSON Lines (колонки: name, phone, email, birthday, address).",
+        f"    {C}Невірні рядки записуються у файл відхилених (за замовч. [Файл].rejected).",
+        f"    {C}{H}--workers N{C}: розбирати файл у N процесах (0 - за кількістю ядер).",
+        f"    {E}Приклад: import-contacts contacts.csv",
+        "",
+        f"  {H}export-contacts {C}[Файл] [--format csv|jsonl]",
+        f"    {C}Експортує всі контакти у файл.",
+        f"    {E}Приклад: export-contacts contacts.jsonl",
+        "",
+        f"  {H}import-notes {C}[Файл] [--format csv|jsonl] [--reject Файл]",
+        f"    {C}Імпортує нотатки (колонки: text, tags, created_at); нотатки отримують нові ID.",
+        f"    {E}Приклад: import-notes notes.csv",
+        "",
+        f"  {H}export-notes {C}[Файл] [--format csv|jsonl]",
+        f"    {C}Експортує всі нотатки у файл.",
+        f"    {E}Приклад: export-notes notes.jsonl",
     ]
     return "\n".join(help_text)
@@ -0,0 +1,789 @@
+#
+#
+#
+import heapq
+import re
+from bisect import bisect_left, insort
+from functools import lru_cache
+from itertools import combinations, product
+from math import log
+
+# Слово - послідовність літер/цифр (з урахуванням кирилиці)
+_WORD_RE = re.compile(r"\w+")
+
+# Параметри BM25: k1 - як швидко насичується внесок повторів слова,
+# b - наскільки довгі документи штрафуються відносно середньої довжини
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> list:
+    """Розбиває текст на слова в нижньому регістрі"""
+    return _WORD_RE.findall(text.lower())
+
+
+def bm25_add(scores: dict, frequencies, doc_frequency: int, total_docs: int, lengths: dict, avg_length: float):
+    """
+    Додає до scores внесок слова запиту в оцінку BM25 кожного документа
+    з frequencies - пар (ID документа, скільки разів у ньому слово).
+    doc_frequency - у скількох документах є слово, lengths - довжини документів.
+    Стала частина формули рахується один раз на слово, а не для кожного документа
+    """
+    # idf з +1 під логарифмом не буває від'ємним навіть для дуже частих слів
+    idf = log(1 + (total_docs - doc_frequency + 0.5) / (doc_frequency + 0.5))
+    scale = idf * (BM25_K1 + 1)
+    base = BM25_K1 * (1 - BM25_B)
+    per_length = BM25_K1 * BM25_B / avg_length if avg_length else 0.0
+    get = scores.get
+    for doc_id, frequency in frequencies:
+        scores[doc_id] = get(doc_id, 0.0) + scale * frequency / (
+            frequency + base + per_length * lengths[doc_id]
+        )
+
+
+class SortedList:
+    """
+    Відсортований список, розбитий на блоки до CHUNK_SIZE елементів.
+    Вставка та видалення - bisect по максимумах блоків і зсув усередині
+    одного блоку, тож великі списки не переписуються цілком.
+    """
+
+    CHUNK_SIZE = 512
+
+    def __init__(self, items=()):
+        items = sorted(items)
+        self._chunks = [
+            items[i : i + self.CHUNK_SIZE] for i in range(0, len(items), self.CHUNK_SIZE)
+        ]
+        self._maxes = [chunk[-1] for chunk in self._chunks]
+        self._len = len(items)
+
+    def __len__(self):
+        return self._len
+
+    def add(self, item):
+        if not self._chunks:
+            self._chunks.append([item])
+            self._maxes.append(item)
+        else:
+            i = min(bisect_left(self._maxes, item), len(self._chunks) - 1)
+            chunk = self._chunks[i]
+            insort(chunk, item)
+            self._maxes[i] = chunk[-1]
+            if len(chunk) > 2 * self.CHUNK_SIZE:
+                self._chunks[i : i + 1] = [chunk[: self.CHUNK_SIZE], chunk[self.CHUNK_SIZE :]]
+                self._maxes[i : i + 1] = [self._chunks[i][-1], self._chunks[i + 1][-1]]
+        self._len += 1
+
+    def remove(self, item):
+        i = bisect_left(self._maxes, item)
+        if i < len(self._chunks):
+            chunk = self._chunks[i]
+            j = bisect_left(chunk, item)
+            if j < len(chunk) and chunk[j] == item:
+                del chunk[j]
+                self._len -= 1
+                if chunk:
+                    self._maxes[i] = chunk[-1]
+                else:
+                    del self._chunks[i]
+                    del self._maxes[i]
+                return
+        raise ValueError(f"{item!r} відсутній у списку")
+
+    def __iter__(self):
+        return self.iter_from(0)
+
+    def iter_from(self, offset: int = 0):
+        """Елементи по порядку, починаючи з позиції offset (без сортування)"""
+        for chunk in self._chunks:
+            if offset >= len(chunk):
+                offset -= len(chunk)
+                continue
+            yield from chunk[offset:]
+            offset = 0
+
+
+class OrderedIndex:
+    """
+    Вторинний індекс ID -> ключ сортування, що тримає ID впорядкованими
+    за (ключ, ID). Зміна ключа одного ID коштує O(log n).
+    """
+
+    def __init__(self, items=()):
+        self._keys = dict(items)
+        self._order = SortedList((key, doc_id) for doc_id, key in self._keys.items())
+
+    def __len__(self):
+        return len(self._keys)
+
+    def set(self, doc_id, key):
+        old_key = self._keys.get(doc_id)
+        if doc_id in self._keys:
+            if old_key == key:
+                return
+            self._order.remove((old_key, doc_id))
+        self._keys[doc_id] = key
+        self._order.add((key, doc_id))
+
+    def remove(self, doc_id):
+        if doc_id in self._keys:
+            self._order.remove((self._keys.pop(doc_id), doc_id))
+
+    def ids(self, offset: int = 0):
+        """ID у порядку індексу, починаючи з позиції offset"""
+        for _, doc_id in self._order.iter_from(offset):
+            yield doc_id
+
+
+class TrigramIndex:
+    """
+    Інвертований індекс триграм для пошуку підрядків.
+    Кожному ключу (наприклад, імені контакту) відповідає набір рядків у нижньому
+    регістрі; індекс зберігає триграма -> множина ключів.
+    Рядки, коротші за 3 символи, індексуються цілком, тож запити з 1-2 символів
+    знаходять кандидатів через словник триграм, а не перебір усіх записів.
+    Кандидати потрібно перевіряти: збіг триграм не гарантує збігу підрядка.
+    """
+
+    def __init__(self):
+        self._postings = {}
+        self._texts = {}
+        # Порядок додавання ключів - щоб результати йшли так само, як у словнику книги
+        self._order = {}
+        self._next_order = 0
+
+    @staticmethod
+    def _grams(texts) -> set:
+        grams = set()
+        for text in texts:
+            if len(text) < 3:
+                if text:
+                    grams.add(text)
+            else:
+                grams.update(text[i : i + 3] for i in range(len(text) - 2))
+        return grams
+
+    def __len__(self):
+        return len(self._texts)
+
+    def add(self, key, texts: tuple):
+        """Додає або переіндексовує ключ"""
+        if key in self._texts:
+            self._discard(key)
+        else:
+            self._order[key] = self._next_order
+            self._next_order += 1
+        self._texts[key] = texts
+        for gram in self._grams(texts):
+            self._postings.setdefault(gram, set()).add(key)
+
+    def remove(self, key):
+        if key in self._texts:
+            self._discard(key)
+            del self._texts[key]
+            del self._order[key]
+
+    def _discard(self, key):
+        for gram in self._grams(self._texts[key]):
+            keys = self._postings[gram]
+            keys.discard(key)
+            if not keys:
+                del self._postings[gram]
+
+    def candidates(self, query_lower: str) -> set:
+        """Ключі, що можуть містити query_lower (надмножина точних збігів)"""
+        if not query_lower:
+            return set(self._texts)
+        if len(query_lower) < 3:
+            found = set()
+            for gram, keys in self._postings.items():
+                if query_lower in gram:
+                    found |= keys
+            return found
+        postings = []
+        for gram in self._grams((query_lower,)):
+            keys = self._postings.get(gram)
+            if not keys:
+                return set()
+            postings.append(keys)
+        # Перетинаємо, починаючи з найменшої множини
+        postings.sort(key=len)
+        found = set(postings[0])
+        for keys in postings[1:]:
+            found &= keys
+            if not found:
+                break
+        return found
+
+    def in_order(self, keys) -> list:
+        """Ключі в порядку їх додавання до індексу"""
+        return sorted(keys, key=self._order.__getitem__)
+
+
+class BirthdayIndex:
+    """
+    Календар днів народження: (місяць, день) -> імена контактів.
+    Щонайбільше 366 кошиків; запит на N днів переглядає лише кошики цього вікна,
+    тож його вартість не залежить від розміру книги.
+    """
+
+    def __init__(self):
+        self._buckets = {}
+        self._keys = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, name, birthday):
+        """Додає або переносить контакт; birthday - date або None"""
+        self.remove(name)
+        if birthday is None:
+            return
+        key = (birthday.month, birthday.day)
+        self._keys[name] = key
+        # Словник замість множини - імена в кошику йдуть у порядку додавання
+        self._buckets.setdefault(key, {})[name] = None
+
+    def remove(self, name):
+        key = self._keys.pop(name, None)
+        if key is None:
+            return
+        bucket = self._buckets[key]
+        del bucket[name]
+        if not bucket:
+            del self._buckets[key]
+
+    def names_on(self, month: int, day: int) -> list:
+        return list(self._buckets.get((month, day), ()))
+
+
+def _char_masks(pattern: str) -> dict:
+    """Символ -> біти позицій, де він стоїть у pattern (для _bit_distance)"""
+    masks = {}
+    for i, char in enumerate(pattern):
+        masks[char] = masks.get(char, 0) | 1 << i
+    return masks
+
+
+def _bit_distance(masks: dict, length: int, text: str) -> int:
+    """
+    Відстань Левенштейна від шаблону (masks = _char_masks(шаблон), length - його довжина)
+    до text. Бітово-паралельний алгоритм Маєрса: стовпець матриці відстаней
+    зберігається як біти цілого числа, тож на символ text - кілька операцій
+    замість циклу по шаблону
+    """
+    if not length:
+        return len(text)
+    full = (1 << length) - 1
+    last = 1 << (length - 1)
+    positive, negative = full, 0
+    distance = length
+    for char in text:
+        eq = masks.get(char, 0)
+        xv = eq | negative
+        xh = (((eq & positive) + positive) ^ positive) | eq
+        hp = negative | (full & ~(xh | positive))
+        hn = positive & xh
+        if hp & last:
+            distance += 1
+        elif hn & last:
+            distance -= 1
+        hp = (hp << 1 | 1) & full
+        hn = (hn << 1) & full
+        positive = hn | (full & ~(xv | hp))
+        negative = hp & xv
+    return distance
+
+
+def levenshtein(a: str, b: str) -> int:
+    """Відстань Левенштейна: вставки, видалення та заміни символів"""
+    return _bit_distance(_char_masks(a), len(a), b)
+
+
+def typo_distance(a: str, b: str) -> int:
+    """
+    Відстань з урахуванням перестановки сусідніх символів як однієї помилки
+    (optimal string alignment): "jhon" -> "john" = 1, а за Левенштейном - 2
+    """
+    rows = [list(range(len(b) + 1))]
+    for i in range(1, len(a) + 1):
+        row = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            row[j] = min(rows[i - 1][j] + 1, row[j - 1] + 1, rows[i - 1][j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                row[j] = min(row[j], rows[i - 2][j - 2] + 1)
+        rows.append(row)
+    return rows[-1][-1]
+
+
+# На скільки сегментів ділиться слово в SegmentIndex (більше, ніж помилок у запиті)
+_SEGMENTS = 4
+
+
+@lru_cache(maxsize=None)
+def _partition(length: int) -> tuple:
+    """Межі сегментів слова довжини length: (початок, довжина) майже рівних частин"""
+    count = min(length, _SEGMENTS)
+    base, extra = divmod(length, count)
+    bounds = []
+    start = 0
+    for i in range(count):
+        size = base + (i >= count - extra)
+        bounds.append((start, size))
+        start += size
+    return tuple(bounds)
+
+
+class SegmentIndex:
+    """
+    Словник слів для пошуку на відстані Левенштейна не більше t (схема PassJoin).
+    Слово довжини n ділиться на m = min(n, _SEGMENTS) сегментів. Якщо слова
+    відрізняються не більше ніж на t правок, то щонайменше m - t сегментів слова
+    словника є і в запиті - без змін і зі зсувом не більше t позицій.
+    Тож кандидати - лише слова, у яких стільки сегментів знайшлося у вікнах запиту,
+    а точна відстань рахується тільки для них, а не для всього словника.
+    """
+
+    def __init__(self):
+        # (довжина слова, номер сегмента, текст сегмента) -> слова
+        self._segments = {}
+        # Довжина -> кількість слів такої довжини
+        self._lengths = {}
+
+    def __len__(self):
+        return sum(self._lengths.values())
+
+    def add(self, word: str):
+        length = len(word)
+        for i, (start, size) in enumerate(_partition(length)):
+            self._segments.setdefault((length, i, word[start : start + size]), set()).add(word)
+        self._lengths[length] = self._lengths.get(length, 0) + 1
+
+    def remove(self, word: str):
+        length = len(word)
+        for i, (start, size) in enumerate(_partition(length)):
+            key = (length, i, word[start : start + size])
+            words = self._segments[key]
+            words.discard(word)
+            if not words:
+                del self._segments[key]
+        self._lengths[length] -= 1
+        if not self._lengths[length]:
+            del self._lengths[length]
+
+    def candidates(self, query: str, t: int) -> set:
+        """
+        Слова, що можуть бути на відстані не більше t від query (надмножина).
+        t має бути меншим за кількість сегментів слів можливих довжин -
+        для FuzzyIndex (t <= 2 для слів від 5 символів, t <= 1 для коротших) так і є
+        """
+        found = set()
+        query_length = len(query)
+        for length in range(max(query_length - t, 1), query_length + t + 1):
+            if length not in self._lengths:
+                continue
+            parts = _partition(length)
+            shift = query_length - length
+            matched = []
+            for i, (start, size) in enumerate(parts):
+                # Зсув сегмента d вимагає щонайменше |d| правок до нього і |d - shift| після
+                words = set()
+                first = max(start - (t - shift) // 2, 0)
+                last = min(start + (t + shift) // 2, query_length - size)
+                for position in range(first, last + 1):
+                    words.update(self._segments.get((length, i, query[position : position + size]), ()))
+                matched.append(words)
+            # Слова, що знайшлися хоча б у len(parts) - t сегментах
+            for chosen in combinations(sorted(matched, key=len), len(parts) - t):
+                found.update(set.intersection(*chosen))
+        return found
+
+
+class FuzzyIndex:
+    """
+    Нечіткий пошук (з помилками друку) за словами текстів ключа - для контактів
+    це слова імені та email до '@'.
+    Слова словника зберігаються в SegmentIndex, для кожного слова - ключі, що його містять.
+    Слово запиту збігається зі словом словника, якщо typo_distance не більша
+    за max_distance(слово): 0 для 1-2 символів, 1 для 3-4, далі 2
+    (перестановка сусідніх символів рахується як одна помилка).
+    Числа (Іван Петренко 2) шукаються лише точно і в SegmentIndex не потрапляють.
+    """
+
+    def __init__(self):
+        self._segments = SegmentIndex()
+        # слово -> {ключ: None}: словник замість множини - ключі йдуть у порядку додавання
+        self._postings = {}
+        self._words = {}
+        self._order = {}
+        self._next_order = 0
+
+    @staticmethod
+    def words(texts) -> set:
+        return {
+            word
+            for word in _WORD_RE.findall(" ".join(texts).lower())
+            if len(word) > 1 or word.isdigit()
+        }
+
+    @staticmethod
+    def max_distance(word: str) -> int:
+        if len(word) <= 2 or word.isdigit():
+            return 0
+        return 1 if len(word) <= 4 else 2
+
+    def __len__(self):
+        return len(self._words)
+
+    def add(self, key, texts: tuple):
+        """Додає або переіндексовує ключ"""
+        words = self.words(texts)
+        old = self._words.get(key)
+        if old is None:
+            added = words
+            self._order[key] = self._next_order
+            self._next_order += 1
+        else:
+            added = words - old
+            for word in old - words:
+                self._unlink(word, key)
+        for word in added:
+            keys = self._postings.get(word)
+            if keys is None:
+                keys = self._postings[word] = {}
+                if not word.isdigit():
+                    self._segments.add(word)
+            keys[key] = None
+        self._words[key] = words
+
+    def remove(self, key):
+        words = self._words.pop(key, None)
+        if words is None:
+            return
+        for word in words:
+            self._unlink(word, key)
+        del self._order[key]
+
+    def _unlink(self, word: str, key):
+        keys = self._postings[word]
+        del keys[key]
+        if not keys:
+            # Слово без ключів більше не потрапляє в кандидати
+            del self._postings[word]
+            if not word.isdigit():
+                self._segments.remove(word)
+
+    def _matches(self, word: str) -> dict:
+        """Слова словника, що відповідають слову запиту: слово -> typo_distance"""
+        limit = self.max_distance(word)
+        if not limit:
+            return {word: 0} if word in self._postings else {}
+        found = {}
+        masks, length = _char_masks(word), len(word)
+        for candidate in self._segments.candidates(word, limit):
+            distance = _bit_distance(masks, length, candidate)
+            if distance <= limit:
+                found[candidate] = distance
+        # Перестановка - одна помилка для typo_distance, але дві за Левенштейном.
+        # Слово з перестановкою на відстані не більше limit - 1 від запиту
+        # з переставленими сусідніми літерами; typo_distance рахується лише тоді,
+        # коли перестановка може зменшити відстань
+        for i in range(length - 1):
+            if word[i] == word[i + 1]:
+                continue
+            swapped = word[:i] + word[i + 1] + word[i] + word[i + 2 :]
+            swapped_masks = _char_masks(swapped)
+            for candidate in self._segments.candidates(swapped, limit - 1):
+                current = found.get(candidate, limit + 1)
+                if 1 + _bit_distance(swapped_masks, length, candidate) < current:
+                    distance = typo_distance(word, candidate)
+                    if distance < current:
+                        found[candidate] = distance
+            # Дві перестановки, що не перетинаються, - дві помилки
+            for j in range(i + 2, length - 1 if limit > 1 else 0):
+                if swapped[j] != swapped[j + 1]:
+                    twice = swapped[:j] + swapped[j + 1] + swapped[j] + swapped[j + 2 :]
+                    if twice in self._postings and twice not in found:
+                        found[twice] = 2
+        return found
+
+    @staticmethod
+    def _keys_in(groups: list):
+        """Ключі, що є в кожній з груп: перебір найменшої з перевіркою решти"""
+        groups = sorted(groups, key=len)
+        smallest, rest = groups[0], groups[1:]
+        return (key for key in smallest if all(key in keys for keys in rest))
+
+    def search(self, query: str, k: int) -> list:
+        """
+        До k пар (ключ, сума відстаней) - ключі, що містять усі слова запиту
+        (кожне - з допустимою кількістю помилок), від найближчих.
+        Для кожного слова запиту ключі збігів об'єднуються за кількістю помилок
+        (не більше трьох груп на слово), тож перебираються поєднання кількостей
+        помилок, а не всі поєднання знайдених слів. Рівні суми відстаней
+        обходяться за зростанням, і пошук зупиняється на рівні, де набралось k ключів.
+        """
+        matches = [self._matches(word) for word in self.words((query,))]
+        if not matches or not all(matches) or k <= 0:
+            return []
+        unions = {}
+
+        def keys_for(position: int, distance: int) -> dict:
+            # Ключі, що містять слово на цій відстані від слова запиту (будуються за потреби)
+            if (position, distance) not in unions:
+                keys = {}
+                for word, word_distance in matches[position].items():
+                    if word_distance == distance:
+                        keys.update(self._postings[word])
+                unions[position, distance] = keys
+            return unions[position, distance]
+
+        levels = {}
+        distances = [sorted(set(words.values())) for words in matches]
+        for combination in product(*distances):
+            levels.setdefault(sum(combination), []).append(combination)
+
+        found = []
+        seen = set()
+        for total in sorted(levels):
+            keys = set()
+            for combination in levels[total]:
+                groups = [keys_for(position, distance) for position, distance in enumerate(combination)]
+                keys.update(self._keys_in(groups))
+            # Ключ, що вже знайдено на меншій відстані
+            keys -= seen
+            seen |= keys
+            for key in heapq.nsmallest(k - len(found), keys, key=self._order.__getitem__):
+                found.append((key, total))
+            if len(found) == k:
+                break
+        return found
+
+
+class KeyIndex:
+    """
+    Точний індекс значення поля (телефон, email) -> імена контактів.
+    Зазвичай значення належить одному контакту, тож пошук - O(1).
+    """
+
+    def __init__(self):
+        self._names = {}
+        self._keys = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, name, key):
+        """Додає або переносить контакт; key - нормалізоване значення або None"""
+        self.remove(name)
+        if key is None:
+            return
+        self._keys[name] = key
+        # Словник замість множини - імена йдуть у порядку додавання
+        self._names.setdefault(key, {})[name] = None
+
+    def remove(self, name):
+        key = self._keys.pop(name, None)
+        if key is None:
+            return
+        names = self._names[key]
+        del names[name]
+        if not names:
+            del self._names[key]
+
+    def names(self, key) -> list:
+        return list(self._names.get(key, ()))
+
+
+class TagIndex:
+    """
+    Словник тегів: тег (у нижньому регістрі) -> {ID нотатки: кількість}.
+    Точний пошук - O(1); префіксний - через bisect по відсортованому словнику;
+    пошук підрядка переглядає лише словник тегів, а не всі нотатки.
+    """
+
+    def __init__(self):
+        self._notes = {}
+        self._vocabulary = []
+        # Кількість тегів кожної нотатки та загалом (довжини документів для BM25)
+        self._sizes = {}
+        self._total = 0
+
+    def add(self, note_id, tag: str):
+        tag = tag.lower()
+        notes = self._notes.get(tag)
+        if notes is None:
+            notes = self._notes[tag] = {}
+            insort(self._vocabulary, tag)
+        notes[note_id] = notes.get(note_id, 0) + 1
+        self._sizes[note_id] = self._sizes.get(note_id, 0) + 1
+        self._total += 1
+
+    def remove(self, note_id, tag: str):
+        tag = tag.lower()
+        notes = self._notes.get(tag)
+        if notes is None or note_id not in notes:
+            return
+        self._total -= 1
+        self._sizes[note_id] -= 1
+        if not self._sizes[note_id]:
+            del self._sizes[note_id]
+        notes[note_id] -= 1
+        if not notes[note_id]:
+            del notes[note_id]
+            if not notes:
+                del self._notes[tag]
+                del self._vocabulary[bisect_left(self._vocabulary, tag)]
+
+    def exact(self, query: str) -> set:
+        return set(self._notes.get(query.lower(), ()))
+
+    def prefix(self, query: str) -> set:
+        query = query.lower()
+        found = set()
+        for i in range(bisect_left(self._vocabulary, query), len(self._vocabulary)):
+            tag = self._vocabulary[i]
+            if not tag.startswith(query):
+                break
+            found.update(self._notes[tag])
+        return found
+
+    def substring(self, query: str) -> set:
+        query = query.lower()
+        found = set()
+        for tag in self._vocabulary:
+            if query in tag:
+                found.update(self._notes[tag])
+        return found
+
+    def bm25(self, tokens, total_docs: int, scores: dict) -> dict:
+        """
+        Додає до scores оцінки BM25 поля тегів: слово запиту збігається з тегом,
+        що йому дорівнює; total_docs - кількість усіх нотаток, а не лише з тегами
+        """
+        avg_length = self._total / total_docs if total_docs else 0
+        for token in set(tokens):
+            notes = self._notes.get(token)
+            if notes:
+                bm25_add(scores, notes.items(), len(notes), total_docs, self._sizes, avg_length)
+        return scores
+
+
+class TextIndex:
+    """
+    Інвертований індекс слів з позиціями: слово -> {ID документа: [позиції]}.
+    Підтримує пошук за словом, префіксом та фразою (слова поспіль),
+    не торкаючись документів, що не містять шуканих слів.
+    Відсортований словник слів дає префіксний пошук через bisect.
+    """
+
+    def __init__(self):
+        self._postings = {}
+        self._doc_terms = {}
+        self._doc_lengths = {}
+        self._vocabulary = []
+        # Сума довжин документів - для середньої довжини в BM25
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def add(self, doc_id, text: str):
+        """Додає або переіндексовує документ"""
+        self.remove(doc_id)
+        positions = {}
+        tokens = tokenize(text)
+        for position, token in enumerate(tokens):
+            positions.setdefault(token, []).append(position)
+        for token, token_positions in positions.items():
+            docs = self._postings.get(token)
+            if docs is None:
+                docs = self._postings[token] = {}
+                insort(self._vocabulary, token)
+            docs[doc_id] = token_positions
+        self._doc_terms[doc_id] = tuple(positions)
+        self._doc_lengths[doc_id] = len(tokens)
+        self._total_length += len(tokens)
+
+    def remove(self, doc_id):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        for token in terms:
+            docs = self._postings[token]
+            del docs[doc_id]
+            if not docs:
+                del self._postings[token]
+                del self._vocabulary[bisect_left(self._vocabulary, token)]
+
+    def _prefix_terms(self, prefix: str) -> list:
+        start = bisect_left(self._vocabulary, prefix)
+        end = start
+        while end < len(self._vocabulary) and self._vocabulary[end].startswith(prefix):
+            end += 1
+        return self._vocabulary[start:end]
+
+    def search_words(self, query: str) -> set:
+        """Документи, що містять усі слова запиту"""
+        return self._intersect([self._postings.get(token, {}) for token in tokenize(query)])
+
+    def search_prefix(self, query: str) -> set:
+        """Документи, де кожне слово запиту є початком якогось слова документа"""
+        postings = []
+        for prefix in tokenize(query):
+            docs = set()
+            for term in self._prefix_terms(prefix):
+                docs.update(self._postings[term])
+            postings.append(docs)
+        return self._intersect(postings)
+
+    def search_phrase(self, query: str) -> set:
+        """Документи, що містять слова запиту поспіль у тому ж порядку"""
+        tokens = tokenize(query)
+        found = self.search_words(query)
+        if len(tokens) < 2:
+            return found
+        phrase = set()
+        for doc_id in found:
+            # Позиції першого слова, з яких фраза продовжується далі
+            starts = set(self._postings[tokens[0]][doc_id])
+            for offset, token in enumerate(tokens[1:], start=1):
+                token_positions = self._postings[token][doc_id]
+                starts &= {position - offset for position in token_positions}
+                if not starts:
+                    break
+            if starts:
+                phrase.add(doc_id)
+        return phrase
+
+    def bm25(self, tokens, scores: dict = None) -> dict:
+        """
+        Оцінки BM25 документів, що містять хоча б одне зі слів запиту:
+        ID документа -> оцінка (додаються до scores, якщо передано).
+        Частота слова - кількість його позицій у документі
+        """
+        scores = {} if scores is None else scores
+        total_docs = len(self._doc_terms)
+        avg_length = self._total_length / total_docs if total_docs else 0
+        for token in set(tokens):
+            docs = self._postings.get(token)
+            if docs:
+                frequencies = zip(docs, map(len, docs.values()))
+                bm25_add(scores, frequencies, len(docs), total_docs, self._doc_lengths, avg_length)
+        return scores
+
+    @staticmethod
+    def _intersect(postings: list) -> set:
+        """Перетин множин/словників ID, від найменшого; копіюється лише найменший"""
+        if not postings:
+            return set()
+        postings.sort(key=len)
+        found = set(postings[0])
+        for docs in postings[1:]:
+            found = {doc_id for doc_id in found if doc_id in docs}
+            if not found:
+                break
+        return found
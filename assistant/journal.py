@@ -0,0 +1,330 @@
+#
+#
+#
+import glob
+import os
+import pickle
+import re
+import struct
+import uuid
+import zlib
+from datetime import datetime
+from .models import AddressBook, NoteBook, Record, Note
+from . import config
+from . import locking
+
+# Заголовок кадру журналу: довжина тіла та його CRC32
+_FRAME_HEADER = struct.Struct("<II")
+
+# Ідентифікатор сеансу в імені файлу журналу (див. new_session)
+_SESSION_RE = re.compile(r"[0-9a-f]{12}")
+
+# Записи журналу, що посилаються на нотатку за ID (другий елемент кортежу)
+_NOTE_OPS = ("n+", "n~", "t+", "t-", "n-")
+
+
+def journal_path(snapshot_path: str, session: str = "") -> str:
+    """
+    Шлях до журналу сеансу поруч зі знімком
+    "DB/assistant_data.pkl", "3f2a..." -> "DB/assistant_data.3f2a....journal"
+    Без сеансу - спільний журнал попередніх версій: "DB/assistant_data.journal"
+    """
+    base = os.path.splitext(snapshot_path)[0]
+    if session:
+        base += "." + session
+    return base + config.JOURNAL_SUFFIX
+
+
+def new_session() -> str:
+    """Ідентифікатор сеансу (процесу), що пише власний журнал"""
+    return uuid.uuid4().hex[:12]
+
+
+def session_journals(snapshot_path: str) -> dict:
+    """
+    Наявні журнали біля знімка: сеанс -> шлях (спільний журнал - під сеансом "").
+    Впорядковані за часом зміни, тож зміни різних сеансів застосовуються
+    приблизно в тому порядку, в якому їх зроблено.
+    """
+    base = os.path.splitext(snapshot_path)[0]
+    found = {}
+    for path in glob.glob(glob.escape(base) + ".*" + config.JOURNAL_SUFFIX):
+        session = path[len(base) + 1 : -len(config.JOURNAL_SUFFIX)]
+        if _SESSION_RE.fullmatch(session):
+            found[session] = path
+    legacy = journal_path(snapshot_path)
+    if os.path.exists(legacy):
+        found[""] = legacy
+
+    def modified(item):
+        try:
+            return os.path.getmtime(item[1])
+        except OSError:
+            return 0
+
+    return dict(sorted(found.items(), key=modified))
+
+
+def encode_event(event: str, *args) -> tuple:
+    """
+    Перетворює подію моделі на компактний запис журналу (кортеж простих типів)
+    Повертає None для подій, які не потрібно журналювати
+    """
+    if event == "add_record":
+        record = args[0]
+        return (
+            "c+",
+            record.name.value,
+            record.phone.value if record.phone else None,
+            record.email.value if record.email else None,
+            str(record.birthday) if record.birthday else None,
+            record.address.value if record.address else None,
+        )
+    if event == "update_record":
+        record, field, value = args
+        return ("c~", record.name.value, field, value)
+    if event == "delete_record":
+        return ("c-", args[0])
+    if event == "add_note":
+        note = args[0]
+        return (
+            "n+",
+            note.id,
+            note.text,
+            note.created_at.timestamp(),
+            tuple(tag.value for tag in note.tags),
+        )
+    if event == "update_text":
+        note, text = args
+        return ("n~", note.id, text)
+    if event == "add_tag":
+        note, tag = args
+        return ("t+", note.id, tag)
+    if event == "remove_tag":
+        note, tag = args
+        return ("t-", note.id, tag)
+    if event == "delete_note":
+        return ("n-", args[0])
+    return None
+
+
+def apply_op(op: tuple, book: AddressBook, notes: NoteBook):
+    """
+    Застосовує один запис журналу до книг
+    Записи, що посилаються на відсутні контакти/нотатки, пропускаються
+    """
+    kind = op[0]
+    if kind == "c+":
+        _, name, phone, email, birthday, address = op
+        record = Record(name)
+        if phone:
+            record.add_phone(phone)
+        if email:
+            record.add_email(email)
+        if birthday:
+            record.add_birthday(birthday)
+        if address:
+            record.add_address(address)
+        book.add_record(record)
+    elif kind == "c~":
+        _, name, field, value = op
+        record = book.find(name)
+        if record is not None:
+            getattr(record, f"add_{field}")(value)
+    elif kind == "c-":
+        if op[1] in book.data:
+            book.delete(op[1])
+    elif kind == "n+":
+        _, note_id, text, created_at, tags = op
+        note = Note(text)
+        note.id = note_id
+        note.created_at = datetime.fromtimestamp(created_at)
+        for tag in tags:
+            note.add_tag(tag)
+        notes._put_note(note)
+    elif kind == "n~":
+        note = notes.data.get(op[1])
+        if note is not None:
+            note.update_text(op[2])
+    elif kind == "t+":
+        note = notes.data.get(op[1])
+        if note is not None:
+            note.add_tag(op[2])
+    elif kind == "t-":
+        note = notes.data.get(op[1])
+        if note is not None and any(tag.value == op[2] for tag in note.tags):
+            note.remove_tag(op[2])
+    elif kind == "n-":
+        if op[1] in notes.data:
+            notes.delete_note(str(op[1]))
+
+
+def merge_ops(ops, book: AddressBook, notes: NoteBook, renumbered: dict = None) -> dict:
+    """
+    Застосовує зміни одного сеансу поверх даних, які тим часом зберіг інший процес.
+    Нова нотатка, чий ID уже зайнятий, отримує наступний вільний ID, і подальші
+    записи про неї переадресовуються. Повертає {старий ID: новий ID}.
+    """
+    if renumbered is None:
+        renumbered = {}
+    for op in ops:
+        kind = op[0]
+        if kind == "n+" and op[1] in notes.data:
+            renumbered[op[1]] = notes._next_id
+        if kind in _NOTE_OPS and op[1] in renumbered:
+            op = (kind, renumbered[op[1]]) + op[2:]
+        apply_op(op, book, notes)
+    return renumbered
+
+
+def _read_ops(f, since_seq: int):
+    """Записи (seq, op) з номером > since_seq до першого пошкодженого кадру"""
+    while True:
+        header = f.read(_FRAME_HEADER.size)
+        if len(header) < _FRAME_HEADER.size:
+            return
+        length, crc = _FRAME_HEADER.unpack(header)
+        body = f.read(length)
+        if len(body) < length or zlib.crc32(body) != crc:
+            return
+        try:
+            seq, op = pickle.loads(body)
+        except (pickle.UnpicklingError, EOFError, ValueError, TypeError):
+            return
+        if seq > since_seq:
+            yield seq, op
+
+
+def replay_journal(path: str, book: AddressBook, notes: NoteBook, since_seq: int = 0) -> int:
+    """
+    Застосовує до книг записи журналу з номером > since_seq (див. merge_ops).
+    Читання зупиняється на пошкодженому хвості (недописаному кадрі).
+    Повертає номер останнього застосованого запису (since_seq, якщо новіших немає).
+    """
+    last_seq = since_seq
+    renumbered = {}
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return last_seq
+    with f:
+        for seq, op in _read_ops(f, since_seq):
+            merge_ops((op,), book, notes, renumbered)
+            last_seq = seq
+    return last_seq
+
+
+class Journal:
+    """
+    Журнал змін (write-ahead log) одного сеансу поруч зі знімком даних.
+    Кожна зміна книг дописується в кінець файлу окремим кадром:
+    [довжина][crc32][pickle((seq, op))]
+    Запис коштує O(зміни), а після kill -9 втрачається щонайбільше
+    недописаний останній кадр.
+    Поки сеанс живий, файл журналу заблоковано (locking.lock_file) - так інші
+    процеси відрізняють його від журналу сеансу, що завершився аварійно.
+    Зміни, яких ще немає у знімку, також тримаються в пам'яті (pending) -
+    з них сховище об'єднує дані, якщо інший процес зберіг свої раніше.
+    """
+
+    def __init__(self, path: str, compact=None, session: str = "", enabled: bool = True):
+        self.path = path
+        self.session = session
+        # Чи пишуться зміни у файл (без цього - лише в pending)
+        self.enabled = enabled
+        self.paused = False
+        # Функція, що записує новий знімок (викликається при переповненні)
+        self._compact = compact
+        self.seq = 0
+        # [(seq, op)] - зміни сеансу, яких ще немає у знімку
+        self.pending = []
+        self._file = None
+        self._book = None
+        self._notes = None
+        # Глибина вкладених book.batch(): поки > 0, записи не скидаються на диск
+        self._batch_depth = 0
+        # Розмір, після якого журнал згортається у знімок (сховище збільшує його
+        # до розміру знімка, щоб великі книги не переписувались надто часто)
+        self.compact_threshold = config.JOURNAL_COMPACT_THRESHOLD
+
+    @property
+    def writing(self) -> bool:
+        return self.enabled and not self.paused and self._file is not None
+
+    def attach(self, book: AddressBook, notes: NoteBook):
+        """Підписується на зміни книг і відкриває журнал сеансу для дописування"""
+        self._book, self._notes = book, notes
+        while True:
+            self._file = open(self.path, "ab")
+            locking.lock_file(self._file)
+            # Інший процес міг встигнути прибрати порожній файл як покинутий
+            try:
+                if os.path.samestat(os.fstat(self._file.fileno()), os.stat(self.path)):
+                    break
+            except FileNotFoundError:
+                pass
+            self._file.close()
+        book.subscribe(self._on_event)
+        notes.subscribe(self._on_event)
+
+    def detach(self):
+        if self._book is not None:
+            self._book.unsubscribe(self._on_event)
+            self._notes.unsubscribe(self._on_event)
+            self._book = self._notes = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            if not os.path.getsize(self.path):
+                os.remove(self.path)
+        self._batch_depth = 0
+
+    def pause(self, paused: bool):
+        """Пакетний режим: зміни не пишуться у файл, лише запам'ятовуються"""
+        if paused and self._file is not None:
+            self._file.flush()
+        self.paused = paused
+
+    def size(self) -> int:
+        return self._file.tell() if self._file is not None else 0
+
+    def append(self, op: tuple):
+        self.seq += 1
+        self.pending.append((self.seq, op))
+        if not self.writing:
+            return
+        body = pickle.dumps((self.seq, op), protocol=pickle.HIGHEST_PROTOCOL)
+        self._file.write(_FRAME_HEADER.pack(len(body), zlib.crc32(body)) + body)
+        if not self._batch_depth:
+            self._sync()
+
+    def _sync(self):
+        # flush віддає дані ОС - цього досить, щоб пережити kill -9
+        self._file.flush()
+        if config.JOURNAL_FSYNC:
+            os.fsync(self._file.fileno())
+        if self._compact is not None and self.size() >= self.compact_threshold:
+            self._compact(self._book, self._notes)
+
+    def saved(self, seq: int):
+        """
+        Зміни до запису seq включно потрапили у знімок.
+        Файл очищується, лише якщо після них у журнал нічого не дописали.
+        """
+        self.pending = [item for item in self.pending if item[0] > seq]
+        if self.seq == seq and self._file is not None:
+            self._file.seek(0)
+            self._file.truncate()
+
+    def _on_event(self, event: str, *args):
+        if event == "begin_batch":
+            self._batch_depth += 1
+            return
+        if event == "end_batch":
+            self._batch_depth -= 1
+            if not self._batch_depth and self.writing:
+                self._sync()
+            return
+        op = encode_event(event, *args)
+        if op is not None:
+            self.append(op)
@@ -0,0 +1,119 @@
+#
+#
+#
+import os
+import threading
+import time
+from contextlib import contextmanager
+from . import config
+from . import stats
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: блокування між процесами недоступне, працюємо без нього
+    fcntl = None
+
+# Як часто (в секундах) повторювати спробу захопити зайняте блокування
+_POLL_INTERVAL = 0.01
+
+
+class LockTimeout(OSError):
+    """Блокування не вдалося отримати за config.LOCK_TIMEOUT секунд"""
+
+
+class FileLock:
+    """
+    Рекомендаційне (advisory) блокування fcntl.flock на окремому файлі поруч із даними.
+    Спільне - поки процес читає знімок і журнали, виключне - поки замінює знімок.
+    Потоки одного процесу чекають один на одного, а повторне захоплення
+    тим самим потоком (збереження під час згортання журналу) не блокується.
+    on_wait(seconds) викликається, якщо довелося чекати на інший процес
+    не менше config.LOCK_WAIT_NOTICE секунд.
+    """
+
+    def __init__(self, path: str, on_wait=None):
+        self.path = path
+        self.on_wait = on_wait
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    @contextmanager
+    def hold(self, exclusive: bool = True):
+        with self._thread_lock:
+            if not self._depth:
+                self._acquire(exclusive)
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if not self._depth:
+                    self._release()
+
+    def _acquire(self, exclusive: bool):
+        if fcntl is None:
+            return
+        storage_dir = os.path.dirname(self.path)
+        if storage_dir:
+            os.makedirs(storage_dir, exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        mode = (fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH) | fcntl.LOCK_NB
+        start = time.monotonic()
+        while True:
+            try:
+                fcntl.flock(self._fd, mode)
+                break
+            except BlockingIOError:
+                if time.monotonic() - start >= config.LOCK_TIMEOUT:
+                    self._release()
+                    raise LockTimeout(
+                        f"Дані зайняті іншим процесом довше {config.LOCK_TIMEOUT} с ({self.path})."
+                    )
+                time.sleep(_POLL_INTERVAL)
+        waited = time.monotonic() - start
+        if waited >= _POLL_INTERVAL:
+            stats.STATS.add_operation("lock_wait", waited)
+            if self.on_wait is not None and waited >= config.LOCK_WAIT_NOTICE:
+                self.on_wait(waited)
+
+    def _release(self):
+        if self._fd is not None:
+            # Закриття дескриптора знімає і блокування
+            os.close(self._fd)
+            self._fd = None
+
+
+def lock_file(f) -> bool:
+    """
+    Виключно блокує відкритий файл, не чекаючи (журнал сеансу тримає його,
+    поки процес живий). Повертає False, якщо файл уже тримає інший процес.
+    """
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+def is_locked(path: str) -> bool:
+    """
+    Чи тримає файл живий процес (див. lock_file).
+    Без fcntl процеси не розрізнити - вважається, що з даними працює лише цей.
+    """
+    if fcntl is None:
+        return False
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return False
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return True
+    finally:
+        os.close(fd)
+    return False
@@ -1,17 +1,49 @@
 #
 #
 #
+import heapq
 import re
+import sys
+from calendar import isleap
 from collections import UserDict
-from datetime import datetime, date
+from contextlib import contextmanager
+from datetime import datetime, date, timedelta
+from itertools import count, islice
+from .indexes import (
+    TrigramIndex,
+    TextIndex,
+    TagIndex,
+    BirthdayIndex,
+    KeyIndex,
+    FuzzyIndex,
+    SortedList,
+    OrderedIndex,
+    tokenize,
+)
+from . import config
+from . import parallel
+
+
+def _slots_state(state) -> dict:
+    """
+    Приводить стан з pickle до словника атрибутів.
+    Старі знімки (до __slots__) зберігали __dict__, нові - (None, {слоти})
+    """
+    if isinstance(state, tuple):
+        dict_state, slots_state = state
+        state = {**(dict_state or {}), **(slots_state or {})}
+    return state
 
 
 class Field:
     """
     Базовий клас для всіх полів
     Ми використаємо getter'и та setter'и для доступу до value щоб реалізувати валідацію
+    __slots__ прибирає __dict__ з кожного поля (їх по п'ять на контакт)
     """
 
+    __slots__ = ("_value",)
+
     def __init__(self, value):
         self.value = value
 
@@ -26,10 +58,25 @@ class Field:
     def __str__(self):
         return str(self._value)
 
+    @classmethod
+    def _restore(cls, value):
+        """Створює поле з уже перевіреного значення, оминаючи валідацію"""
+        field = cls.__new__(cls)
+        field._value = value
+        return field
+
+    def __getstate__(self):
+        return {"_value": self._value}
+
+    def __setstate__(self, state):
+        self._value = _slots_state(state)["_value"]
+
 
 class Name(Field):
     """Клас для зберігання імені"""
 
+    __slots__ = ()
+
     @Field.value.setter
     def value(self, new_value):
         if not new_value:
@@ -40,6 +87,8 @@ class Name(Field):
 class Phone(Field):
     """Клас для зберігання номера телефону"""
 
+    __slots__ = ()
+
     @Field.value.setter
     def value(self, new_value):
         if not (len(new_value) == 10 and new_value.isdigit()):
@@ -50,6 +99,8 @@ class Phone(Field):
 class Birthday(Field):
     """Клас для зберігання дня народження"""
 
+    __slots__ = ()
+
     @Field.value.setter
     def value(self, new_value: str):
         try:
@@ -65,6 +116,8 @@ class Birthday(Field):
 class Email(Field):
     """Клас для зберігання email"""
 
+    __slots__ = ()
+
     @Field.value.setter
     def value(self, new_value: str):
         if not re.match(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$", new_value):
@@ -72,10 +125,24 @@ class Email(Field):
         self._value = new_value
 
 
+def phone_key(phone: str) -> str:
+    """
+    Телефон у вигляді ключа індексу: лише цифри, без коду країни
+    "+38 (050) 123-45-67" -> "0501234567"
+    """
+    digits = "".join(ch for ch in phone if ch.isdigit())
+    return digits[-10:]
+
+
+def email_key(email: str) -> str:
+    """Email у вигляді ключа індексу (без урахування регістру)"""
+    return email.strip().lower()
+
+
 class Address(Field):
     """Клас для зберігання адреси"""
 
-    pass
+    __slots__ = ()
 
 
 class Record:
@@ -83,24 +150,87 @@ class Record:
     Клас для зберігання одного запису (контакту)
     """
 
+    # __weakref__ потрібен для кешу записів у SQLite-сховищі
+    __slots__ = ("name", "phone", "email", "address", "birthday", "_book", "__weakref__")
+
     def __init__(self, name: str):
         self.name = Name(name)
         self.phone = None
         self.email = None
         self.address = None
         self.birthday = None
+        # Адресна книга, до якої належить запис (встановлює AddressBook)
+        self._book = None
+
+    @classmethod
+    def _restore(cls, name, phone=None, email=None, birthday=None, address=None):
+        """
+        Створює запис з уже перевірених значень (наприклад, прочитаних зі сховища)
+        birthday - об'єкт date. Події про зміни не надсилаються.
+        """
+        record = cls.__new__(cls)
+        record.name = Name._restore(name)
+        record.phone = Phone._restore(phone) if phone is not None else None
+        record.email = Email._restore(email) if email is not None else None
+        record.address = Address._restore(address) if address is not None else None
+        record.birthday = Birthday._restore(birthday) if birthday is not None else None
+        record._book = None
+        return record
 
     def add_phone(self, phone_number: str):
         self.phone = Phone(phone_number)
+        self._changed("phone", phone_number)
 
     def add_birthday(self, birthday_str: str):
         self.birthday = Birthday(birthday_str)
+        self._changed("birthday", birthday_str)
 
     def add_email(self, email_str: str):
         self.email = Email(email_str)
+        self._changed("email", email_str)
 
     def add_address(self, address_str: str):
         self.address = Address(address_str)
+        self._changed("address", address_str)
+
+    def _changed(self, field: str, value: str):
+        """Повідомляє адресну книгу про зміну поля запису"""
+        if self._book is not None:
+            self._book._record_changed(self, field, value)
+
+    def __getstate__(self):
+        # Зворотне посилання на книгу не зберігаємо - його відновить AddressBook
+        return {
+            "name": self.name,
+            "phone": self.phone,
+            "email": self.email,
+            "address": self.address,
+            "birthday": self.birthday,
+        }
+
+    def __setstate__(self, state):
+        state = _slots_state(state)
+        self.name = state["name"]
+        self.phone = state.get("phone")
+        self.email = state.get("email")
+        self.address = state.get("address")
+        self.birthday = state.get("birthday")
+        self._book = None
+
+    def search_texts(self) -> tuple:
+        """Текстові значення заповнених полів у нижньому регістрі (для пошуку)"""
+        fields_to_check = [
+            self.name,
+            self.phone,
+            self.email,
+            self.address,
+            self.birthday,
+        ]
+        return tuple(str(field).lower() for field in fields_to_check if field is not None)
+
+    def matches(self, query_lower: str) -> bool:
+        """Чи містить хоча б одне поле запису підрядок query_lower (у нижньому регістрі)"""
+        return any(query_lower in text for text in self.search_texts())
 
     def __str__(self):
         parts = []
@@ -120,38 +250,266 @@ class Record:
         return f"Контакт: {self.name.value} [{data_str}]"
 
 
-class AddressBook(UserDict):
+# Мітки даних книг (див. _Observable.query_version): унікальні на весь процес
+_STAMPS = count(1)
+
+
+class _Observable:
+    """
+    Домішка для книг: розсилає події про зміни підписникам (журнал, сховище тощо)
+    Підписник - це функція callback(event, *args)
+    Кожна подія також збільшує лічильник змін version (ознака "брудної" книги)
+    """
+
+    # Атрибути, що існують лише під час роботи і не потрапляють у знімок:
+    # підписники (відкриті файли тощо), лічильник змін, індекси
+    _transient = ("_observers", "_version", "_stamp")
+
+    def _init_transient(self):
+        self._observers = []
+        self._version = 0
+        self._stamp = next(_STAMPS)
+
+    @property
+    def version(self) -> int:
+        """Кількість змін книги з моменту створення/завантаження"""
+        return self._version
+
+    @property
+    def query_version(self) -> tuple:
+        """
+        Версія даних для кешу запитів (cache.QueryCache): інша для кожної книги,
+        змінюється з кожною зміною і з переходом на об'єднані дані (_adopt)
+        """
+        return self._stamp, self._version
+
+    def _data_replaced(self):
+        # _adopt не змінює version (вона - ознака незбережених змін), тож нова мітка
+        self._stamp = next(_STAMPS)
+
+    def subscribe(self, callback):
+        self._observers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._observers:
+            self._observers.remove(callback)
+
+    def _notify(self, event: str, *args):
+        self._version += 1
+        self._broadcast(event, *args)
+
+    def _broadcast(self, event: str, *args):
+        for callback in self._observers:
+            callback(event, *args)
+
+    @contextmanager
+    def batch(self):
+        """
+        Групує зміни: підписники отримують події "begin_batch"/"end_batch"
+        і можуть зафіксувати всю групу разом (одна транзакція, один flush журналу)
+        """
+        self._broadcast("begin_batch")
+        try:
+            yield self
+        finally:
+            self._broadcast("end_batch")
+
+    def __getstate__(self):
+        return {k: v for k, v in self.__dict__.items() if k not in self._transient}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_transient()
+
+
+def _fuzzy_texts(name: str, email: str = None) -> tuple:
+    """Тексти контакту для нечіткого пошуку: ім'я та email без домену"""
+    return (name, email.split("@")[0]) if email else (name,)
+
+
+class AddressBook(_Observable, UserDict):
     """Клас для управління адресною книгою"""
 
+    _transient = _Observable._transient + (
+        "_trigrams", "_birthdays", "_phones", "_emails", "_fuzzy"
+    )
+
+    def __init__(self, *args, **kwargs):
+        self._init_transient()
+        super().__init__(*args, **kwargs)
+
+    def _init_transient(self):
+        super()._init_transient()
+        # Індекси для search() та get_upcoming_birthdays() будуються при першому запиті
+        self._trigrams = None
+        self._birthdays = None
+        # Зворотний пошук: телефон / email -> імена (find_by_phone, find_by_email)
+        self._phones = None
+        self._emails = None
+        # Нечіткий пошук за словами імені та email (fuzzy_search)
+        self._fuzzy = None
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        for record in self.data.values():
+            record._book = self
+
+    def _adopt(self, other: "AddressBook"):
+        """
+        Переходить на записи іншої книги (дані, об'єднані зі збереженими іншим
+        процесом). Спостерігачі та лічильник версій лишаються; індекси будуються заново.
+        """
+        self.data = other.data
+        for record in self.data.values():
+            record._book = self
+        self._data_replaced()
+        self._trigrams = None
+        self._birthdays = None
+        self._phones = None
+        self._emails = None
+        self._fuzzy = None
+
     def add_record(self, record: Record):
+        record._book = self
         self.data[record.name.value] = record
+        if self._trigrams is not None:
+            self._trigrams.add(record.name.value, record.search_texts())
+        if self._birthdays is not None:
+            self._birthdays.add(record.name.value, record.birthday.value if record.birthday else None)
+        if self._phones is not None:
+            self._phones.add(record.name.value, phone_key(record.phone.value) if record.phone else None)
+            self._emails.add(record.name.value, email_key(record.email.value) if record.email else None)
+        if self._fuzzy is not None:
+            email = record.email.value if record.email else None
+            self._fuzzy.add(record.name.value, _fuzzy_texts(record.name.value, email))
+        self._notify("add_record", record)
 
     def find(self, name: str) -> Record:
         return self.data.get(name)
 
     def delete(self, name: str):
         if name in self.data:
-            del self.data[name]
+            record = self.data.pop(name)
+            record._book = None
+            if self._trigrams is not None:
+                self._trigrams.remove(name)
+            if self._birthdays is not None:
+                self._birthdays.remove(name)
+            if self._phones is not None:
+                self._phones.remove(name)
+                self._emails.remove(name)
+            if self._fuzzy is not None:
+                self._fuzzy.remove(name)
+            self._notify("delete_record", name)
         else:
             raise KeyError(f"Контакт '{name}' не знайдено.")
 
+    def _record_changed(self, record: Record, field: str, value: str):
+        if self._trigrams is not None:
+            self._trigrams.add(record.name.value, record.search_texts())
+        if field == "birthday" and self._birthdays is not None:
+            self._birthdays.add(record.name.value, record.birthday.value)
+        if field == "phone" and self._phones is not None:
+            self._phones.add(record.name.value, phone_key(value))
+        if field == "email" and self._emails is not None:
+            self._emails.add(record.name.value, email_key(value))
+        if field == "email" and self._fuzzy is not None:
+            self._fuzzy.add(record.name.value, _fuzzy_texts(record.name.value, value))
+        self._notify("update_record", record, field, value)
+
+    def _contact_keys(self):
+        """Трійки (ім'я, телефон, email) для побудови індексів зворотного пошуку"""
+        for name, record in self.data.items():
+            yield (
+                name,
+                record.phone.value if record.phone else None,
+                record.email.value if record.email else None,
+            )
+
+    def _key_indexes(self) -> tuple:
+        if self._phones is None:
+            phones, emails = KeyIndex(), KeyIndex()
+            for name, phone, email in self._contact_keys():
+                if phone:
+                    phones.add(name, phone_key(phone))
+                if email:
+                    emails.add(name, email_key(email))
+            self._phones, self._emails = phones, emails
+        return self._phones, self._emails
+
+    def find_by_phone(self, phone: str) -> list[Record]:
+        """Контакти з цим номером телефону (в будь-якому записі: +38, дужки, дефіси)"""
+        return [self.data[name] for name in self._key_indexes()[0].names(phone_key(phone))]
+
+    def find_by_email(self, email: str) -> list[Record]:
+        """Контакти з цим email (без урахування регістру)"""
+        return [self.data[name] for name in self._key_indexes()[1].names(email_key(email))]
+
+    def _fuzzy_index(self) -> FuzzyIndex:
+        if self._fuzzy is None:
+            self._fuzzy = FuzzyIndex()
+            for name, _, email in self._contact_keys():
+                self._fuzzy.add(name, _fuzzy_texts(name, email))
+        return self._fuzzy
+
+    def fuzzy_search(self, query: str, k: int) -> list[tuple]:
+        """
+        До k пар (контакт, кількість помилок) для запиту з помилками друку:
+        кожне слово запиту має бути схожим на слово імені або email до '@'.
+        Спершу найточніші збіги, при однаковій відстані - в порядку додавання
+        """
+        return [(self.data[name], distance) for name, distance in self._fuzzy_index().search(query, k)]
+
+    def check_unique(self, name: str, phone: str = None, email: str = None):
+        """
+        Якщо в config.py увімкнено UNIQUE_PHONES / UNIQUE_EMAILS, перевіряє,
+        що телефон / email не належить іншому контакту (інакше - ValueError)
+        """
+        if phone and config.UNIQUE_PHONES:
+            for owner in self.find_by_phone(phone):
+                if owner.name.value != name:
+                    raise ValueError(f"Телефон {phone} вже належить контакту '{owner.name.value}'.")
+        if email and config.UNIQUE_EMAILS:
+            for owner in self.find_by_email(email):
+                if owner.name.value != name:
+                    raise ValueError(f"Email {email} вже належить контакту '{owner.name.value}'.")
+
+    def _birthday_items(self):
+        """Пари (ім'я, дата народження) для побудови календаря днів народження"""
+        for name, record in self.data.items():
+            if record.birthday:
+                yield name, record.birthday.value
+
+    def _birthday_index(self) -> BirthdayIndex:
+        if self._birthdays is None:
+            self._birthdays = BirthdayIndex()
+            for name, birthday in self._birthday_items():
+                self._birthdays.add(name, birthday)
+        return self._birthdays
+
     def get_upcoming_birthdays(self, days: int, reference_date: date = None) -> list:
+        """
+        Дні народження протягом 'days' днів, починаючи з reference_date (включно),
+        у хронологічному порядку. Переглядаються лише дні вікна (не більше 366),
+        а не всі контакти. Народжені 29 лютого у невисокосний рік вітаються 28 лютого.
+        """
         today = reference_date if reference_date is not None else date.today()
+        index = self._birthday_index()
 
         upcoming_birthdays = []
-        for record in self.data.values():
-            if not record.birthday:
-                continue
-
-            bday = record.birthday.value
-            bday_this_year = bday.replace(year=today.year)
-
-            if bday_this_year < today:
-                bday_this_year = bday.replace(year=today.year + 1)
-
-            delta_days = (bday_this_year - today).days
+        seen_days = set()
+        for offset in range(min(days, 366)):
+            bday_this_year = today + timedelta(days=offset)
+            calendar_days = [(bday_this_year.month, bday_this_year.day)]
+            if calendar_days[0] == (2, 28) and not isleap(bday_this_year.year):
+                calendar_days.append((2, 29))
+
+            for calendar_day in calendar_days:
+                # Вікно з 366 днів може двічі пройти ту саму дату
+                if calendar_day in seen_days:
+                    continue
+                seen_days.add(calendar_day)
 
-            if 0 <= delta_days < days:
                 weekday = bday_this_year.weekday()
 
                 if weekday >= 5:
@@ -159,41 +517,43 @@ class AddressBook(UserDict):
                 else:
                     day_to_congratulate = bday_this_year.strftime("%A")
 
-                upcoming_birthdays.append(
-                    {
-                        "name": record.name.value,
-                        "congratulation_day": day_to_congratulate,
-                        "birthday_date": str(record.birthday),
-                    }
-                )
+                for name in index.names_on(*calendar_day):
+                    upcoming_birthdays.append(
+                        {
+                            "name": name,
+                            "congratulation_day": day_to_congratulate,
+                            "birthday_date": str(self.data[name].birthday),
+                        }
+                    )
         return upcoming_birthdays
 
+    def _trigram_index(self) -> TrigramIndex:
+        if self._trigrams is None:
+            self._trigrams = TrigramIndex()
+            for name, record in self.data.items():
+                self._trigrams.add(name, record.search_texts())
+        return self._trigrams
+
     def search(self, query: str) -> list[Record]:
-        found_records = []
+        """
+        Пошук підрядка в усіх полях контактів.
+        Кандидати беруться з триграмного індексу і перевіряються Record.matches;
+        результат - у порядку додавання контактів
+        """
         query_lower = query.lower()
-
-        for record in self.data.values():
-            fields_to_check = [
-                record.name,
-                record.phone,
-                record.email,
-                record.address,
-                record.birthday,
-            ]
-
-            for field in fields_to_check:
-                if field is not None:
-                    if query_lower in str(field).lower():
-                        found_records.append(record)
-                        break
-
-        return found_records
+        index = self._trigram_index()
+        found = [
+            name
+            for name in index.candidates(query_lower)
+            if self.data[name].matches(query_lower)
+        ]
+        return [self.data[name] for name in index.in_order(found)]
 
 
 class Tag(Field):
     """Клас для тегів нотаток"""
 
-    pass
+    __slots__ = ()
 
 
 class Note:
@@ -201,14 +561,31 @@ class Note:
     Клас для однієї нотатки.
     """
 
+    __slots__ = ("id", "text", "tags", "created_at", "_book", "__weakref__")
+
     def __init__(self, text: str):
         self.id = None  # ID присвоюється NoteBook
         self.text = text
         self.tags = []
         self.created_at = datetime.now()
+        # Книга нотаток, до якої належить нотатка (встановлює NoteBook)
+        self._book = None
+
+    @classmethod
+    def _restore(cls, note_id, text, created_at, tags=()):
+        """Створює нотатку зі збережених значень без надсилання подій"""
+        note = cls.__new__(cls)
+        note.id = note_id
+        note.text = text
+        note.tags = [Tag._restore(sys.intern(tag)) for tag in tags]
+        note.created_at = created_at
+        note._book = None
+        return note
 
     def add_tag(self, tag_text: str):
-        self.tags.append(Tag(tag_text))
+        # Теги повторюються між нотатками - зберігаємо одну копію рядка
+        self.tags.append(Tag(sys.intern(tag_text)))
+        self._changed("add_tag", tag_text)
 
     def remove_tag(self, tag_text: str):
         tag_to_remove = None
@@ -218,6 +595,7 @@ class Note:
                 break
         if tag_to_remove:
             self.tags.remove(tag_to_remove)
+            self._changed("remove_tag", tag_text)
         else:
             raise ValueError(f"Тег '{tag_text}' не знайдено.")
 
@@ -226,6 +604,28 @@ class Note:
         if not new_text:
             raise ValueError("Текст нотатки не може бути порожнім.")
         self.text = new_text
+        self._changed("update_text", new_text)
+
+    def _changed(self, event: str, value: str):
+        """Повідомляє книгу нотаток про зміну нотатки"""
+        if self._book is not None:
+            self._book._note_changed(self, event, value)
+
+    def __getstate__(self):
+        return {
+            "id": self.id,
+            "text": self.text,
+            "tags": self.tags,
+            "created_at": self.created_at,
+        }
+
+    def __setstate__(self, state):
+        state = _slots_state(state)
+        self.id = state["id"]
+        self.text = state["text"]
+        self.tags = state["tags"]
+        self.created_at = state["created_at"]
+        self._book = None
 
     def __str__(self):
         tags_str = ", ".join(t.value for t in self.tags)
@@ -238,13 +638,34 @@ class Note:
         )
 
 
-class NoteBook(UserDict):
+def _first_tag_key(note: Note) -> str:
+    """Ключ сортування sort-notes: перший тег у нижньому регістрі"""
+    return note.tags[0].value.lower() if note.tags else ""
+
+
+class NoteBook(_Observable, UserDict):
     """
     Клас для управління нотатками.
     Ключ - це простий числовий ID.
     """
 
+    _transient = _Observable._transient + (
+        "_text_index", "_tag_index", "_by_id", "_by_first_tag", "_scan_engine"
+    )
+
+    def _init_transient(self):
+        super()._init_transient()
+        # Індекси будуються при першому пошуку, далі оновлюються при змінах
+        self._text_index = None
+        self._tag_index = None
+        # Порядок для show-notes (за ID) та sort-notes (за першим тегом)
+        self._by_id = None
+        self._by_first_tag = None
+        # Процеси паралельного пошуку підрядка (великі книги, див. parallel.py)
+        self._scan_engine = None
+
     def __init__(self, *args, **kwargs):
+        self._init_transient()
         super().__init__(*args, **kwargs)
         # _next_id буде ініційовано при першому додаванні,
         # якщо об'єкт завантажено з pickle і він вже має дані
@@ -255,15 +676,62 @@ class NoteBook(UserDict):
             # Починаємо з 1 для нової книги
             self._next_id = 1
 
+    def _adopt(self, other: "NoteBook"):
+        """Див. AddressBook._adopt"""
+        self.data = other.data
+        for note in self.data.values():
+            note._book = self
+        self._data_replaced()
+        self._next_id = other._next_id
+        self._text_index = None
+        self._tag_index = None
+        self._by_id = None
+        self._by_first_tag = None
+
     def add_note(self, note: Note) -> int:
         """
         Додає нотатку, присвоює їй наступний доступний ID і повертає цей ID
         """
-        note_id = self._next_id
-        note.id = note_id
-        self.data[note_id] = note
-        self._next_id += 1
-        return note_id
+        note.id = self._next_id
+        self._put_note(note)
+        self._notify("add_note", note)
+        return note.id
+
+    def _put_note(self, note: Note):
+        """
+        Вставляє нотатку з уже присвоєним ID (використовується при відновленні)
+        """
+        if self._tag_index is not None and note.id in self.data:
+            for tag in self.data[note.id].tags:
+                self._tag_index.remove(note.id, tag.value)
+        if self._by_id is not None:
+            if note.id not in self.data:
+                self._by_id.add(note.id)
+            self._by_first_tag.set(note.id, _first_tag_key(note))
+        note._book = self
+        self.data[note.id] = note
+        self._next_id = max(self._next_id, note.id + 1)
+        if self._text_index is not None:
+            self._text_index.add(note.id, note.text)
+        if self._tag_index is not None:
+            for tag in note.tags:
+                self._tag_index.add(note.id, tag.value)
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        for note in self.data.values():
+            note._book = self
+
+    def _note_changed(self, note: Note, event: str, value: str):
+        if event == "update_text" and self._text_index is not None:
+            self._text_index.add(note.id, note.text)
+        elif event == "add_tag" and self._tag_index is not None:
+            self._tag_index.add(note.id, value)
+        elif event == "remove_tag" and self._tag_index is not None:
+            self._tag_index.remove(note.id, value)
+        if event in ("add_tag", "remove_tag") and self._by_first_tag is not None:
+            self._by_first_tag.set(note.id, _first_tag_key(note))
+        self._notify(event, note, value)
 
     def find_by_id(self, note_id_str: str) -> Note:
         """
@@ -282,33 +750,151 @@ class NoteBook(UserDict):
         try:
             note_id = int(note_id_str)
             if note_id in self.data:
-                del self.data[note_id]
+                note = self.data.pop(note_id)
+                note._book = None
+                if self._text_index is not None:
+                    self._text_index.remove(note_id)
+                if self._tag_index is not None:
+                    for tag in note.tags:
+                        self._tag_index.remove(note_id, tag.value)
+                if self._by_id is not None:
+                    self._by_id.remove(note_id)
+                    self._by_first_tag.remove(note_id)
+                self._notify("delete_note", note_id)
             else:
                 raise KeyError(f"Нотатку з ID '{note_id}' не знайдено.")
         except (ValueError, TypeError):
             raise KeyError(f"Невірний ID: '{note_id_str}'. Потрібно число.")
 
-    def search_by_text(self, query: str) -> list:
-        """Пошук нотаток, що містять 'query' в тексті."""
-        return [
-            note for note in self.data.values() if query.lower() in note.text.lower()
-        ]
+    def _get_text_index(self) -> TextIndex:
+        if self._text_index is None:
+            self._text_index = TextIndex()
+            for note_id, note in self.data.items():
+                self._text_index.add(note_id, note.text)
+        return self._text_index
 
-    def search_by_tag(self, tag_query: str) -> list:
-        """Пошук нотаток, що містять 'tag_query' в одному з тегів"""
-        found_notes = []
-        for note in self.data.values():
-            for tag in note.tags:
-                if tag_query.lower() in tag.value.lower():
-                    found_notes.append(note)
-                    break
-        return found_notes
+    def search_by_text(self, query: str, mode: str = "substring") -> list:
+        """
+        Пошук нотаток за текстом.
+        mode: "substring" - 'query' міститься в тексті (перебір усіх нотаток);
+              "word" - містить усі слова запиту;
+              "prefix" - кожне слово запиту є початком слова в тексті;
+              "phrase" - слова запиту йдуть поспіль.
+        Режими word/prefix/phrase використовують інвертований індекс.
+        Від config.PARALLEL_SCAN_THRESHOLD нотаток перебір для "substring"
+        ділиться між кількома процесами; результат той самий. Нотатки - за ID.
+        """
+        if mode == "substring":
+            query_lower = query.lower()
+            if self._parallel_scan(query_lower):
+                try:
+                    found = self._scan_engine.search_text(query_lower)
+                except (OSError, EOFError):
+                    pass
+                else:
+                    return [self.data[note_id] for note_id in found]
+            found = [note for note in self.data.values() if query_lower in note.text.lower()]
+            # Порядок словника - порядок додавання; ID зростають, тож це майже завжди O(n)
+            found.sort(key=lambda note: note.id)
+            return found
+        index = self._get_text_index()
+        if mode == "word":
+            found = index.search_words(query)
+        elif mode == "prefix":
+            found = index.search_prefix(query)
+        elif mode == "phrase":
+            found = index.search_phrase(query)
+        else:
+            raise ValueError(f"Невідомий режим пошуку '{mode}'.")
+        return [self.data[note_id] for note_id in sorted(found)]
 
-    def sort_by_tags(self) -> list:
+    def rank_by_text(self, query: str, k: int) -> list[tuple]:
         """
-        Сортує нотатки за алфавітом першого тега
+        До k пар (нотатка, оцінка) за релевантністю запиту (BM25): слова запиту
+        шукаються в тексті та тегах нотаток, достатньо збігу хоча б одного.
+        Оцінюються лише нотатки зі збігами, а з них купою вибираються k найкращих;
+        при однаковій оцінці - за ID
         """
-        return sorted(
-            self.data.values(),
-            key=lambda note: note.tags[0].value.lower() if note.tags else "",
-        )
+        tokens = tokenize(query)
+        scores = self._get_text_index().bm25(tokens)
+        self._get_tag_index().bm25(tokens, len(self._text_index), scores)
+        best = heapq.nlargest(k, scores, key=scores.__getitem__)
+        if len(best) == k:
+            # Нотатки з такою ж оцінкою, як у останньої, могли лишитися поза купою;
+            # рівні оцінки трапляються рідко, тож повний перебір - лише тоді
+            threshold = scores[best[-1]]
+            tied = [note_id for note_id in best if scores[note_id] == threshold]
+            if list(scores.values()).count(threshold) > len(tied):
+                tied = sorted(note_id for note_id, score in scores.items() if score == threshold)
+                best = [note_id for note_id in best if scores[note_id] > threshold]
+                best += tied[: k - len(best)]
+        best.sort(key=lambda note_id: (-scores[note_id], note_id))
+        return [(self.data[note_id], scores[note_id]) for note_id in best]
+
+    def _parallel_scan(self, query_lower: str) -> bool:
+        """Чи шукати підрядок у кількох процесах (створює їх за потреби)"""
+        if (
+            len(self.data) < config.PARALLEL_SCAN_THRESHOLD
+            or parallel.workers_count() < 2
+            or not parallel.available()
+            or "\x00" in query_lower
+        ):
+            return False
+        if self._scan_engine is None:
+            self._scan_engine = parallel.ScanEngine(self)
+        return True
+
+    def _get_tag_index(self) -> TagIndex:
+        if self._tag_index is None:
+            self._tag_index = TagIndex()
+            for note_id, note in self.data.items():
+                for tag in note.tags:
+                    self._tag_index.add(note_id, tag.value)
+        return self._tag_index
+
+    def search_by_tag(self, tag_query: str, mode: str = "substring") -> list:
+        """
+        Пошук нотаток за тегом (без урахування регістру)
+        mode: "substring" - 'tag_query' міститься в одному з тегів;
+              "exact" - тег дорівнює запиту; "prefix" - тег починається з запиту
+        """
+        index = self._get_tag_index()
+        if mode == "substring":
+            found = index.substring(tag_query)
+        elif mode == "exact":
+            found = index.exact(tag_query)
+        elif mode == "prefix":
+            found = index.prefix(tag_query)
+        else:
+            raise ValueError(f"Невідомий режим пошуку '{mode}'.")
+        return [self.data[note_id] for note_id in sorted(found)]
+
+    def _sort_keys(self):
+        """Пари (ID, перший тег у нижньому регістрі) для побудови порядків нотаток"""
+        for note_id, note in self.data.items():
+            yield note_id, _first_tag_key(note)
+
+    def _build_order(self):
+        if self._by_id is None:
+            keys = list(self._sort_keys())
+            self._by_id = SortedList(note_id for note_id, _ in keys)
+            self._by_first_tag = OrderedIndex(keys)
+
+    def sorted_by_id(self, offset: int = 0, limit: int = None):
+        """
+        Ітератор нотаток за зростанням ID, починаючи з позиції offset
+        (не більше limit, якщо його вказано)
+        """
+        self._build_order()
+        for note_id in islice(self._by_id.iter_from(offset), limit):
+            yield self.data[note_id]
+
+    def sort_by_tags(self, offset: int = 0, limit: int = None):
+        """
+        Ітератор нотаток за алфавітом першого тега (нотатки з однаковим тегом - за ID),
+        починаючи з позиції offset. Порядок підтримується при змінах, тож сортування
+        при кожному виклику не потрібне.
+        """
+        self._build_order()
+        for note_id in islice(self._by_first_tag.ids(offset), limit):
+            yield self.data[note_id]
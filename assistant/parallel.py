@@ -0,0 +1,187 @@
+#
+#
+#
+import heapq
+import multiprocessing
+import os
+import signal
+from array import array
+from bisect import bisect_right
+from . import config
+
+# Роздільник текстів у знімку шарду: пошуковий запит не може його містити,
+# тож збіг ніколи не захоплює дві нотатки
+_SEPARATOR = b"\x00"
+
+# Частка змінених після знімка нотаток, після якої знімок будується заново
+_MAX_DIRTY_SHARE = 0.05
+
+# Шарди поточного знімка. Заповнюються перед запуском процесів,
+# які отримують їх копією при fork (copy-on-write), а не через pickle
+_SHARDS = []
+
+
+def available() -> bool:
+    """Паралельний пошук потребує fork (на Windows його немає)"""
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def workers_count() -> int:
+    return config.SCAN_WORKERS or os.cpu_count() or 1
+
+
+class _Shard:
+    """
+    Діапазон нотаток (за ID) одним блоком: тексти в нижньому регістрі (UTF-8)
+    через роздільник, зміщення початку кожного тексту та ID нотаток.
+    Кілька великих об'єктів замість мільйонів рядків: пошук - bytes.find по блоку,
+    а сторінки пам'яті процеси ділять з батьківським (лічильники посилань
+    окремих рядків не змінюються, тож сторінки не копіюються)
+    """
+
+    def __init__(self, items: list):
+        self.ids = array("q", (note_id for note_id, _ in items))
+        self.starts = array("q")
+        position = 0
+        for _, text in items:
+            self.starts.append(position)
+            position += len(text) + len(_SEPARATOR)
+        self.blob = _SEPARATOR.join(text for _, text in items)
+
+    def search(self, query: bytes) -> list:
+        """ID нотаток шарду, текст яких містить query, за зростанням"""
+        found = []
+        starts, count = self.starts, len(self.starts)
+        position = self.blob.find(query)
+        while position != -1:
+            row = bisect_right(starts, position) - 1
+            found.append(self.ids[row])
+            if row + 1 >= count:
+                break
+            # Решта збігів у цій нотатці не потрібна - до наступної
+            position = self.blob.find(query, starts[row + 1])
+        return found
+
+
+def _worker(shard_index: int, conn):
+    """Процес пошуку: отримує запити й повертає знайдені ID свого шарду"""
+    # Сигнали обробляє основний процес; його обробники (asyncio демона пише
+    # номер сигналу в свій wakeup fd) процесу пошуку не успадковуються
+    signal.set_wakeup_fd(-1)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    shard = _SHARDS[shard_index]
+    while True:
+        try:
+            query = conn.recv()
+        except EOFError:
+            break
+        if query is None:
+            break
+        conn.send(shard.search(query))
+
+
+class ScanEngine:
+    """
+    Паралельний пошук підрядка в текстах нотаток.
+    Нотатки, впорядковані за ID, діляться на шарди по одному на процес;
+    знімок передається процесам один раз (fork), далі на запит пересилається
+    лише рядок запиту, а назад - ID збігів. Шарди йдуть за зростанням ID,
+    тож результати просто зливаються.
+    Зміни після знімка відстежуються підпискою на книгу: змінені та нові
+    нотатки перевіряються в основному процесі, а коли їх стає більше
+    _MAX_DIRTY_SHARE знімка (або книга перейшла на інші дані) - знімок
+    і процеси створюються заново.
+    """
+
+    def __init__(self, notes):
+        self.notes = notes
+        self._stamp = None
+        self._size = 0
+        self._dirty = set()
+        self._processes = []
+        self._conns = []
+        notes.subscribe(self._on_change)
+
+    def _on_change(self, event: str, *args):
+        if event in ("add_note", "update_text"):
+            self._dirty.add(args[0].id)
+        elif event == "delete_note":
+            self._dirty.add(args[0])
+
+    def _stale(self) -> bool:
+        stamp = self.notes.query_version[0]
+        return (
+            not self._processes
+            or stamp != self._stamp
+            or len(self._dirty) > self._size * _MAX_DIRTY_SHARE
+        )
+
+    def _start(self):
+        global _SHARDS
+        self.close()
+        items = sorted(
+            (note_id, note.text.lower().encode("utf-8"))
+            for note_id, note in self.notes.data.items()
+        )
+        workers = max(1, min(workers_count(), len(items)))
+        step = -(-len(items) // workers)
+        _SHARDS = [_Shard(items[i : i + step]) for i in range(0, len(items), step)]
+        del items
+        context = multiprocessing.get_context("fork")
+        try:
+            for index in range(len(_SHARDS)):
+                parent_conn, child_conn = context.Pipe()
+                process = context.Process(target=_worker, args=(index, child_conn), daemon=True)
+                process.start()
+                child_conn.close()
+                self._processes.append(process)
+                self._conns.append(parent_conn)
+        finally:
+            # Процеси вже мають свою копію; батьківському шарди не потрібні
+            _SHARDS = []
+        self._stamp = self.notes.query_version[0]
+        self._size = len(self.notes.data)
+        self._dirty = set()
+
+    def search_text(self, query_lower: str) -> list:
+        """
+        ID нотаток, текст яких (у нижньому регістрі) містить query_lower,
+        за зростанням - як у послідовного пошуку
+        """
+        if self._stale():
+            self._start()
+        query = query_lower.encode("utf-8")
+        try:
+            for conn in self._conns:
+                conn.send(query)
+            parts = [conn.recv() for conn in self._conns]
+        except (OSError, EOFError):
+            # Процес пошуку завершився - наступний запит створить нові
+            self.close()
+            raise
+        found = [note_id for part in parts for note_id in part]
+        if not self._dirty:
+            return found
+        dirty = self._dirty
+        data = self.notes.data
+        changed = sorted(
+            note_id
+            for note_id in dirty
+            if note_id in data and query_lower in data[note_id].text.lower()
+        )
+        return list(heapq.merge((note_id for note_id in found if note_id not in dirty), changed))
+
+    def close(self):
+        for conn in self._conns:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+            conn.close()
+        for process in self._processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+        self._conns = []
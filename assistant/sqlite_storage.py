@@ -0,0 +1,624 @@
+#
+#
+#
+import os
+import sqlite3
+import weakref
+from collections.abc import MutableMapping
+from contextlib import nullcontext
+from datetime import date, datetime
+from .models import AddressBook, NoteBook, Record, Note, email_key, phone_key
+from .storage import StorageBackend, PickleBackend, _ensure_dir
+from . import config
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS contacts (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    phone TEXT,
+    email TEXT,
+    address TEXT,
+    birthday INTEGER,
+    name_lc TEXT NOT NULL,
+    email_lc TEXT,
+    address_lc TEXT,
+    birthday_text TEXT
+);
+CREATE TABLE IF NOT EXISTS notes (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL,
+    text_lc TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tags (
+    note_id INTEGER NOT NULL REFERENCES notes(id) ON DELETE CASCADE,
+    pos INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    tag_lc TEXT NOT NULL,
+    PRIMARY KEY (note_id, pos)
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tags_by_tag ON tags(tag_lc);
+CREATE INDEX IF NOT EXISTS contacts_by_phone ON contacts(phone);
+CREATE INDEX IF NOT EXISTS contacts_by_email ON contacts(email_lc);
+"""
+
+# Повнотекстові індекси (триграми) для пошуку підрядків довжиною від 3 символів.
+# Потребують SQLite >= 3.34; якщо недоступні - пошук іде скануванням колонок у SQLite
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5(
+    name_lc, phone, email_lc, address_lc, birthday_text,
+    content='contacts', content_rowid='seq', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS contacts_ai AFTER INSERT ON contacts BEGIN
+    INSERT INTO contacts_fts(rowid, name_lc, phone, email_lc, address_lc, birthday_text)
+    VALUES (new.seq, new.name_lc, new.phone, new.email_lc, new.address_lc, new.birthday_text);
+END;
+CREATE TRIGGER IF NOT EXISTS contacts_ad AFTER DELETE ON contacts BEGIN
+    INSERT INTO contacts_fts(contacts_fts, rowid, name_lc, phone, email_lc, address_lc, birthday_text)
+    VALUES ('delete', old.seq, old.name_lc, old.phone, old.email_lc, old.address_lc, old.birthday_text);
+END;
+CREATE TRIGGER IF NOT EXISTS contacts_au AFTER UPDATE ON contacts BEGIN
+    INSERT INTO contacts_fts(contacts_fts, rowid, name_lc, phone, email_lc, address_lc, birthday_text)
+    VALUES ('delete', old.seq, old.name_lc, old.phone, old.email_lc, old.address_lc, old.birthday_text);
+    INSERT INTO contacts_fts(rowid, name_lc, phone, email_lc, address_lc, birthday_text)
+    VALUES (new.seq, new.name_lc, new.phone, new.email_lc, new.address_lc, new.birthday_text);
+END;
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+    text_lc, content='notes', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS notes_ai AFTER INSERT ON notes BEGIN
+    INSERT INTO notes_fts(rowid, text_lc) VALUES (new.id, new.text_lc);
+END;
+CREATE TRIGGER IF NOT EXISTS notes_ad AFTER DELETE ON notes BEGIN
+    INSERT INTO notes_fts(notes_fts, rowid, text_lc) VALUES ('delete', old.id, old.text_lc);
+END;
+CREATE TRIGGER IF NOT EXISTS notes_au AFTER UPDATE ON notes BEGIN
+    INSERT INTO notes_fts(notes_fts, rowid, text_lc) VALUES ('delete', old.id, old.text_lc);
+    INSERT INTO notes_fts(rowid, text_lc) VALUES (new.id, new.text_lc);
+END;
+"""
+
+_CONTACT_COLUMNS = "name, phone, email, address, birthday"
+
+# Умова "запит є підрядком хоча б одного поля" (як у AddressBook.search)
+_CONTACT_MATCH = (
+    "(instr(name_lc, :q) OR instr(phone, :q) OR instr(email_lc, :q)"
+    " OR instr(address_lc, :q) OR instr(birthday_text, :q))"
+)
+
+
+def _fts_phrase(query: str) -> str:
+    """Запит у вигляді фрази FTS5 (триграмний токенізатор шукає підрядок)"""
+    return '"' + query.replace('"', '""') + '"'
+
+
+def _contact_row(record: Record) -> tuple:
+    """Значення колонок contacts для запису"""
+    phone = record.phone.value if record.phone else None
+    email = record.email.value if record.email else None
+    address = record.address.value if record.address else None
+    birthday = record.birthday.value if record.birthday else None
+    return (
+        record.name.value,
+        phone,
+        email,
+        address,
+        birthday.toordinal() if birthday else None,
+        record.name.value.lower(),
+        email.lower() if email else None,
+        address.lower() if address else None,
+        str(record.birthday) if birthday else None,
+    )
+
+
+class _ContactRows(MutableMapping):
+    """
+    Лінивий словник ім'я -> Record поверх таблиці contacts.
+    Записи створюються лише при зверненні і кешуються (слабкими посиланнями),
+    щоб один рядок завжди відповідав одному об'єкту Record.
+    Рядки в базі змінює SqliteBackend за подіями книги.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, book: AddressBook):
+        self._conn = conn
+        self._book = book
+        self._cache = weakref.WeakValueDictionary()
+
+    def _materialize(self, row) -> Record:
+        name, phone, email, address, birthday = row
+        record = self._cache.get(name)
+        if record is None:
+            record = Record._restore(
+                name,
+                phone,
+                email,
+                date.fromordinal(birthday) if birthday is not None else None,
+                address,
+            )
+            record._book = self._book
+            self._cache[name] = record
+        return record
+
+    def query(self, where: str = "", params=()) -> list:
+        """Записи, що відповідають умові WHERE, у порядку додавання"""
+        rows = self._conn.execute(
+            f"SELECT {_CONTACT_COLUMNS} FROM contacts {where} ORDER BY seq", params
+        )
+        return [self._materialize(row) for row in rows]
+
+    def __getitem__(self, name):
+        record = self._cache.get(name)
+        if record is not None:
+            return record
+        row = self._conn.execute(
+            f"SELECT {_CONTACT_COLUMNS} FROM contacts WHERE name = ?", (name,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return self._materialize(row)
+
+    def __setitem__(self, name, record):
+        self._cache[name] = record
+
+    def __delitem__(self, name):
+        self._cache.pop(name, None)
+
+    def __contains__(self, name):
+        if name in self._cache:
+            return True
+        return (
+            self._conn.execute("SELECT 1 FROM contacts WHERE name = ?", (name,)).fetchone()
+            is not None
+        )
+
+    def __iter__(self):
+        for (name,) in self._conn.execute("SELECT name FROM contacts ORDER BY seq"):
+            yield name
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM contacts").fetchone()[0]
+
+    def values(self):
+        for row in self._conn.execute(
+            f"SELECT {_CONTACT_COLUMNS} FROM contacts ORDER BY seq"
+        ):
+            yield self._materialize(row)
+
+    def items(self):
+        for record in self.values():
+            yield record.name.value, record
+
+
+class _NoteRows(MutableMapping):
+    """Лінивий словник ID -> Note поверх таблиць notes і tags"""
+
+    def __init__(self, conn: sqlite3.Connection, notes: NoteBook):
+        self._conn = conn
+        self._notes = notes
+        self._cache = weakref.WeakValueDictionary()
+
+    def _materialize(self, row) -> Note:
+        note_id, text, created_at = row
+        note = self._cache.get(note_id)
+        if note is None:
+            tags = [
+                tag
+                for (tag,) in self._conn.execute(
+                    "SELECT tag FROM tags WHERE note_id = ? ORDER BY pos", (note_id,)
+                )
+            ]
+            note = Note._restore(note_id, text, datetime.fromtimestamp(created_at), tags)
+            note._book = self._notes
+            self._cache[note_id] = note
+        return note
+
+    def query(self, sql: str, params=()) -> list:
+        """Нотатки за запитом, що повертає (id, text, created_at)"""
+        return [self._materialize(row) for row in self._conn.execute(sql, params)]
+
+    def iter_query(self, sql: str, params=()):
+        """Як query(), але нотатки створюються по одній під час ітерації"""
+        for row in self._conn.execute(sql, params):
+            yield self._materialize(row)
+
+    def __getitem__(self, note_id):
+        note = self._cache.get(note_id)
+        if note is not None:
+            return note
+        row = self._conn.execute(
+            "SELECT id, text, created_at FROM notes WHERE id = ?", (note_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(note_id)
+        return self._materialize(row)
+
+    def __setitem__(self, note_id, note):
+        self._cache[note_id] = note
+
+    def __delitem__(self, note_id):
+        self._cache.pop(note_id, None)
+
+    def __contains__(self, note_id):
+        if note_id in self._cache:
+            return True
+        return (
+            self._conn.execute("SELECT 1 FROM notes WHERE id = ?", (note_id,)).fetchone()
+            is not None
+        )
+
+    def __iter__(self):
+        for (note_id,) in self._conn.execute("SELECT id FROM notes ORDER BY id"):
+            yield note_id
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+
+    def keys(self):
+        return list(self)
+
+    def values(self):
+        for row in self._conn.execute("SELECT id, text, created_at FROM notes ORDER BY id"):
+            yield self._materialize(row)
+
+    def items(self):
+        for note in self.values():
+            yield note.id, note
+
+
+def _data_version(conn) -> int:
+    """Змінюється, коли базу змінює інше з'єднання (інший процес)"""
+    return conn.execute("PRAGMA data_version").fetchone()[0]
+
+
+class SqliteAddressBook(AddressBook):
+    """
+    Адресна книга, що зберігається в SQLite; пошук виконується запитами.
+    Індекси в пам'яті (дні народження, нечіткий пошук) будуються заново,
+    якщо базу змінило інше з'єднання: запити, що ними користуються,
+    спершу викликають _check_data_version
+    """
+
+    def __init__(self, backend: "SqliteBackend"):
+        super().__init__()
+        self._backend = backend
+        self.data = _ContactRows(backend.conn, self)
+        self._seen_version = _data_version(backend.conn)
+
+    def _check_data_version(self):
+        version = _data_version(self._backend.conn)
+        if version != self._seen_version:
+            self._seen_version = version
+            self._trigrams = None
+            self._birthdays = None
+            self._phones = None
+            self._emails = None
+            self._fuzzy = None
+
+    def fuzzy_search(self, query: str, k: int) -> list[tuple]:
+        self._check_data_version()
+        return super().fuzzy_search(query, k)
+
+    def get_upcoming_birthdays(self, days: int, reference_date: date = None) -> list:
+        self._check_data_version()
+        return super().get_upcoming_birthdays(days, reference_date)
+
+    @property
+    def query_version(self) -> tuple:
+        return super().query_version + (_data_version(self._backend.conn),)
+
+    def search(self, query: str) -> list[Record]:
+        query_lower = query.lower()
+        if self._backend.fts and len(query_lower) >= 3:
+            # Триграмний індекс дає кандидатів, instr точно перевіряє кожне поле
+            return self.data.query(
+                "WHERE seq IN (SELECT rowid FROM contacts_fts WHERE contacts_fts MATCH :fts)"
+                f" AND {_CONTACT_MATCH}",
+                {"q": query_lower, "fts": _fts_phrase(query_lower)},
+            )
+        return self.data.query(f"WHERE {_CONTACT_MATCH}", {"q": query_lower})
+
+    def find_by_phone(self, phone: str) -> list[Record]:
+        # Телефони в базі - завжди 10 цифр, тож ключ збігається зі значенням колонки
+        return self.data.query("WHERE phone = ?", (phone_key(phone),))
+
+    def find_by_email(self, email: str) -> list[Record]:
+        return self.data.query("WHERE email_lc = ?", (email_key(email),))
+
+    def _contact_keys(self):
+        # Індекси в пам'яті (нечіткий пошук) будуються з колонок, без створення Record
+        return self._backend.conn.execute("SELECT name, phone, email FROM contacts ORDER BY seq")
+
+    def _birthday_items(self):
+        # Календар будується з колонки birthday, без створення Record
+        rows = self._backend.conn.execute(
+            "SELECT name, birthday FROM contacts WHERE birthday IS NOT NULL ORDER BY seq"
+        )
+        for name, birthday in rows:
+            yield name, date.fromordinal(birthday)
+
+
+class SqliteNoteBook(NoteBook):
+    """
+    Книга нотаток, що зберігається в SQLite; пошук виконується запитами.
+    Індекси в пам'яті (слова, теги, порядки) будуються заново,
+    якщо базу змінило інше з'єднання (див. SqliteAddressBook)
+    """
+
+    def __init__(self, backend: "SqliteBackend"):
+        super().__init__()
+        self._backend = backend
+        self.data = _NoteRows(backend.conn, self)
+        self._next_id = backend._last_note_id() + 1
+        self._seen_version = _data_version(backend.conn)
+
+    def _check_data_version(self):
+        version = _data_version(self._backend.conn)
+        if version != self._seen_version:
+            self._seen_version = version
+            self._text_index = None
+            self._tag_index = None
+            self._by_id = None
+            self._by_first_tag = None
+
+    def rank_by_text(self, query: str, k: int) -> list[tuple]:
+        self._check_data_version()
+        return super().rank_by_text(query, k)
+
+    def add_note(self, note: Note) -> int:
+        """
+        ID видає база в тій самій транзакції, що й вставку нотатки:
+        інші сеанси з цією базою не отримають той самий ID,
+        а ID видаленої нотатки не видається повторно
+        """
+        note.id = self._backend._allocate_note_id()
+        self._put_note(note)
+        self._notify("add_note", note)
+        return note.id
+
+    @property
+    def query_version(self) -> tuple:
+        return super().query_version + (_data_version(self._backend.conn),)
+
+    def search_by_text(self, query: str, mode: str = "substring") -> list:
+        if mode != "substring":
+            self._check_data_version()
+            return super().search_by_text(query, mode)
+        query_lower = query.lower()
+        if self._backend.fts and len(query_lower) >= 3:
+            return self.data.query(
+                "SELECT id, text, created_at FROM notes"
+                " WHERE id IN (SELECT rowid FROM notes_fts WHERE notes_fts MATCH ?)"
+                " AND instr(text_lc, ?) ORDER BY id",
+                (_fts_phrase(query_lower), query_lower),
+            )
+        return self.data.query(
+            "SELECT id, text, created_at FROM notes WHERE instr(text_lc, ?) ORDER BY id",
+            (query_lower,),
+        )
+
+    def search_by_tag(self, tag_query: str, mode: str = "substring") -> list:
+        query_lower = tag_query.lower()
+        if mode == "substring":
+            condition, params = "instr(tag_lc, ?)", (query_lower,)
+        elif mode == "exact":
+            condition, params = "tag_lc = ?", (query_lower,)
+        elif mode == "prefix":
+            # Діапазон по індексу tags_by_tag: [запит, запит + найбільший символ)
+            condition, params = "tag_lc >= ? AND tag_lc < ?", (query_lower, query_lower + "\U0010ffff")
+        else:
+            raise ValueError(f"Невідомий режим пошуку '{mode}'.")
+        return self.data.query(
+            "SELECT id, text, created_at FROM notes WHERE id IN"
+            f" (SELECT note_id FROM tags WHERE {condition}) ORDER BY id",
+            params,
+        )
+
+    def sorted_by_id(self, offset: int = 0, limit: int = None):
+        # LIMIT -1 - без обмеження
+        return self.data.iter_query(
+            "SELECT id, text, created_at FROM notes ORDER BY id LIMIT ? OFFSET ?",
+            (-1 if limit is None else limit, offset),
+        )
+
+    def sort_by_tags(self, offset: int = 0, limit: int = None):
+        return self.data.iter_query(
+            "SELECT n.id, n.text, n.created_at FROM notes n ORDER BY"
+            " COALESCE((SELECT tag_lc FROM tags t WHERE t.note_id = n.id"
+            " ORDER BY pos LIMIT 1), ''), n.id LIMIT ? OFFSET ?",
+            (-1 if limit is None else limit, offset),
+        )
+
+
+class SqliteBackend(StorageBackend):
+    """
+    Сховище в SQLite: контакти та нотатки лежать в індексованих таблицях,
+    кожна зміна книги одразу записується окремим рядком.
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.conn = None
+        self.fts = False
+        # Глибина вкладених book.batch(): зміни групи фіксуються однією транзакцією
+        self._batch_depth = 0
+
+    def _connect(self) -> bool:
+        """Відкриває базу; повертає True, якщо файл бази щойно створено"""
+        if self.conn is not None:
+            return False
+        _ensure_dir(self.path)
+        created = not os.path.exists(self.path)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(_SCHEMA)
+        try:
+            self.conn.executescript(_FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.fts = False
+        return created
+
+    def load(self) -> tuple:
+        created = self._connect()
+        if (
+            created
+            and config.SQLITE_MIGRATE_PICKLE
+            and os.path.exists(config.STORAGE_PATHS["pickle"])
+        ):
+            self._import(*PickleBackend(config.STORAGE_PATHS["pickle"]).read())
+        book, notes = SqliteAddressBook(self), SqliteNoteBook(self)
+        book.subscribe(self._on_contact_event)
+        notes.subscribe(self._on_note_event)
+        return book, notes
+
+    def save(self, book: AddressBook, notes: NoteBook):
+        """
+        Для власних книг зміни вже записані - лише фіксуємо транзакцію.
+        Звичайні книги (наприклад, з pickle) повністю переписуються в базу.
+        """
+        self._connect()
+        if isinstance(book, SqliteAddressBook) and isinstance(notes, SqliteNoteBook):
+            self.conn.commit()
+            return
+        # Одна транзакція: якщо імпорт не вдасться, у базі лишаться попередні дані
+        with self.conn:
+            self.conn.execute("DELETE FROM tags")
+            self.conn.execute("DELETE FROM notes")
+            self.conn.execute("DELETE FROM contacts")
+            self._import(book, notes, transaction=False)
+
+    def _import(self, book: AddressBook, notes: NoteBook, transaction: bool = True):
+        """Вставляє книги у базу; transaction=False - у вже відкритій транзакції"""
+        with self.conn if transaction else nullcontext():
+            # Лічильник ID не менший, ніж у книги: ID її видалених нотаток не видаються знову
+            self.conn.execute(
+                "INSERT OR REPLACE INTO counters (name, value) VALUES ('note_id', ?)",
+                (notes._next_id - 1,),
+            )
+            self.conn.executemany(
+                "INSERT INTO contacts (name, phone, email, address, birthday,"
+                " name_lc, email_lc, address_lc, birthday_text)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (_contact_row(record) for record in book.data.values()),
+            )
+            for note in notes.data.values():
+                self._insert_note(note)
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
+
+    def _last_note_id(self) -> int:
+        """Останній виданий ID нотатки"""
+        row = self.conn.execute(
+            "SELECT MAX(COALESCE((SELECT value FROM counters WHERE name = 'note_id'), 0),"
+            " COALESCE((SELECT MAX(id) FROM notes), 0))"
+        ).fetchone()
+        return row[0]
+
+    def _allocate_note_id(self) -> int:
+        """
+        Видає наступний ID нотатки. Лічильник читається вже під блокуванням запису
+        (BEGIN IMMEDIATE або відкрита транзакція зі змінами), і воно тримається,
+        доки _on_note_event не зафіксує вставку (або save() - пакет змін),
+        тож інший процес не прочитає той самий ID
+        """
+        if not self.conn.in_transaction:
+            self.conn.execute("BEGIN IMMEDIATE")
+        last = self._last_note_id() + 1
+        self.conn.execute(
+            "INSERT INTO counters (name, value) VALUES ('note_id', ?)"
+            " ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+            (last,),
+        )
+        return last
+
+    # --- Запис змін за подіями книг ---
+
+    def _transaction(self):
+        """
+        У режимі autocommit кожна зміна - окрема транзакція;
+        інакше зміни накопичуються до save()
+        """
+        return self.conn if self.autocommit and not self._batch_depth else nullcontext()
+
+    def _batch_event(self, event: str) -> bool:
+        """Обробляє begin_batch/end_batch; повертає True, якщо подія з них"""
+        if event == "begin_batch":
+            self._batch_depth += 1
+            return True
+        if event == "end_batch":
+            self._batch_depth -= 1
+            if not self._batch_depth and self.autocommit:
+                self.conn.commit()
+            return True
+        return False
+
+    def _on_contact_event(self, event: str, *args):
+        if self._batch_event(event):
+            return
+        with self._transaction():
+            if event in ("add_record", "update_record"):
+                self.conn.execute(
+                    "INSERT INTO contacts (name, phone, email, address, birthday,"
+                    " name_lc, email_lc, address_lc, birthday_text)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT(name) DO UPDATE SET phone = excluded.phone,"
+                    " email = excluded.email, address = excluded.address,"
+                    " birthday = excluded.birthday, email_lc = excluded.email_lc,"
+                    " address_lc = excluded.address_lc,"
+                    " birthday_text = excluded.birthday_text",
+                    _contact_row(args[0]),
+                )
+            elif event == "delete_record":
+                self.conn.execute("DELETE FROM contacts WHERE name = ?", (args[0],))
+
+    def _insert_note(self, note: Note):
+        self.conn.execute(
+            "INSERT INTO notes (id, text, text_lc, created_at) VALUES (?, ?, ?, ?)",
+            (note.id, note.text, note.text.lower(), note.created_at.timestamp()),
+        )
+        self.conn.executemany(
+            "INSERT INTO tags (note_id, pos, tag, tag_lc) VALUES (?, ?, ?, ?)",
+            (
+                (note.id, pos, tag.value, tag.value.lower())
+                for pos, tag in enumerate(note.tags)
+            ),
+        )
+
+    def _on_note_event(self, event: str, *args):
+        if self._batch_event(event):
+            return
+        with self._transaction():
+            if event == "add_note":
+                self._insert_note(args[0])
+            elif event == "update_text":
+                note, text = args
+                self.conn.execute(
+                    "UPDATE notes SET text = ?, text_lc = ? WHERE id = ?",
+                    (text, text.lower(), note.id),
+                )
+            elif event == "add_tag":
+                note, tag = args
+                self.conn.execute(
+                    "INSERT INTO tags (note_id, pos, tag, tag_lc) VALUES (?,"
+                    " (SELECT COALESCE(MAX(pos), -1) + 1 FROM tags WHERE note_id = ?), ?, ?)",
+                    (note.id, note.id, tag, tag.lower()),
+                )
+            elif event == "remove_tag":
+                note, tag = args
+                self.conn.execute(
+                    "DELETE FROM tags WHERE note_id = ? AND pos ="
+                    " (SELECT MIN(pos) FROM tags WHERE note_id = ? AND tag = ?)",
+                    (note.id, note.id, tag),
+                )
+            elif event == "delete_note":
+                self.conn.execute("DELETE FROM notes WHERE id = ?", (args[0],))
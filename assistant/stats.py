@@ -0,0 +1,249 @@
+#
+#
+#
+import cProfile
+import io
+import json
+import math
+import pstats
+import time
+from contextlib import contextmanager
+from . import config
+
+
+class Histogram:
+    """
+    Логарифмічна гістограма тривалостей: BUCKETS_PER_DECADE кошиків на кожен
+    порядок величини, тож пам'ять не залежить від кількості вимірів,
+    а похибка перцентиля - не більше ширини кошика (~12%).
+    """
+
+    BUCKETS_PER_DECADE = 20
+    # Найменша тривалість, що розрізняється (1 мкс)
+    MIN_VALUE = 1e-6
+
+    def __init__(self):
+        self._buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def _bucket(self, value: float) -> int:
+        value = max(value, self.MIN_VALUE)
+        return math.floor(math.log10(value / self.MIN_VALUE) * self.BUCKETS_PER_DECADE)
+
+    def _upper_bound(self, bucket: int) -> float:
+        return self.MIN_VALUE * 10 ** ((bucket + 1) / self.BUCKETS_PER_DECADE)
+
+    def add(self, value: float):
+        bucket = self._bucket(value)
+        self._buckets[bucket] = self._buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, p: float) -> float:
+        """Верхня межа кошика, в який потрапляє p-й перцентиль (0 < p <= 100)"""
+        if not self.count:
+            return 0.0
+        rank = math.ceil(self.count * p / 100)
+        seen = 0
+        for bucket in sorted(self._buckets):
+            seen += self._buckets[bucket]
+            if seen >= rank:
+                return min(max(self._upper_bound(bucket), self.min), self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+class CommandStats:
+    """Лічильники однієї команди: виклики, помилки, час, розмір виводу"""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.latency = Histogram()
+        self.output_total = 0
+        self.output_max = 0
+
+    def add(self, seconds: float, size: int, failed: bool):
+        self.calls += 1
+        self.errors += failed
+        self.latency.add(seconds)
+        self.output_total += size
+        self.output_max = max(self.output_max, size)
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "latency": self.latency.to_dict(),
+            "output_chars": {
+                "total": self.output_total,
+                "max": self.output_max,
+                "avg": self.output_total / self.calls if self.calls else 0,
+            },
+        }
+
+
+class MeasuredLines:
+    """
+    Обгортка над рядками потокового виводу (handlers.StreamResult).
+    Рахує час, витрачений на формування рядків (без очікування на пейджер),
+    та їх розмір; при вичерпанні або close() записує виклик команди в Stats.
+    """
+
+    def __init__(self, stats, command: str, elapsed: float, lines):
+        self._stats = stats
+        self._command = command
+        self._lines = iter(lines)
+        self._done = False
+        self.elapsed = elapsed
+        self.size = 0
+        self.failed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._done:
+            raise StopIteration
+        start = time.perf_counter()
+        try:
+            with self._stats.profiling():
+                line = next(self._lines)
+        except StopIteration:
+            self.elapsed += time.perf_counter() - start
+            self.close()
+            raise
+        except Exception:
+            self.elapsed += time.perf_counter() - start
+            self.failed = True
+            self.close()
+            raise
+        self.elapsed += time.perf_counter() - start
+        self.size += len(line) + 1
+        return line
+
+    def close(self):
+        if self._done:
+            return
+        self._done = True
+        close = getattr(self._lines, "close", None)
+        if close is not None:
+            close()
+        self._stats.record(self._command, self.elapsed, self.size, self.failed)
+
+
+class Stats:
+    """
+    Статистика сеансу: команди (виклики, помилки, перцентилі часу, розмір виводу),
+    окремі операції (load_data, save_data, lock_wait) та лічильники подій
+    (влучання й промахи кешу запитів).
+    Якщо увімкнено профілювання, кожна команда виконується під cProfile.
+    """
+
+    def __init__(self):
+        self.commands = {}
+        self.operations = {}
+        self.counters = {}
+        self.started = time.time()
+        self.profiler = None
+
+    def reset(self):
+        self.commands.clear()
+        self.operations.clear()
+        self.counters.clear()
+        self.started = time.time()
+
+    def record(self, command: str, seconds: float, size: int = 0, failed: bool = False):
+        stats = self.commands.get(command)
+        if stats is None:
+            stats = self.commands[command] = CommandStats()
+        stats.add(seconds, size, failed)
+
+    def measure_lines(self, command: str, elapsed: float, lines) -> MeasuredLines:
+        """Виклик потокової команди буде записано, коли її вивід закінчиться"""
+        return MeasuredLines(self, command, elapsed, lines)
+
+    def add_operation(self, operation: str, seconds: float):
+        histogram = self.operations.get(operation)
+        if histogram is None:
+            histogram = self.operations[operation] = Histogram()
+        histogram.add(seconds)
+
+    def count(self, counter: str):
+        self.counters[counter] = self.counters.get(counter, 0) + 1
+
+    @contextmanager
+    def timed(self, operation: str):
+        """Вимірює тривалість операції (наприклад, load_data)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_operation(operation, time.perf_counter() - start)
+
+    # --- Профілювання ---
+
+    def enable_profiling(self):
+        if self.profiler is None:
+            self.profiler = cProfile.Profile()
+
+    @contextmanager
+    def profiling(self):
+        """Вмикає cProfile на час блоку, якщо профілювання увімкнене"""
+        if self.profiler is None:
+            yield
+            return
+        self.profiler.enable()
+        try:
+            yield
+        finally:
+            self.profiler.disable()
+
+    def profile_report(self, top: int = None) -> str:
+        """Найгарячіші функції за власним часом (tottime)"""
+        if self.profiler is None:
+            return ""
+        out = io.StringIO()
+        profile = pstats.Stats(self.profiler, stream=out)
+        profile.sort_stats("tottime").print_stats(top or config.PROFILE_TOP)
+        return out.getvalue()
+
+    def write_profile(self, path: str, top: int = None):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.profile_report(top))
+
+    # --- Експорт ---
+
+    def to_dict(self) -> dict:
+        return {
+            "started": self.started,
+            "uptime": time.time() - self.started,
+            "commands": {name: stats.to_dict() for name, stats in sorted(self.commands.items())},
+            "operations": {
+                name: histogram.to_dict() for name, histogram in sorted(self.operations.items())
+            },
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def export_json(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+
+# Статистика поточного процесу
+STATS = Stats()
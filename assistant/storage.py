@@ -1,17 +1,70 @@
 #
 #
 #
+import bz2
+import gzip
+import io
+import lzma
 import pickle
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+from operator import itemgetter
+import tempfile
+import threading
+import zlib
 from .models import AddressBook, NoteBook
+from .journal import (
+    Journal,
+    journal_path,
+    merge_ops,
+    new_session,
+    replay_journal,
+    session_journals,
+)
+from .locking import FileLock
 import os
 from . import config
+from . import locking
+from . import stats
 
+# Відкриті сховища: (назва, шлях) -> StorageBackend
+_backends = {}
 
-def save_data(book: AddressBook, notes: NoteBook, filename=config.DEFAULT_STORAGE_PATH):
+# Стиснення знімків (config.SNAPSHOT_COMPRESSION):
+# назва -> (сигнатура на початку файлу, потік стиснення поверх відкритого файлу).
+# "zlib" пишеться у форматі gzip - той самий deflate, але з сигнатурою
+_CODECS = {
+    "zlib": (b"\x1f\x8b", lambda f, mode: gzip.GzipFile(fileobj=f, mode=mode, compresslevel=6)),
+    "bz2": (b"BZh", lambda f, mode: bz2.BZ2File(f, mode)),
+    "lzma": (b"\xfd7zXZ\x00", lambda f, mode: lzma.LZMAFile(f, mode)),
+}
+
+# Розмір частини, якою знімок з пам'яті подається на стиснення
+_CHUNK_SIZE = 1 << 20
+
+# Помилки читання пошкодженого (зокрема обрізаного стисненого) знімка
+_CORRUPT_ERRORS = (
+    pickle.UnpicklingError,
+    EOFError,
+    TypeError,
+    # pickle читає зіпсовані байти раніше, ніж gzip перевірить контрольну суму
+    UnicodeDecodeError,
+    zlib.error,
+    gzip.BadGzipFile,
+    lzma.LZMAError,
+)
+
+
+def _is_corrupt(error: OSError) -> bool:
     """
-    Зберігає адресну книгу та нотатки в файл
-    Шлях береться з config.py
+    Чи OSError означає пошкоджені дані, а не помилку диска: bz2 повідомляє
+    про пошкоджений потік звичайним OSError без errno ("Invalid data stream")
     """
+    return isinstance(error, _CORRUPT_ERRORS) or (type(error) is OSError and error.errno is None)
+
+
+def _ensure_dir(filename):
     # Створюємо папку (наприклад, "DB"), якщо її ще не існує
     # os.path.dirname("DB/assistant_data.pkl") -> "DB"
     # os.path.dirname("assistant_data.pkl") -> "" (порожній рядок)
@@ -19,24 +72,968 @@ def save_data(book: AddressBook, notes: NoteBook, filename=config.DEFAULT_STORAG
     # Створюємо папку, лише якщо вона вказана (не ".")
     if storage_dir and not os.path.exists(storage_dir):
         os.makedirs(storage_dir)
-    # Зберігаємо обидва об'єкти у вигляді словника
-    data_to_save = {"address_book": book, "note_book": notes}
-    with open(filename, "wb") as f:
-        pickle.dump(data_to_save, f)
+    return storage_dir
 
 
-def load_data(filename=config.DEFAULT_STORAGE_PATH) -> tuple:
+def _write_temp(filename, write, suffix=".tmp") -> str:
     """
-    Завантажує адресну книгу та нотатки з файлу.
-    Шлях береться з config.py
+    write(f) пише у тимчасовий файл у тій самій папці, що й filename (fsync).
+    Повертає шлях до тимчасового файлу для _replace.
     """
+    storage_dir = _ensure_dir(filename)
+    fd, tmp_filename = tempfile.mkstemp(
+        dir=storage_dir or ".", prefix=os.path.basename(filename) + ".", suffix=suffix
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        os.remove(tmp_filename)
+        raise
+    return tmp_filename
+
+
+def _replace(tmp_filename, filename):
+    """Атомарно заміняє filename тимчасовим файлом"""
+    os.replace(tmp_filename, filename)
+    _fsync_dir(os.path.dirname(filename))
+
+
+def _fsync_dir(storage_dir):
+    # fsync папки фіксує створення та перейменування файлів (на Windows недоступно)
     try:
-        with open(filename, "rb") as f:
-            data_loaded = pickle.load(f)
-            if isinstance(data_loaded, AddressBook):
-                return data_loaded, NoteBook()
-            book = data_loaded.get("address_book", AddressBook())
-            notes = data_loaded.get("note_book", NoteBook())
-            return book, notes
-    except (FileNotFoundError, pickle.UnpicklingError, EOFError, TypeError):
-        return AddressBook(), NoteBook()
+        dir_fd = os.open(storage_dir or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+def _write_atomic(filename, write):
+    """
+    Атомарно записує файл: write(f) пише у тимчасовий файл у тій самій папці,
+    потім fsync і os.replace. Попередній знімок лишається цілим,
+    якщо процес впаде посеред запису.
+    """
+    _replace(_write_temp(filename, write), filename)
+
+
+@contextmanager
+def _compressed(f):
+    """
+    Потік для запису знімка у відкритий файл f зі стисненням config.SNAPSHOT_COMPRESSION.
+    pickle пише в нього частинами, тож у пам'яті не буває одночасно
+    всього знімка і його стисненої копії
+    """
+    codec = config.SNAPSHOT_COMPRESSION
+    if not codec:
+        yield f
+        return
+    if codec not in _CODECS:
+        raise ValueError(f"Невідоме стиснення '{codec}'.")
+    with _CODECS[codec][1](f, "wb") as stream:
+        yield stream
+
+
+def _write_compressed(f, payload: bytes):
+    """
+    Стискає payload (знімок, серіалізований у пам'ять) у відкритий файл f.
+    Подається частинами, тож стиснена копія не збирається в пам'яті цілком
+    """
+    view = memoryview(payload)
+    with _compressed(f) as stream:
+        for start in range(0, len(view), _CHUNK_SIZE):
+            stream.write(view[start : start + _CHUNK_SIZE])
+
+
+def _decompressed(f):
+    """
+    Потік для читання знімка з відкритого файлу f: стиснення визначається
+    за сигнатурою на початку файлу, тож читаються знімки з будь-яким налаштуванням
+    """
+    head = f.read(6)
+    f.seek(0)
+    for magic, open_stream in _CODECS.values():
+        if head.startswith(magic):
+            return open_stream(f, "rb")
+    return f
+
+
+def snapshot_meta(generation: int = 0, journals: dict = None) -> dict:
+    """
+    Службові дані знімка:
+    generation - номер збереження (збільшується з кожним записом знімка);
+    journals - які записи журналів уже є у знімку: сеанс -> номер останнього запису
+    """
+    return {"generation": generation, "journals": dict(journals or {})}
+
+
+class StorageBackend:
+    """
+    Інтерфейс сховища даних. Конкретне сховище обирається в config.STORAGE_BACKEND
+    """
+
+    # Чи потрібне сховищу фонове автозбереження знімків
+    # (сховища, що пишуть кожну зміну окремо, його не потребують)
+    autosave = False
+
+    def __init__(self, path: str):
+        self.path = path
+        # Чи фіксується кожна зміна одразу (журнал, транзакція SQLite).
+        # Пакетний режим вимикає це і фіксує зміни лише через save()
+        self.autocommit = True
+        # Повідомлення для користувача (очікування на інший процес, об'єднання змін),
+        # див. pop_notices()
+        self.notices = []
+
+    def set_autocommit(self, book: AddressBook, notes: NoteBook, enabled: bool):
+        self.autocommit = enabled
+
+    def load(self) -> tuple:
+        """Повертає (AddressBook, NoteBook)"""
+        raise NotImplementedError
+
+    def save(self, book: AddressBook, notes: NoteBook):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SnapshotBackend(StorageBackend):
+    """
+    Сховище, що зберігає книги цілим знімком у файлі + журнали змін поруч із ним.
+    Підкласи визначають формат знімка: _read_snapshot, _write_snapshot
+    та _read_generation (має читати лише заголовок знімка).
+
+    З тими самими даними можуть працювати кілька процесів:
+    - кожен сеанс пише власний журнал; при завантаженні застосовуються журнали
+      сеансів, що завершились аварійно, не зберігши змін;
+    - знімок має номер покоління, що збільшується з кожним збереженням;
+    - знімок пишеться у тимчасовий файл без блокування, а під виключним
+      блокуванням (fcntl) лише перевіряється покоління і замінюється файл;
+    - якщо інший процес тим часом зберіг своє покоління, зміни цього сеансу
+      застосовуються поверх нього (_merge), і книги переходять на об'єднаний стан.
+    """
+
+    autosave = True
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.journal = None
+        # Сумарна версія книг (book.version + notes.version), що вже записана у знімок
+        self.saved_version = 0
+        # Запис знімків на диск (основний потік та автозбереження) по черзі
+        self.write_lock = threading.Lock()
+        # Блокування між процесами (файл поруч зі знімком)
+        self.lock = FileLock(self.path + ".lock", on_wait=self._lock_waited)
+        # Покоління знімка, з яким узгоджені книги в пам'яті
+        self.generation = 0
+        # Записи журналів, що вже є у знімку: сеанс -> номер останнього запису
+        self.journal_seqs = {}
+        # Автозбереження не записало знімок, бо інший процес зберіг свій
+        self.needs_merge = False
+
+    def _read_snapshot(self) -> tuple:
+        """Читає знімок: (book, notes, meta), meta - див. snapshot_meta()"""
+        raise NotImplementedError
+
+    def _write_snapshot(self, f, book: AddressBook, notes: NoteBook, meta: dict):
+        """Пише знімок у відкритий двійковий файл"""
+        raise NotImplementedError
+
+    def _dump_snapshot(self, f, book: AddressBook, notes: NoteBook, meta: dict):
+        """
+        Серіалізує знімок у буфер пам'яті для dump() - під блокуванням REPL,
+        тож повільні кроки (стиснення) відкладаються до _write_payload
+        """
+        self._write_snapshot(f, book, notes, meta)
+
+    def _write_payload(self, f, payload: bytes, meta: dict):
+        """Пише результат dump() у відкритий файл (без блокування REPL)"""
+        f.write(payload)
+
+    def _read_generation(self) -> int:
+        """Покоління знімка на диску (0 - знімка ще немає)"""
+        raise NotImplementedError
+
+    def _lock_waited(self, seconds: float):
+        self.notices.append(f"Дані зайняті іншим процесом: очікування {seconds:.2f} с.")
+
+    def _next_meta(self) -> dict:
+        journals = dict(self.journal_seqs)
+        if self.journal and self.journal.seq:
+            journals[self.journal.session] = self.journal.seq
+        return snapshot_meta(self.generation + 1, journals)
+
+    def _commit(self, tmp_filename: str, meta: dict) -> bool:
+        """
+        Під виключним блокуванням замінює знімок тимчасовим файлом, якщо на диску
+        досі те покоління, з якого він зроблений. Інакше видаляє файл і повертає False.
+        """
+        try:
+            with self.lock.hold():
+                if self._read_generation() != meta["generation"] - 1:
+                    return False
+                self._replace_snapshot(tmp_filename, meta)
+                self.generation = meta["generation"]
+                self.journal_seqs = dict(meta["journals"])
+                self._remove_stale_journals()
+            return True
+        finally:
+            if os.path.exists(tmp_filename):
+                os.remove(tmp_filename)
+
+    def _replace_snapshot(self, tmp_filename: str, meta: dict):
+        """Замінює знімок на диску (під виключним блокуванням, покоління вже перевірене)"""
+        _replace(tmp_filename, self.path)
+
+    def _remove_stale_journals(self):
+        """
+        Журнали сеансів, що завершились (файл ніхто не тримає), вже повністю
+        у новому знімку - їх можна видалити
+        """
+        own = self.journal.session if self.journal else None
+        for session in list(self.journal_seqs):
+            if session == own:
+                continue
+            path = journal_path(self.path, session)
+            if not os.path.exists(path):
+                del self.journal_seqs[session]
+            elif not locking.is_locked(path):
+                os.remove(path)
+                del self.journal_seqs[session]
+
+    def _merge(self, book: AddressBook, notes: NoteBook):
+        """
+        Інший процес зберіг дані після нашого завантаження: читаємо його знімок
+        і застосовуємо поверх нього зміни цього сеансу, яких у ньому ще немає.
+        Книги переходять на об'єднаний стан, спостерігачі (журнал) лишаються.
+        """
+        disk_book, disk_notes, meta = self._read_snapshot()
+        since = meta["journals"].get(self.journal.session, 0)
+        ops = [op for seq, op in self.journal.pending if seq > since]
+        renumbered = merge_ops(ops, disk_book, disk_notes)
+        book._adopt(disk_book)
+        notes._adopt(disk_notes)
+        self.generation = meta["generation"]
+        self.journal_seqs = meta["journals"]
+        notice = f"Дані змінив інший процес - ваші зміни ({len(ops)}) об'єднано з його змінами."
+        if renumbered:
+            moved = ", ".join(f"{old} -> {new}" for old, new in islice(renumbered.items(), 5))
+            if len(renumbered) > 5:
+                moved += f" та ще {len(renumbered) - 5}"
+            notice += f" Нові ID нотаток: {moved}."
+        self.notices.append(notice)
+
+    def save(self, book: AddressBook, notes: NoteBook):
+        """
+        Записує знімок, після чого журнал сеансу очищується.
+        Якщо інший процес зберіг дані після нас, спершу об'єднує зміни (_merge).
+        """
+        with self.write_lock:
+            if self.journal is None:
+                # Книги не завантажені з цього сховища (перенесення даних) -
+                # знімок просто замінює те, що є на диску
+                self.generation = self._read_generation()
+            while True:
+                version = book.version + notes.version
+                meta = self._next_meta()
+                tmp_filename = _write_temp(
+                    self.path, lambda f: self._write_snapshot(f, book, notes, meta)
+                )
+                if self._commit(tmp_filename, meta):
+                    break
+                if self.journal is None:
+                    self.generation = self._read_generation()
+                else:
+                    self._merge(book, notes)
+            self.saved_version = version
+            self.needs_merge = False
+        if self.journal:
+            self._journal_saved(meta)
+
+    def _journal_saved(self, meta: dict):
+        self.journal.saved(meta["journals"].get(self.journal.session, 0))
+        self._update_compact_threshold()
+
+    def _update_compact_threshold(self):
+        """
+        Журнал згортається, коли стає не меншим за знімок (але не раніше
+        config.JOURNAL_COMPACT_THRESHOLD) - так сумарна ціна згортань
+        лінійна навіть при масовому імпорті у велику книгу
+        """
+        self.journal.compact_threshold = max(config.JOURNAL_COMPACT_THRESHOLD, self._snapshot_size())
+
+    def _snapshot_size(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def dump(self, book: AddressBook, notes: NoteBook) -> tuple:
+        """
+        Серіалізує книги в пам'ять: (payload, version, meta)
+        Використовується автозбереженням, щоб не тримати блокування під час запису
+        """
+        meta = self._next_meta()
+        version = book.version + notes.version
+        buffer = io.BytesIO()
+        self._dump_snapshot(buffer, book, notes, meta)
+        return buffer.getvalue(), version, meta
+
+    def write_dump(self, payload: bytes, version: int, meta: dict) -> bool:
+        """
+        Записує результат dump(), якщо новіший знімок ще не записано.
+        Якщо інший процес зберіг дані після нас, нічого не пише і встановлює
+        needs_merge - тоді треба викликати save(), який об'єднає зміни.
+        """
+        with self.write_lock:
+            if self.saved_version >= version or meta["generation"] != self.generation + 1:
+                return False
+            tmp_filename = _write_temp(self.path, lambda f: self._write_payload(f, payload, meta))
+            if not self._commit(tmp_filename, meta):
+                self.needs_merge = True
+                return False
+            self.saved_version = version
+        return True
+
+    def set_autocommit(self, book: AddressBook, notes: NoteBook, enabled: bool):
+        """
+        Без autocommit зміни не пишуться в журнал - лише в наступний знімок.
+        Журнал при цьому лишається на місці, і save() його очищує як завжди.
+        """
+        if self.journal:
+            self.journal.pause(not enabled)
+        super().set_autocommit(book, notes, enabled)
+
+    def _replay_journals(self, book: AddressBook, notes: NoteBook, journals: dict) -> dict:
+        """
+        Застосовує зміни з журналів сеансів, що завершились, не зберігши їх
+        (аварійне завершення). Журнали живих сеансів пропускаються - ці сеанси
+        збережуть свої зміни самі. Повертає journals з урахуванням застосованого.
+        """
+        journals = dict(journals)
+        for session, path in session_journals(self.path).items():
+            if locking.is_locked(path):
+                continue
+            try:
+                if not os.path.getsize(path):
+                    # Порожній журнал сеансу, що завершився
+                    os.remove(path)
+                    continue
+            except FileNotFoundError:
+                continue
+            last_seq = replay_journal(path, book, notes, since_seq=journals.get(session, 0))
+            if last_seq:
+                journals[session] = last_seq
+        return journals
+
+    def read(self) -> tuple:
+        """Знімок з уже застосованими журналами, без підключення журналу"""
+        book, notes, meta = self._read_snapshot()
+        self._replay_journals(book, notes, meta["journals"])
+        return book, notes
+
+    def load(self) -> tuple:
+        """
+        Поверх знімка застосовуються журнали змін, після чого журнал нового
+        сеансу підключається до книг і записує кожну подальшу зміну.
+        Знімок читається без блокування; під спільним блокуванням лише
+        перевіряється, що його тим часом не замінили, і читаються журнали.
+        """
+        self.close()
+        while True:
+            book, notes, meta = self._read_snapshot()
+            with self.lock.hold(exclusive=False):
+                if self._read_generation() != meta["generation"]:
+                    continue
+                journals = self._replay_journals(book, notes, meta["journals"])
+                break
+        self.generation = meta["generation"]
+        self.journal_seqs = journals
+        # Відлік змін починається заново; зміни, застосовані з журналів,
+        # ще не у знімку - автозбереження їх запише
+        self.saved_version = 0
+        self.needs_merge = False
+
+        _ensure_dir(self.path)
+        session = new_session()
+        self.journal = Journal(
+            journal_path(self.path, session),
+            compact=self.save,
+            session=session,
+            enabled=config.JOURNAL_ENABLED,
+        )
+        self._update_compact_threshold()
+        self.journal.attach(book, notes)
+        if not self.autocommit:
+            self.journal.pause(True)
+        return book, notes
+
+    def close(self):
+        if self.journal:
+            self.journal.detach()
+            self.journal = None
+
+
+class PickleBackend(SnapshotBackend):
+    """
+    Сховище за замовчуванням: знімок у pickle + журнали змін поруч із ним.
+    Знімок - два об'єкти pickle поспіль: короткий заголовок (snapshot_meta),
+    який можна прочитати окремо, і словник з книгами.
+    Обидва пишуться через стиснення config.SNAPSHOT_COMPRESSION (див. _compressed);
+    автозбереження стискає знімок уже після того, як відпустить блокування REPL.
+    """
+
+    def _write_snapshot(self, f, book: AddressBook, notes: NoteBook, meta: dict):
+        with _compressed(f) as stream:
+            self._dump_snapshot(stream, book, notes, meta)
+
+    def _dump_snapshot(self, f, book: AddressBook, notes: NoteBook, meta: dict):
+        pickle.dump(meta, f)
+        # Зберігаємо обидва об'єкти у вигляді словника
+        pickle.dump({"address_book": book, "note_book": notes}, f)
+
+    def _write_payload(self, f, payload: bytes, meta: dict):
+        _write_compressed(f, payload)
+
+    def _read_snapshot(self) -> tuple:
+        try:
+            with open(self.path, "rb") as raw, _decompressed(raw) as f:
+                data_loaded = pickle.load(f)
+                if isinstance(data_loaded, AddressBook):
+                    return data_loaded, NoteBook(), snapshot_meta()
+                if "generation" in data_loaded:
+                    meta = snapshot_meta(data_loaded["generation"], data_loaded["journals"])
+                    data_loaded = pickle.load(f)
+                else:
+                    # Знімок попередніх версій: журнал був один, спільний
+                    meta = snapshot_meta(journals={"": data_loaded.get("journal_seq", 0)})
+                book = data_loaded.get("address_book", AddressBook())
+                notes = data_loaded.get("note_book", NoteBook())
+                return book, notes, meta
+        except FileNotFoundError:
+            return AddressBook(), NoteBook(), snapshot_meta()
+        except _CORRUPT_ERRORS + (OSError,) as e:
+            if not _is_corrupt(e):
+                raise
+            # Пошкоджений знімок відкладаємо вбік, щоб наступне збереження
+            # не затерло його і дані можна було відновити вручну
+            os.replace(self.path, self.path + ".corrupt")
+            return AddressBook(), NoteBook(), snapshot_meta()
+
+    def _read_generation(self) -> int:
+        try:
+            with open(self.path, "rb") as raw, _decompressed(raw) as f:
+                header = pickle.load(f)
+        except FileNotFoundError:
+            return 0
+        except _CORRUPT_ERRORS + (OSError,) as e:
+            if not _is_corrupt(e):
+                raise
+            return -1
+        if isinstance(header, dict):
+            return header.get("generation", 0)
+        return 0
+
+
+def _contact_shard(name: str, count: int) -> int:
+    """Шард контакту - за хешем імені (crc32, на відміну від hash(), однаковий у всіх процесах)"""
+    return zlib.crc32(name.encode("utf-8")) % count
+
+
+def _read_shard(path: str) -> list:
+    with open(path, "rb") as raw, _decompressed(raw) as f:
+        return pickle.load(f)
+
+
+class ShardedBackend(PickleBackend):
+    """
+    Знімок pickle, поділений на файли-шарди, щоб зміна одного контакту
+    не переписувала всю книгу:
+    - контакти діляться за хешем імені на config.CONTACT_SHARDS шардів,
+      нотатки - діапазонами ID по config.NOTE_SHARD_SIZE;
+    - self.path - маніфест: заголовок (snapshot_meta), розбиття, _next_id
+      нотаток та імена файлів шардів у папці <ім'я>.shards поруч;
+    - зміни книг (підписка) позначають шард "брудним" - номер його останньої
+      зміни новіший за записаний у файлі; знімок переписує лише такі шарди,
+      решту маніфест бере з попереднього покоління;
+    - шарди пишуться в нові файли з унікальними іменами, тож знімок на диску
+      змінюється лише атомарною заміною маніфесту; файли попереднього маніфесту,
+      на які новий не посилається, видаляються одразу після заміни;
+    - шарди стискаються так само, як знімок PickleBackend (маніфест - ні);
+    - автозбереження під блокуванням REPL лише серіалізує змінені шарди в пам'ять,
+      а файли створює, стискає та fsync-ить уже без нього (_dump_snapshot);
+    - при завантаженні шарди читаються в config.SHARD_LOAD_THREADS потоках.
+    Після відновлення з журналів, об'єднання зі змінами іншого процесу
+    або зміни розбиття в config.py знімок один раз пишеться цілком.
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.shard_dir = os.path.splitext(path)[0] + ".shards"
+        # Книги, зміни яких позначають шарди
+        self._books = None
+        # Номер останньої зміни (позначки шардів)
+        self._tick = 0
+        # Розбиття знімка, прочитаного load() (див. _read_snapshot)
+        self._loaded = None
+        self._reset_shards()
+
+    def _reset_shards(self):
+        # Шарди на диску, з якими узгоджені книги: ключ -> (файл, номер зміни);
+        # ключ - ("c", номер) для контактів, ("n", номер) для нотаток.
+        # None - невідомо, наступний знімок пишеться цілком
+        self._files = None
+        # Ключ шарду -> номер його останньої зміни
+        self._changes = {}
+        # Розбиття (кількість шардів контактів, розмір шарду нотаток),
+        # імена контактів кожного шарду, кількість нотаток кожного шарду
+        # і порядок додавання контактів (у шарді поруч із контактом)
+        self._layout = None
+        self._members = None
+        self._note_counts = None
+        self._order = None
+        self._next_seq = 0
+
+    def _track(self, book: AddressBook, notes: NoteBook):
+        self._untrack()
+        self._books = (book, notes)
+        book.subscribe(self._on_change)
+        notes.subscribe(self._on_change)
+        self._reset_shards()
+
+    def _untrack(self):
+        if self._books is not None:
+            for observed in self._books:
+                observed.unsubscribe(self._on_change)
+            self._books = None
+
+    def _on_change(self, event: str, *args):
+        if self._members is None:
+            return
+        contact_shards, note_shard_size = self._layout
+        if event in ("add_record", "update_record", "delete_record"):
+            name = args[0] if event == "delete_record" else args[0].name.value
+            index = _contact_shard(name, contact_shards)
+            if event == "add_record" and name not in self._order:
+                self._order[name] = self._next_seq
+                self._next_seq += 1
+                self._members.setdefault(index, set()).add(name)
+            elif event == "delete_record":
+                self._order.pop(name, None)
+                self._members[index].discard(name)
+            key = ("c", index)
+        elif event in ("add_note", "update_text", "add_tag", "remove_tag", "delete_note"):
+            note_id = args[0] if event == "delete_note" else args[0].id
+            index = note_id // note_shard_size
+            if event == "add_note":
+                self._note_counts[index] = self._note_counts.get(index, 0) + 1
+            elif event == "delete_note":
+                self._note_counts[index] -= 1
+            key = ("n", index)
+        else:
+            return
+        self._tick += 1
+        self._changes[key] = self._tick
+
+    def _index_books(self, book: AddressBook, notes: NoteBook, layout: tuple):
+        """Розбиття книг на шарди з нуля (знімок пишеться цілком)"""
+        contact_shards, note_shard_size = layout
+        self._layout = layout
+        self._members = {}
+        for name in book.data:
+            self._members.setdefault(_contact_shard(name, contact_shards), set()).add(name)
+        self._order = {name: seq for seq, name in enumerate(book.data)}
+        self._next_seq = len(self._order)
+        self._note_counts = {}
+        for note_id in notes.data:
+            index = note_id // note_shard_size
+            self._note_counts[index] = self._note_counts.get(index, 0) + 1
+
+    def _shard_items(self, key: tuple, book: AddressBook, notes: NoteBook) -> list:
+        kind, index = key
+        if kind == "c":
+            order = self._order
+            # Пари (порядковий номер, контакт): при завантаженні контакти
+            # з усіх шардів стають у тому порядку, в якому їх додано
+            return sorted(
+                ((order[name], book.data[name]) for name in self._members[index]),
+                key=itemgetter(0),
+            )
+        size = self._layout[1]
+        data = notes.data
+        return [data[note_id] for note_id in range(index * size, (index + 1) * size) if note_id in data]
+
+    def _dirty_shards(self, book: AddressBook, notes: NoteBook, meta: dict) -> list:
+        """
+        Ключі шардів, які треба переписати. Незмінені шарди одразу потрапляють
+        у meta["files"] (шарди нового знімка) з файлами попереднього знімка
+        """
+        if self._books is None or self._books[0] is not book or self._books[1] is not notes:
+            self._track(book, notes)
+        layout = (config.CONTACT_SHARDS, config.NOTE_SHARD_SIZE)
+        if self._layout != layout:
+            self._reset_shards()
+            self._index_books(book, notes, layout)
+        previous = self._files or {}
+        files = meta["files"] = {}
+        meta["written"] = []
+        meta["tick"] = self._tick
+        meta["layout"] = layout
+        meta["next_id"] = notes._next_id
+        keys = [("c", index) for index, names in self._members.items() if names]
+        keys += [("n", index) for index, count in self._note_counts.items() if count]
+        dirty = []
+        for key in keys:
+            entry = previous.get(key)
+            if entry is not None and self._changes.get(key, 0) <= entry[1]:
+                files[key] = entry
+            else:
+                dirty.append(key)
+        return dirty
+
+    def _write_shards(self, f, shards, meta: dict):
+        """
+        Пише шарди - пари (ключ, write(файл)) - у нові файли, а маніфест - у f.
+        meta["written"] - щойно записані файли (видаляються, якщо знімок
+        так і не стане поточним, див. _discard)
+        """
+        files, written = meta["files"], meta["written"]
+        try:
+            for key, write in shards:
+                path = _write_temp(
+                    os.path.join(self.shard_dir, f"{key[0]}{key[1]}"), write, suffix=".shard"
+                )
+                written.append(path)
+                files[key] = (os.path.basename(path), meta["tick"])
+            if written:
+                _fsync_dir(self.shard_dir)
+        except BaseException:
+            self._discard(meta)
+            raise
+        pickle.dump(snapshot_meta(meta["generation"], meta["journals"]), f)
+        pickle.dump(
+            {
+                "layout": meta["layout"],
+                "next_id": meta["next_id"],
+                "shards": {key: name for key, (name, _) in files.items()},
+            },
+            f,
+        )
+
+    def _write_snapshot(self, f, book: AddressBook, notes: NoteBook, meta: dict):
+        """Пише змінені шарди в нові файли, а маніфест - у f (шард за шардом)"""
+        shards = (
+            (key, lambda shard, key=key: self._dump_shard(self._shard_items(key, book, notes), shard))
+            for key in self._dirty_shards(book, notes, meta)
+        )
+        self._write_shards(f, shards, meta)
+
+    def _dump_snapshot(self, f, book: AddressBook, notes: NoteBook, meta: dict):
+        """
+        Під блокуванням REPL лише серіалізує змінені шарди в пам'ять (meta["shards"]);
+        файли шардів і маніфест пише _write_payload, коли відомі імена файлів
+        """
+        meta["shards"] = [
+            (key, pickle.dumps(self._shard_items(key, book, notes)))
+            for key in self._dirty_shards(book, notes, meta)
+        ]
+
+    def _write_payload(self, f, payload: bytes, meta: dict):
+        shards = (
+            (key, lambda shard, data=data: _write_compressed(shard, data))
+            for key, data in meta.pop("shards")
+        )
+        self._write_shards(f, shards, meta)
+
+    @staticmethod
+    def _dump_shard(items: list, f):
+        with _compressed(f) as stream:
+            pickle.dump(items, stream)
+
+    def _discard(self, meta: dict):
+        """Видаляє файли шардів знімка, що так і не став поточним"""
+        for path in meta.pop("written", ()):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _commit(self, tmp_filename: str, meta: dict) -> bool:
+        if super()._commit(tmp_filename, meta):
+            meta.pop("written", None)
+            self._files = meta["files"]
+            return True
+        self._discard(meta)
+        return False
+
+    def _replace_snapshot(self, tmp_filename: str, meta: dict):
+        try:
+            previous = set(self._read_manifest()[1]["shards"].values())
+        except (OSError, KeyError) + _CORRUPT_ERRORS:
+            previous = set()
+        super()._replace_snapshot(tmp_filename, meta)
+        for name in previous - {name for name, _ in meta["files"].values()}:
+            try:
+                os.remove(os.path.join(self.shard_dir, name))
+            except FileNotFoundError:
+                pass
+
+    def write_dump(self, payload: bytes, version: int, meta: dict) -> bool:
+        try:
+            return super().write_dump(payload, version, meta)
+        finally:
+            self._discard(meta)
+
+    def _merge(self, book: AddressBook, notes: NoteBook):
+        super()._merge(book, notes)
+        # Книги перейшли на дані іншого процесу - шарди на диску з ними не узгоджені
+        self._reset_shards()
+
+    def _snapshot_size(self) -> int:
+        size = super()._snapshot_size()
+        for name, _ in (self._files or {}).values():
+            try:
+                size += os.path.getsize(os.path.join(self.shard_dir, name))
+            except OSError:
+                pass
+        return size
+
+    def _read_manifest(self) -> tuple:
+        """(заголовок, маніфест) знімка на диску"""
+        with open(self.path, "rb") as f:
+            return pickle.load(f), pickle.load(f)
+
+    def _read_shards(self, shards: dict) -> dict:
+        """Вміст шардів (ключ -> список), прочитаних паралельно"""
+        paths = [os.path.join(self.shard_dir, name) for name in shards.values()]
+        with ThreadPoolExecutor(max_workers=max(config.SHARD_LOAD_THREADS, 1)) as pool:
+            return dict(zip(shards, pool.map(_read_shard, paths)))
+
+    def _read_snapshot(self) -> tuple:
+        self._loaded = None
+        while True:
+            header = None
+            try:
+                header, manifest = self._read_manifest()
+                shards = self._read_shards(manifest["shards"])
+                break
+            except FileNotFoundError:
+                if not os.path.exists(self.path):
+                    return AddressBook(), NoteBook(), snapshot_meta()
+                # Інший процес замінив знімок і видалив старі шарди - читаємо новий
+                if header is None or self._read_generation() != header["generation"]:
+                    continue
+            except KeyError:
+                pass
+            except _CORRUPT_ERRORS + (OSError,) as e:
+                if not _is_corrupt(e):
+                    raise
+            # Пошкоджений маніфест або шард відкладаємо вбік (див. PickleBackend)
+            os.replace(self.path, self.path + ".corrupt")
+            return AddressBook(), NoteBook(), snapshot_meta()
+
+        book, notes = AddressBook(), NoteBook()
+        contacts = []
+        members, note_counts = {}, {}
+        for (kind, index), items in sorted(shards.items()):
+            if kind == "c":
+                contacts += items
+                members[index] = {record.name.value for _, record in items}
+                continue
+            note_counts[index] = len(items)
+            for note in items:
+                note._book = notes
+                notes.data[note.id] = note
+        contacts.sort(key=itemgetter(0))
+        for _, record in contacts:
+            record._book = book
+            book.data[record.name.value] = record
+        notes._next_id = manifest["next_id"]
+        order = {record.name.value: seq for seq, record in contacts}
+        self._loaded = (manifest["layout"], manifest["shards"], members, note_counts, order)
+        return book, notes, snapshot_meta(header["generation"], header["journals"])
+
+    def _replay_journals(self, book: AddressBook, notes: NoteBook, journals: dict) -> dict:
+        replayed = super()._replay_journals(book, notes, journals)
+        if replayed != journals:
+            # Зміни з журналів ще не в шардах
+            self._loaded = None
+        return replayed
+
+    def load(self) -> tuple:
+        book, notes = super().load()
+        loaded, self._loaded = self._loaded, None
+        self._track(book, notes)
+        if loaded is not None and loaded[0] == (config.CONTACT_SHARDS, config.NOTE_SHARD_SIZE):
+            self._layout, shards, self._members, self._note_counts, self._order = loaded
+            self._next_seq = max(self._order.values(), default=-1) + 1
+            self._files = {key: (name, self._tick) for key, name in shards.items()}
+        return book, notes
+
+    def close(self):
+        super().close()
+        self._untrack()
+        self._loaded = None
+
+
+def _backend_class(name: str):
+    if name == "pickle":
+        return PickleBackend
+    if name == "sqlite":
+        from .sqlite_storage import SqliteBackend
+
+        return SqliteBackend
+    if name == "columnar":
+        from .columnar import ColumnarBackend
+
+        return ColumnarBackend
+    if name == "sharded":
+        return ShardedBackend
+    raise ValueError(f"Невідоме сховище '{name}'.")
+
+
+def get_backend(filename=None, backend=None) -> StorageBackend:
+    """
+    Повертає (і запам'ятовує) сховище для шляху.
+    Якщо назву чи шлях не вказано, вони беруться з config.py
+    """
+    name = backend or config.STORAGE_BACKEND
+    cls = _backend_class(name)
+    path = filename or config.STORAGE_PATHS[name]
+    key = (name, path)
+    if key not in _backends:
+        _backends[key] = cls(path)
+    return _backends[key]
+
+
+def save_data(book: AddressBook, notes: NoteBook, filename=None):
+    """
+    Зберігає адресну книгу та нотатки в файл
+    Сховище та шлях беруться з config.py
+    """
+    with stats.STATS.timed("save_data"):
+        get_backend(filename).save(book, notes)
+
+
+def load_data(filename=None) -> tuple:
+    """
+    Завантажує адресну книгу та нотатки з файлу.
+    Сховище та шлях беруться з config.py
+    """
+    with stats.STATS.timed("load_data"):
+        return get_backend(filename).load()
+
+
+def pop_notices() -> list:
+    """Повідомлення сховищ для користувача, що накопичились з попереднього виклику"""
+    notices = []
+    for backend in _backends.values():
+        while backend.notices:
+            notices.append(backend.notices.pop(0))
+    return notices
+
+
+def migrate_data(source="pickle", target="sqlite", source_path=None, target_path=None):
+    """
+    Переносить дані з одного сховища в інше
+    Наприклад, існуючий DB/assistant_data.pkl у SQLite
+    """
+    source_backend = _backend_class(source)(source_path or config.STORAGE_PATHS[source])
+    if isinstance(source_backend, SnapshotBackend):
+        book, notes = source_backend.read()
+    else:
+        book, notes = source_backend.load()
+    # Переносимо записи у звичайні книги, не прив'язані до джерела
+    plain_book, plain_notes = AddressBook(), NoteBook()
+    for record in list(book.data.values()):
+        plain_book.add_record(record)
+    for note in list(notes.data.values()):
+        plain_notes._put_note(note)
+    # ID видалених нотаток не видаються повторно і після перенесення
+    plain_notes._next_id = max(plain_notes._next_id, notes._next_id)
+    source_backend.close()
+    target_backend = _backend_class(target)(target_path or config.STORAGE_PATHS[target])
+    target_backend.save(plain_book, plain_notes)
+    target_backend.close()
+
+
+class AutoSaver(threading.Thread):
+    """
+    Фоновий потік автозбереження.
+    Кожні config.AUTOSAVE_INTERVAL секунд перевіряє, скільки змін накопичилось
+    з останнього збереження, і якщо їх не менше config.AUTOSAVE_DIRTY_THRESHOLD,
+    записує новий знімок.
+    Серіалізація відбувається в пам'ять під self.lock (узгоджена копія),
+    а запис на диск - вже без блокування, тож REPL не чекає на диск.
+    Основний цикл має виконувати команди під self.lock.
+    """
+
+    def __init__(self, book: AddressBook, notes: NoteBook, backend: SnapshotBackend):
+        super().__init__(name="autosave", daemon=True)
+        self.book = book
+        self.notes = notes
+        self.backend = backend
+        self.lock = threading.RLock()
+        self.last_error = None
+        self._stop_event = threading.Event()
+
+    def pending_changes(self) -> int:
+        """Кількість змін, яких ще немає у знімку"""
+        version = self.book.version + self.notes.version
+        return version - self.backend.saved_version
+
+    def save_if_dirty(self) -> bool:
+        with self.lock:
+            if self.pending_changes() < config.AUTOSAVE_DIRTY_THRESHOLD:
+                return False
+            payload, version, meta = self.backend.dump(self.book, self.notes)
+
+        # Поки ми серіалізували, основний потік міг зберегти новіший знімок
+        if not self.backend.write_dump(payload, version, meta):
+            if not self.backend.needs_merge:
+                return False
+            # Інший процес зберіг свої дані - об'єднуємо (рідко, тож під блокуванням)
+            with self.lock:
+                self.backend.save(self.book, self.notes)
+            return True
+
+        if self.backend.journal:
+            with self.lock:
+                # Журнал очищується, лише якщо після знімка в нього нічого не дописали
+                self.backend._journal_saved(meta)
+        return True
+
+    def run(self):
+        while not self._stop_event.wait(config.AUTOSAVE_INTERVAL):
+            try:
+                self.save_if_dirty()
+                self.last_error = None
+            except OSError as e:
+                # Не зупиняємо потік через тимчасову помилку диска
+                self.last_error = e
+
+    def stop(self):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
+
+
+def start_autosave(book: AddressBook, notes: NoteBook, filename=None) -> AutoSaver:
+    """
+    Створює автозбереження для книг і запускає його, якщо воно увімкнене в config.py
+    і потрібне обраному сховищу
+    """
+    backend = get_backend(filename)
+    autosaver = AutoSaver(book, notes, backend)
+    if config.AUTOSAVE_ENABLED and backend.autosave:
+        autosaver.start()
+    return autosaver
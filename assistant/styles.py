@@ -2,7 +2,7 @@
 #
 #
 try:
-    from colorama import Fore, Style, init
+    from colorama import Fore, Style, init, deinit
 
     init(autoreset=True)
 
@@ -40,3 +40,12 @@ def are_colors_enabled():
         print("(Warning: 'colorama' package not found. Colors will be disabled.)")
         print("(Run 'pip install colorama' to enable colors.)")
     return _COLORS_ENABLED
+
+
+def disable_colors():
+    """Вимикає кольори (наприклад, коли вивід читає інша програма)"""
+    global SUCCESS, ERROR, WARNING, INFO, HIGHLIGHT, PROMPT, _COLORS_ENABLED
+    SUCCESS = ERROR = WARNING = INFO = HIGHLIGHT = PROMPT = ""
+    if _COLORS_ENABLED:
+        deinit()
+    _COLORS_ENABLED = False
@@ -0,0 +1,132 @@
+#
+#
+#
+"""
+Порівняння стиснення знімків (config.SNAPSHOT_COMPRESSION):
+розмір файлу, час збереження та завантаження для кожного варіанту.
+
+Запуск з кореня проєкту:
+    python -m benchmarks.compression --scale 100k
+    python -m benchmarks.compression --scale 10k --codecs none,zlib --output compression.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from assistant import config, storage
+from . import datagen
+
+# "none" - знімок без стиснення (точка відліку)
+CODECS = ("none",) + tuple(storage._CODECS)
+
+
+def measure_codec(codec: str, book, notes, workdir: str, repeat: int) -> dict:
+    """Найкращий із repeat проходів для збереження та завантаження знімка pickle"""
+    config.SNAPSHOT_COMPRESSION = None if codec == "none" else codec
+    path = os.path.join(workdir, f"{codec}.pkl")
+    save_times, load_times = [], []
+    for _ in range(repeat):
+        if os.path.exists(path):
+            os.remove(path)
+        backend = storage.PickleBackend(path)
+        gc.collect()
+        start = time.perf_counter()
+        backend.save(book, notes)
+        save_times.append(time.perf_counter() - start)
+        backend.close()
+
+        backend = storage.PickleBackend(path)
+        gc.collect()
+        start = time.perf_counter()
+        backend.load()
+        load_times.append(time.perf_counter() - start)
+        backend.close()
+    return {
+        "bytes": os.path.getsize(path),
+        "save_seconds": min(save_times),
+        "load_seconds": min(load_times),
+    }
+
+
+def _print_row(codec: str, result: dict, raw_size: int):
+    ratio = raw_size / result["bytes"] if result["bytes"] else 0
+    print(
+        f"{codec:<8}{result['bytes'] / 1024 / 1024:>12.2f}{ratio:>10.2f}"
+        f"{result['save_seconds']:>14.3f}{result['load_seconds']:>16.3f}",
+        file=sys.stderr,
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Порівняння стиснення знімків")
+    parser.add_argument(
+        "--scale",
+        default="100k",
+        help=f"розмір даних: {', '.join(datagen.SCALES)} (за замовчуванням 100k)",
+    )
+    parser.add_argument(
+        "--codecs",
+        default=",".join(CODECS),
+        help=f"варіанти через кому: {', '.join(CODECS)}",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="скільки разів повторити виміри (береться найкращий)"
+    )
+    parser.add_argument("--seed", type=int, default=datagen.DEFAULT_SEED)
+    parser.add_argument("--output", metavar="FILE", help="записати результати у JSON")
+    options = parser.parse_args(argv)
+    scale = options.scale.strip().lower()
+    if scale not in datagen.SCALES:
+        parser.error(f"невідомий розмір '{scale}'")
+    codecs = [codec.strip() for codec in options.codecs.split(",") if codec.strip()]
+    for codec in codecs:
+        if codec not in CODECS:
+            parser.error(f"невідоме стиснення '{codec}'")
+
+    # Журнал не потрібен: вимірюємо лише знімок
+    config.JOURNAL_ENABLED = False
+    count = datagen.SCALES[scale]
+    print(f"--- {scale} ({count} контактів і нотаток) ---", file=sys.stderr)
+    book = datagen.generate_contacts(count, options.seed)
+    notes = datagen.generate_notes(count, options.seed)
+    print(
+        f"{'Кодек':<8}{'Розмір, МіБ':>12}{'Ступінь':>10}{'Збереження, с':>14}{'Завантаження, с':>16}",
+        file=sys.stderr,
+    )
+    results = {}
+    workdir = tempfile.mkdtemp(prefix="assistant-codecs-")
+    try:
+        raw_size = None
+        for codec in codecs:
+            results[codec] = measure_codec(codec, book, notes, workdir, max(options.repeat, 1))
+            if raw_size is None:
+                # Без "none" у списку ступінь стиснення рахується відносно першого варіанту
+                raw_size = results[codec]["bytes"]
+            _print_row(codec, results[codec], raw_size)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if options.output:
+        report = {
+            "meta": {
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "seed": options.seed,
+                "scale": scale,
+            },
+            "results": results,
+        }
+        with open(options.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+#
+#
+#
+import random
+from datetime import date, datetime, timedelta
+from assistant.models import AddressBook, NoteBook, Record, Note
+
+# Розміри наборів даних: назва -> кількість контактів (і стільки ж нотаток)
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+DEFAULT_SEED = 2024
+
+FIRST_NAMES = (
+    "Olena", "Andrii", "Iryna", "Taras", "Oksana", "Dmytro", "Nataliia", "Serhii",
+    "Yuliia", "Oleksandr", "Kateryna", "Mykola", "Sofiia", "Bohdan", "Anna", "Maksym",
+    "Mariia", "Volodymyr", "Daryna", "Ivan", "John", "Emily", "Michael", "Sarah",
+    "David", "Laura", "James", "Olivia", "Peter", "Chloe",
+)
+# Прізвища складаються з частин: понад 100 000 різних слів, як у словнику імен
+# справжньої великої книги (нечіткий пошук залежить саме від розміру словника)
+_SURNAME_STARTS = (
+    "Shev", "Kov", "Bon", "Tkach", "Krav", "Oli", "Pol", "Boi", "Mel", "Lys",
+    "Mar", "Rud", "Sav", "Pet", "Sm", "John", "Br", "Tay", "Wil", "Mil",
+    "Dav", "Cl", "Walk", "Youn", "Hr", "Zin", "Dor", "Ost", "Yar", "Vas",
+    "Kul", "Mosk", "Ler", "Fed", "Hal", "Ber", "Sor", "Pan", "Dan", "Tar",
+    "Ham", "Nor", "Lev", "Chor", "Bil", "Zel", "Kyr", "Ros", "Prok", "Stef",
+    "Har", "Gol", "Mak", "Ned", "Vol", "Kuz", "Ant", "Ser", "Luk", "Or",
+)
+_SURNAME_MIDDLES = (
+    "", "a", "e", "i", "o", "u", "y", "al", "an", "ar", "el", "en", "er",
+    "in", "ir", "ol", "on", "or", "ul", "un", "ur", "ash", "ych", "ov", "ev",
+    "ak", "ek", "ik", "ok", "am", "em", "im", "om", "ad", "ed", "id", "od",
+    "at", "et", "it", "ot", "ab", "eb", "ib", "ob",
+)
+_SURNAME_ENDINGS = (
+    "chenko", "enko", "uk", "chuk", "yk", "iak", "ko", "ets", "ich", "ovych",
+    "iv", "ov", "in", "sky", "ska", "son", "er", "ley", "man", "ton",
+    "ford", "well", "wood", "ski", "dze", "ian", "escu", "ez", "es", "us",
+    "as", "is", "off", "berg", "stein", "ner", "ling", "ke", "hart", "mond",
+)
+LAST_NAMES = tuple(
+    dict.fromkeys(
+        start + middle + ending
+        for start in _SURNAME_STARTS
+        for middle in _SURNAME_MIDDLES
+        for ending in _SURNAME_ENDINGS
+    )
+)
+CITIES = ("Київ", "Львів", "Одеса", "Харків", "Дніпро", "Вінниця", "Полтава", "Ужгород")
+STREETS = ("Шевченка", "Франка", "Грушевського", "Соборна", "Садова", "Лесі Українки")
+EMAIL_DOMAINS = ("gmail.com", "ukr.net", "i.ua", "outlook.com", "example.org")
+PHONE_PREFIXES = ("050", "063", "066", "067", "068", "073", "093", "095", "096", "097", "098", "099")
+
+# Слова для текстів нотаток: часті, рідші та рідкісні (нерівномірний розподіл, як у живому тексті)
+WORDS = (
+    "зустріч", "проєкт", "купити", "подзвонити", "завтра", "звіт", "python", "ідея",
+    "план", "бюджет", "клієнт", "перевірити", "документ", "відпустка", "лікар",
+    "рахунок", "оновити", "реліз", "тест", "дизайн", "книга", "курс", "спорт",
+    "подарунок", "квитки", "ремонт", "машина", "податки", "договір", "резюме",
+    "meeting", "deadline", "review", "backlog", "sprint", "release", "invoice",
+    "travel", "birthday", "groceries", "dentist", "insurance", "recipe", "garden",
+)
+FILLER = ("і", "та", "на", "для", "до", "після", "з", "про", "в", "не", "the", "a", "to", "of")
+TAGS = (
+    "work", "home", "urgent", "ideas", "python", "finance", "health", "travel",
+    "shopping", "family", "study", "books", "sport", "car", "project", "todo",
+    "Робота", "Дім", "Важливо", "Навчання",
+)
+
+
+def _unique_name(rng: random.Random, seen: set) -> str:
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    if name not in seen:
+        return name
+    # Повтори імен - як у реальній книзі, але з уточненням
+    suffix = 2
+    while f"{name} {suffix}" in seen:
+        suffix += 1
+    return f"{name} {suffix}"
+
+
+def generate_contacts(count: int, seed: int = DEFAULT_SEED) -> AddressBook:
+    """
+    Адресна книга з 'count' контактів. Однаковий seed - однакові дані.
+    Близько 90% контактів мають телефон, 70% - email, 80% - день народження, 50% - адресу.
+    """
+    rng = random.Random(seed)
+    book = AddressBook()
+    seen = set()
+    first_day = date(1950, 1, 1).toordinal()
+    last_day = date(2010, 12, 31).toordinal()
+    for _ in range(count):
+        name = _unique_name(rng, seen)
+        seen.add(name)
+        record = Record(name)
+        if rng.random() < 0.9:
+            record.add_phone(rng.choice(PHONE_PREFIXES) + f"{rng.randrange(10 ** 7):07d}")
+        if rng.random() < 0.7:
+            local = name.lower().replace(" ", ".")
+            record.add_email(f"{local}@{rng.choice(EMAIL_DOMAINS)}")
+        if rng.random() < 0.8:
+            birthday = date.fromordinal(rng.randint(first_day, last_day))
+            record.add_birthday(birthday.strftime("%d.%m.%Y"))
+        if rng.random() < 0.5:
+            record.add_address(
+                f"{rng.choice(CITIES)}, вул. {rng.choice(STREETS)}, {rng.randint(1, 200)}"
+            )
+        book.add_record(record)
+    return book
+
+
+def note_text(rng: random.Random) -> str:
+    words = []
+    for _ in range(rng.randint(5, 30)):
+        # Слова з початку списку трапляються частіше
+        if rng.random() < 0.3:
+            words.append(rng.choice(FILLER))
+        else:
+            words.append(WORDS[min(int(rng.expovariate(1 / 10)), len(WORDS) - 1)])
+    return " ".join(words).capitalize()
+
+
+def generate_notes(count: int, seed: int = DEFAULT_SEED) -> NoteBook:
+    """
+    Книга з 'count' нотаток по 5-30 слів; у кожної 0-3 теги.
+    Дати створення - детерміновані, протягом двох років до 01.01.2025.
+    """
+    rng = random.Random(seed + 1)
+    notes = NoteBook()
+    start = datetime(2023, 1, 1)
+    for _ in range(count):
+        note = Note(note_text(rng))
+        note.created_at = start + timedelta(seconds=rng.randrange(2 * 365 * 24 * 3600))
+        notes.add_note(note)
+        for tag in rng.sample(TAGS, rng.choice((0, 1, 1, 2, 2, 3))):
+            note.add_tag(tag)
+    return notes
+
+
+def sample_queries(book: AddressBook, count: int, seed: int = DEFAULT_SEED) -> list:
+    """
+    Запити для пошуку контактів: частини імен, телефонів та email
+    існуючих записів, а також кілька запитів без збігів
+    """
+    rng = random.Random(seed + 2)
+    records = list(book.data.values())
+    queries = []
+    for i in range(count):
+        if i % 10 == 9:
+            queries.append(f"zzq{i}")
+            continue
+        record = rng.choice(records)
+        kind = i % 3
+        if kind == 0 or (kind == 1 and record.phone is None) or (kind == 2 and record.email is None):
+            last_name = record.name.value.split()[1]
+            start = rng.randrange(max(len(last_name) - 3, 1))
+            queries.append(last_name[start : start + 4].lower())
+        elif kind == 1:
+            queries.append(record.phone.value[3:7])
+        else:
+            queries.append(record.email.value.split("@")[1])
+    return queries
+
+
+def sample_keys(book: AddressBook, count: int, seed: int = DEFAULT_SEED) -> tuple:
+    """
+    Запити для точного пошуку: (телефони, email) існуючих записів
+    у різних написаннях, а також кілька значень без збігів
+    """
+    rng = random.Random(seed + 4)
+    records = list(book.data.values())
+    phones, emails = [], []
+    for i in range(count):
+        record = rng.choice(records)
+        if i % 10 == 9 or record.phone is None:
+            phones.append(f"09900{i:05d}")
+        elif i % 2:
+            phone = record.phone.value
+            phones.append(f"+38 ({phone[:3]}) {phone[3:6]}-{phone[6:8]}-{phone[8:]}")
+        else:
+            phones.append(record.phone.value)
+        if i % 10 == 9 or record.email is None:
+            emails.append(f"nobody{i}@example.org")
+        else:
+            emails.append(record.email.value.upper() if i % 2 else record.email.value)
+    return phones, emails
+
+
+def sample_typos(book: AddressBook, count: int, seed: int = DEFAULT_SEED) -> list:
+    """
+    Запити для нечіткого пошуку: прізвища та повні імена існуючих записів
+    з помилкою (переставлені сусідні літери або пропущена літера),
+    а також кілька запитів без збігів
+    """
+    rng = random.Random(seed + 5)
+    records = list(book.data.values())
+    queries = []
+    for i in range(count):
+        if i % 10 == 9:
+            queries.append(f"zzq{i}")
+            continue
+        first, last = rng.choice(records).name.value.split()[:2]
+        pos = rng.randrange(1, len(last) - 1)
+        if i % 2:
+            typo = last[:pos] + last[pos + 1] + last[pos] + last[pos + 2 :]
+        else:
+            typo = last[:pos] + last[pos + 1 :]
+        queries.append(f"{first} {typo}" if i % 3 == 0 else typo)
+    return queries
+
+
+def sample_words(count: int, seed: int = DEFAULT_SEED) -> list:
+    """Запити для пошуку нотаток: слова, префікси та пари слів з текстів"""
+    rng = random.Random(seed + 3)
+    queries = []
+    for i in range(count):
+        word = rng.choice(WORDS)
+        kind = i % 3
+        if kind == 0:
+            queries.append(word)
+        elif kind == 1:
+            queries.append(word[:3])
+        else:
+            queries.append(f"{word} {rng.choice(WORDS)}")
+    return queries
@@ -0,0 +1,514 @@
+#
+#
+#
+"""
+Набір бенчмарків для моделей, обробників команд та сховищ.
+
+Запуск з кореня проєкту:
+    python -m benchmarks.run --scales 1k,10k --output results.json
+    python -m benchmarks.run --scales 10k --compare benchmarks/baseline.json
+"""
+import argparse
+import gc
+import itertools
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from assistant import config, handlers, storage
+from assistant.models import AddressBook, NoteBook, Note
+from . import datagen
+
+# prepare() викликається перед кожним проходом (не входить у вимір)
+# і повертає функцію, що виконує 'ops' операцій
+Case = namedtuple("Case", "name ops prepare")
+
+QUERY_COUNT = 50
+# Скільки найбільше проходів набирає короткий вимір, щоб тривати --min-duration
+MAX_PASSES = 20
+MUTATION_COUNT = 100
+BACKENDS = ("pickle", "sqlite", "columnar", "sharded")
+
+# Унікальні імена для контактів, що додаються під час вимірів
+_counter = itertools.count()
+
+
+def _simple(run):
+    return lambda: run
+
+
+def _each(func, items):
+    def run():
+        for item in items:
+            func(item)
+
+    return run
+
+
+def _render(result):
+    """Потоковий вивід обробника формується лише при читанні"""
+    return str(result)
+
+
+def model_cases(book: AddressBook, notes: NoteBook, seed: int) -> list:
+    queries = datagen.sample_queries(book, QUERY_COUNT, seed)
+    phones, emails = datagen.sample_keys(book, QUERY_COUNT, seed)
+    typos = datagen.sample_typos(book, QUERY_COUNT, seed)
+    words = datagen.sample_words(QUERY_COUNT, seed)
+    tags = [tag.lower()[:3] for tag in datagen.TAGS[: QUERY_COUNT]]
+    week_starts = [date(2025, 1, 1) + timedelta(weeks=i) for i in range(52)]
+
+    def cold_search():
+        book._trigrams = None
+        return lambda: book.search(queries[0])
+
+    def cold_keys():
+        book._phones = book._emails = None
+        return lambda: book.find_by_phone(phones[0])
+
+    def cold_fuzzy():
+        book._fuzzy = None
+        return lambda: book.fuzzy_search(typos[0], config.FUZZY_TOP_K)
+
+    def cold_text():
+        notes._text_index = None
+        return lambda: notes.search_by_text(words[0], mode="word")
+
+    def cold_order():
+        notes._by_id = notes._by_first_tag = None
+        return lambda: list(notes.sort_by_tags(limit=1))
+
+    cases = [
+        Case("contacts.search.cold", 1, cold_search),
+        Case("contacts.search", len(queries), _simple(_each(book.search, queries))),
+        Case("contacts.find_by_phone.cold", 1, cold_keys),
+        Case("contacts.find_by_phone", len(phones), _simple(_each(book.find_by_phone, phones))),
+        Case("contacts.find_by_email", len(emails), _simple(_each(book.find_by_email, emails))),
+        Case("contacts.fuzzy_search.cold", 1, cold_fuzzy),
+        Case(
+            "contacts.fuzzy_search",
+            len(typos),
+            _simple(_each(lambda q: book.fuzzy_search(q, config.FUZZY_TOP_K), typos)),
+        ),
+        Case(
+            "contacts.upcoming_birthdays",
+            len(week_starts),
+            _simple(_each(lambda day: book.get_upcoming_birthdays(7, day), week_starts)),
+        ),
+        Case(
+            "contacts.upcoming_birthdays.year",
+            1,
+            _simple(lambda: book.get_upcoming_birthdays(366, week_starts[0])),
+        ),
+        Case("notes.search_by_text.cold", 1, cold_text),
+    ]
+    for mode in ("substring", "word", "prefix", "phrase"):
+        cases.append(
+            Case(
+                f"notes.search_by_text.{mode}",
+                len(words),
+                _simple(_each(lambda q, mode=mode: notes.search_by_text(q, mode=mode), words)),
+            )
+        )
+    def parallel_substring():
+        # Поріг знижено лише на час виміру; перший прохід створює процеси пошуку
+        threshold = config.PARALLEL_SCAN_THRESHOLD
+        config.PARALLEL_SCAN_THRESHOLD = 0
+        try:
+            for query in words:
+                notes.search_by_text(query)
+        finally:
+            config.PARALLEL_SCAN_THRESHOLD = threshold
+
+    cases.append(
+        Case("notes.search_by_text.substring.parallel", len(words), _simple(parallel_substring))
+    )
+    cases.append(
+        Case(
+            "notes.rank_by_text",
+            len(words),
+            _simple(_each(lambda q: notes.rank_by_text(q, 20), words)),
+        )
+    )
+    for mode in ("substring", "exact", "prefix"):
+        cases.append(
+            Case(
+                f"notes.search_by_tag.{mode}",
+                len(tags),
+                _simple(_each(lambda q, mode=mode: notes.search_by_tag(q, mode=mode), tags)),
+            )
+        )
+    cases += [
+        Case("notes.sort_by_tags.cold", 1, cold_order),
+        Case("notes.sort_by_tags", 1, _simple(lambda: list(notes.sort_by_tags()))),
+        Case(
+            "notes.sort_by_tags.page",
+            QUERY_COUNT,
+            _simple(_each(lambda i: list(notes.sort_by_tags(i * 20, 20)), range(QUERY_COUNT))),
+        ),
+    ]
+    return cases
+
+
+def handler_cases(book: AddressBook, notes: NoteBook, seed: int, workdir: str) -> list:
+    queries = datagen.sample_queries(book, QUERY_COUNT, seed)
+    phones, emails = datagen.sample_keys(book, QUERY_COUNT, seed)
+    words = datagen.sample_words(QUERY_COUNT, seed)
+    names = [record.name.value for record in itertools.islice(book.data.values(), QUERY_COUNT)]
+    note_ids = [str(note_id) for note_id in itertools.islice(notes.data, MUTATION_COUNT)]
+    contacts_file = os.path.join(workdir, "contacts.csv")
+    notes_file = os.path.join(workdir, "notes.jsonl")
+
+    def add_contacts():
+        batch = next(_counter)
+        args = [["-n", f"Bench {batch}-{i}", "-p", f"{i:010d}"] for i in range(MUTATION_COUNT)]
+        return _each(lambda a: handlers.add_contact(a, book), args)
+
+    def delete_notes():
+        ids = [str(notes.add_note(Note("bench"))) for _ in range(MUTATION_COUNT)]
+        return _each(lambda note_id: handlers.delete_note([note_id], notes), ids)
+
+    def import_contacts():
+        handlers.export_contacts([contacts_file], book)
+        return lambda: handlers.import_contacts([contacts_file], AddressBook())
+
+    def import_notes():
+        handlers.export_notes([notes_file], notes)
+        return lambda: handlers.import_notes([notes_file], NoteBook())
+
+    def stream(handler, args, target):
+        return lambda: _render(handler(args, target))
+
+    return [
+        Case("handlers.show_all", 1, _simple(stream(handlers.show_all, [], book))),
+        Case(
+            "handlers.show_all.page",
+            QUERY_COUNT,
+            _simple(_each(lambda i: _render(handlers.show_all(["--page", "1"], book)), range(QUERY_COUNT))),
+        ),
+        Case(
+            "handlers.show_contact",
+            len(names),
+            _simple(_each(lambda name: handlers.show_contact([name], book), names)),
+        ),
+        Case(
+            "handlers.find_contact",
+            len(queries),
+            _simple(_each(lambda q: _render(handlers.find_contact([q], book)), queries)),
+        ),
+        Case(
+            "handlers.birthdays",
+            52,
+            _simple(
+                _each(
+                    lambda week: handlers.birthdays(
+                        ["7", "-d", (date(2025, 1, 1) + timedelta(weeks=week)).strftime("%d.%m.%Y")],
+                        book,
+                    ),
+                    range(52),
+                )
+            ),
+        ),
+        Case("handlers.add_contact", MUTATION_COUNT, add_contacts),
+        Case(
+            "handlers.update_contact",
+            len(names),
+            _simple(_each(lambda name: handlers.update_contact(["-n", name, "-a", "Київ"], book), names)),
+        ),
+        Case(
+            "handlers.add_note",
+            MUTATION_COUNT,
+            _simple(_each(lambda i: handlers.add_note(["bench", "note", str(i)], notes), range(MUTATION_COUNT))),
+        ),
+        Case(
+            "handlers.add_tag",
+            len(note_ids),
+            _simple(_each(lambda note_id: handlers.add_tag([note_id, "bench"], notes), note_ids)),
+        ),
+        Case(
+            "handlers.update_note",
+            len(note_ids),
+            _simple(
+                _each(lambda note_id: handlers.update_note([note_id, "оновлений", "текст"], notes), note_ids)
+            ),
+        ),
+        Case("handlers.delete_note", MUTATION_COUNT, delete_notes),
+        Case("handlers.show_notes", 1, _simple(stream(handlers.show_notes, [], notes))),
+        Case(
+            "handlers.find_note",
+            len(words),
+            _simple(_each(lambda q: _render(handlers.find_note(q.split(), notes)), words)),
+        ),
+        Case(
+            "handlers.find_note.word",
+            len(words),
+            _simple(_each(lambda q: _render(handlers.find_note(["-w"] + q.split(), notes)), words)),
+        ),
+        Case(
+            "handlers.find_tag",
+            len(datagen.TAGS),
+            _simple(_each(lambda tag: _render(handlers.find_tag([tag], notes)), datagen.TAGS)),
+        ),
+        Case("handlers.sort_notes", 1, _simple(stream(handlers.sort_notes_by_tags, [], notes))),
+        Case(
+            "handlers.export_contacts",
+            1,
+            _simple(lambda: handlers.export_contacts([contacts_file], book)),
+        ),
+        Case("handlers.import_contacts", 1, import_contacts),
+        Case("handlers.export_notes", 1, _simple(lambda: handlers.export_notes([notes_file], notes))),
+        Case("handlers.import_notes", 1, import_notes),
+        Case("handlers.show_help", 1, _simple(lambda: handlers.show_help([]))),
+        Case("handlers.show_stats", 1, _simple(lambda: handlers.show_stats([]))),
+    ]
+
+
+def storage_cases(book: AddressBook, notes: NoteBook, backends, workdir: str) -> list:
+    cases = []
+    for name in backends:
+        path = os.path.join(workdir, name, os.path.basename(config.STORAGE_PATHS[name]))
+
+        def save(name=name, path=path):
+            config.STORAGE_BACKEND = name
+            return lambda: _save(book, notes, path)
+
+        def load(name=name, path=path):
+            config.STORAGE_BACKEND = name
+            return lambda: _load(path)
+
+        def save_change(name=name, path=path):
+            # Збереження після зміни одного контакту у завантаженій книзі
+            config.STORAGE_BACKEND = name
+            if not os.path.exists(path):
+                _save(book, notes, path)
+            loaded_book, loaded_notes = storage.load_data(path)
+            record = next(iter(loaded_book.data.values()))
+            record.add_address(f"вул. Тестова, {next(_counter)}")
+            return lambda: _save(loaded_book, loaded_notes, path)
+
+        cases += [
+            Case(f"storage.{name}.save", 1, save),
+            Case(f"storage.{name}.load", 1, load),
+            Case(f"storage.{name}.save.one_change", 1, save_change),
+        ]
+    return cases
+
+
+def _save(book, notes, path):
+    storage.save_data(book, notes, path)
+    storage.get_backend(path).close()
+
+
+def _load(path):
+    storage.load_data(path)
+    storage.get_backend(path).close()
+
+
+def measure(case: Case, memory: bool, repeat: int = 1, min_duration: float = 0.0) -> dict:
+    """
+    Прогрівальний прохід (не враховується), далі проходи для часу без tracemalloc:
+    щонайменше repeat, а для коротких вимірів - доки сумарно не набереться
+    min_duration секунд (не більше MAX_PASSES). Береться найкращий прохід.
+    Потім (якщо memory) окремий прохід під tracemalloc для піку пам'яті -
+    трасування сповільнює код у кілька разів
+    """
+    case.prepare()()
+    times = []
+    while len(times) < repeat or (sum(times) < min_duration and len(times) < MAX_PASSES):
+        run = case.prepare()
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    seconds = min(times)
+    result = {
+        "ops": case.ops,
+        "seconds": seconds,
+        "passes": len(times),
+        "ops_per_sec": case.ops / seconds if seconds else None,
+        "peak_kib": None,
+    }
+    if memory:
+        run = case.prepare()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            run()
+            result["peak_kib"] = tracemalloc.get_traced_memory()[1] / 1024
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def measure_build(count: int, seed: int, options) -> tuple:
+    """Генерує книги і вимірює їх побудову"""
+    results = {}
+    built = {}
+    for name, generate in (("build.contacts", datagen.generate_contacts), ("build.notes", datagen.generate_notes)):
+        holder = []
+
+        def prepare(generate=generate):
+            # Книга попереднього проходу звільняється до виміру
+            holder.clear()
+            return lambda: holder.append(generate(count, seed))
+
+        case = Case(name, count, prepare)
+        results[name] = _measure(case, options)
+        _print_row(name, results[name])
+        built[name] = holder[0]
+        holder.clear()
+    return built["build.contacts"], built["build.notes"], results
+
+
+def _measure(case: Case, options) -> dict:
+    return measure(case, not options.no_memory, max(options.repeat, 1), options.min_duration)
+
+
+def run_scale(scale: str, options) -> dict:
+    count = datagen.SCALES[scale]
+    print(f"--- {scale} ({count} контактів і нотаток) ---", file=sys.stderr)
+    book, notes, results = measure_build(count, options.seed, options)
+    workdir = tempfile.mkdtemp(prefix=f"assistant-bench-{scale}-")
+    try:
+        cases = model_cases(book, notes, options.seed)
+        cases += handler_cases(book, notes, options.seed, workdir)
+        cases += storage_cases(book, notes, options.backends, workdir)
+        for case in cases:
+            if options.only and options.only not in case.name:
+                continue
+            results[case.name] = _measure(case, options)
+            _print_row(case.name, results[case.name])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def _print_row(name: str, result: dict):
+    peak = "-" if result["peak_kib"] is None else f"{result['peak_kib']:.0f}"
+    ops_per_sec = result["ops_per_sec"] or 0
+    print(
+        f"{name:<36}{result['ops']:>9}{result['seconds'] * 1000:>12.2f}"
+        f"{result['seconds'] / result['ops'] * 1e6:>14.1f}{ops_per_sec:>14.1f}{peak:>12}",
+        file=sys.stderr,
+    )
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_time: float) -> list:
+    """
+    Порівнює час на операцію та пік пам'яті з базовими результатами.
+    Повертає список регресій - рядків опису; виміри коротші за min_time
+    секунд не порівнюються за часом (це шум).
+    """
+    regressions = []
+    for scale, cases in results["results"].items():
+        for name, current in cases.items():
+            base = baseline.get("results", {}).get(scale, {}).get(name)
+            if base is None:
+                continue
+            if base["seconds"] >= min_time:
+                ratio = (current["seconds"] / current["ops"]) / (base["seconds"] / base["ops"])
+                if ratio > 1 + threshold:
+                    regressions.append(f"{scale} {name}: час x{ratio:.2f}")
+            if current.get("peak_kib") and base.get("peak_kib"):
+                ratio = current["peak_kib"] / base["peak_kib"]
+                if ratio > 1 + threshold:
+                    regressions.append(f"{scale} {name}: пам'ять x{ratio:.2f}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарки персонального помічника")
+    parser.add_argument(
+        "--scales",
+        default="1k,10k",
+        help=f"розміри через кому: {', '.join(datagen.SCALES)} (за замовчуванням 1k,10k)",
+    )
+    parser.add_argument(
+        "--backends",
+        default="pickle",
+        help=f"сховища для збереження/завантаження: {', '.join(BACKENDS)}",
+    )
+    parser.add_argument("--seed", type=int, default=datagen.DEFAULT_SEED)
+    parser.add_argument("--only", help="виконати лише виміри, назва яких містить рядок")
+    parser.add_argument("--no-memory", action="store_true", help="не вимірювати пік пам'яті")
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="скільки разів повторити кожен вимір після прогріву (береться найкращий)",
+    )
+    parser.add_argument(
+        "--min-duration",
+        type=float,
+        default=0.05,
+        help=f"короткі виміри повторюються, доки не триватимуть стільки секунд (до {MAX_PASSES} разів)",
+    )
+    parser.add_argument("--output", metavar="FILE", help="записати результати у JSON")
+    parser.add_argument(
+        "--compare", metavar="FILE", help="порівняти з базовими результатами (JSON з --output)"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="допустиме погіршення для --compare (0.25 = на 25%%)",
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.005,
+        help="виміри, коротші за стільки секунд у базі, не порівнюються за часом",
+    )
+    options = parser.parse_args(argv)
+    scales = [scale.strip().lower() for scale in options.scales.split(",") if scale.strip()]
+    options.backends = [name.strip() for name in options.backends.split(",") if name.strip()]
+    for scale in scales:
+        if scale not in datagen.SCALES:
+            parser.error(f"невідомий розмір '{scale}'")
+    for name in options.backends:
+        if name not in BACKENDS:
+            parser.error(f"невідоме сховище '{name}'")
+
+    # Журнал і автозбереження не потрібні: вимірюємо самі операції
+    config.JOURNAL_ENABLED = False
+    config.SQLITE_MIGRATE_PICKLE = False
+    print(
+        f"{'Вимір':<36}{'Операцій':>9}{'Всього, мс':>12}{'мкс/операцію':>14}"
+        f"{'операцій/с':>14}{'пік, КіБ':>12}",
+        file=sys.stderr,
+    )
+    results = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": options.seed,
+            "memory": not options.no_memory,
+            "repeat": options.repeat,
+        },
+        "results": {scale: run_scale(scale, options) for scale in scales},
+    }
+
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    if options.compare:
+        with open(options.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, options.threshold, options.min_time)
+        for line in regressions:
+            print(f"РЕГРЕСІЯ: {line}", file=sys.stderr)
+        if regressions:
+            return 1
+        print("Регресій не знайдено.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,10 +2,92 @@
 #
 #
 from assistant.models import AddressBook, NoteBook
-from assistant.storage import load_data, save_data
+from assistant.storage import load_data, save_data, start_autosave, get_backend, pop_notices
 from assistant import handlers
 from assistant import styles
+from assistant import config
+from assistant.stats import STATS
+from assistant import daemon
+from contextlib import nullcontext
+from itertools import islice
+import argparse
 import shlex
+import shutil
+import sys
+import time
+
+COMMANDS = {
+    # --- Контакти ---
+    "add-contact": handlers.add_contact,
+    "update-contact": handlers.update_contact,
+    "show-contact": handlers.show_contact,
+    "show-all": handlers.show_all,
+    "birthdays": handlers.birthdays,
+    "find-contact": handlers.find_contact,
+    "import-contacts": handlers.import_contacts,
+    "export-contacts": handlers.export_contacts,
+    # --- Нотатки ---
+    "add-note": handlers.add_note,
+    "add-tag": handlers.add_tag,
+    "show-notes": handlers.show_notes,
+    "find-note": handlers.find_note,
+    "find-tag": handlers.find_tag,
+    "sort-notes": handlers.sort_notes_by_tags,
+    "delete-note": handlers.delete_note,
+    "update-note": handlers.update_note,
+    "import-notes": handlers.import_notes,
+    "export-notes": handlers.export_notes,
+    # --- Загальні ---
+    "help": handlers.show_help,
+    "stats": handlers.show_stats,
+}
+
+CONTACT_COMMANDS = [
+    "add-contact",
+    "update-contact",
+    "show-contact",
+    "show-all",
+    "birthdays",
+    "find-contact",
+    "import-contacts",
+    "export-contacts",
+]
+
+NOTE_COMMANDS = [
+    "add-note",
+    "add-tag",
+    "show-notes",
+    "find-note",
+    "find-tag",
+    "sort-notes",
+    "delete-note",
+    "update-note",
+    "import-notes",
+    "export-notes",
+]
+
+GENERAL_COMMANDS = [
+    "help",
+    "stats",
+]
+
+# Коди завершення пакетного режиму
+EXIT_OK = 0
+EXIT_COMMAND_FAILED = 1
+EXIT_USAGE = 2
+
+
+def split_input(user_input: str) -> tuple:
+    """
+    Розбиває рядок на команду та аргументи (shlex.split коректно обробляє лапки)
+    Кидає ValueError, якщо лапки не закрито
+    """
+    parts = shlex.split(user_input)
+    if not parts:
+        return None, []
+    cmd = parts[0].strip().lower()
+    args = parts[1:]
+    return cmd, args
 
 
 def parse_input(user_input: str) -> tuple:
@@ -14,73 +96,126 @@ def parse_input(user_input: str) -> tuple:
     Використовує shlex.split для коректної обробки лапок
     """
     try:
-        parts = shlex.split(user_input)
+        return split_input(user_input)
     except ValueError as e:
         # Якщо користувач не закрив лапки
         print(f"{styles.ERROR}Помилка парсингу: {e} (можливо, незакриті лапки?)")
         return None, []
 
-    if not parts:
-        return None, []
-    cmd = parts[0].strip().lower()
-    args = parts[1:]
-    return cmd, args
+
+def execute(command: str, args: list, book: AddressBook, notes: NoteBook) -> str:
+    """
+    Виконує команду з таблиці COMMANDS і записує її виклик у статистику
+    (для потокового виводу - коли він закінчиться)
+    Помилки повертаються як handlers.ErrorResult
+    """
+    handler = COMMANDS.get(command)
+    if handler is None:
+        return handlers.ErrorResult(
+            f"{styles.ERROR}Невідома команда. Введіть 'help' для списку команд."
+        )
+    start = time.perf_counter()
+    with STATS.profiling():
+        result = _dispatch(handler, command, args, book, notes)
+    elapsed = time.perf_counter() - start
+    if isinstance(result, handlers.StreamResult):
+        result.lines = STATS.measure_lines(command, elapsed, result.lines)
+    else:
+        STATS.record(command, elapsed, len(result), isinstance(result, handlers.ErrorResult))
+    return result
 
 
-def main():
+def _dispatch(handler, command: str, args: list, book: AddressBook, notes: NoteBook) -> str:
+    if command in CONTACT_COMMANDS:
+        return handler(args, book)
+    if command in NOTE_COMMANDS:
+        return handler(args, notes)
+    if command in GENERAL_COMMANDS:
+        return handler(args)
+    return handlers.ErrorResult(
+        f"{styles.ERROR}Помилка диспетчера: команда '{command}' не приєднана до жодної категорії."
+    )
+
+
+def print_result(result, lock):
+    """
+    Виводить результат команди. Потоковий вивід (handlers.StreamResult)
+    читається порціями по екрану під lock; якщо config.PAGER_ENABLED,
+    після кожного повного екрана виводиться запит: Enter - далі, q - припинити
+    """
+    if not isinstance(result, handlers.StreamResult):
+        print(result)
+        return
+    page_size = max(shutil.get_terminal_size().lines - 1, 1)
+    # Нотатка займає кілька рядків екрана - рахуємо саме рядки
+    lines = (line for chunk in result for line in chunk.splitlines())
+    pending = []
+    try:
+        while True:
+            with lock:
+                page = pending + list(islice(lines, page_size - len(pending)))
+                # Зазираємо на рядок вперед, щоб не питати "далі" після останнього екрана
+                pending = list(islice(lines, 1))
+            print("\n".join(page))
+            if not pending:
+                return
+            if config.PAGER_ENABLED:
+                answer = input(f"{styles.INFO}-- Далі: Enter, припинити: q -- ")
+                if answer.strip().lower() == "q":
+                    return
+    finally:
+        with lock:
+            result.close()
+
+
+def print_notices(file=None):
+    """
+    Повідомлення сховища: очікування на інший процес, об'єднання змін.
+    У пакетному режимі (file=sys.stderr) - без кольорів
+    """
+    for notice in pop_notices():
+        if file is None:
+            print(f"{styles.WARNING}{notice}")
+        else:
+            print(notice, file=file)
+
+
+def main(client=None):
     """
     Головна функція бота
+    Якщо передано client (daemon.Client), команди виконує демон:
+    дані тут не завантажуються і не зберігаються
     """
-    book, notes = load_data()
-    print(f"{styles.INFO}Вітаю у персональному помічнику! (Введіть 'help' для довідки)")
+    if client is None:
+        book, notes = load_data()
+        # Фонове автозбереження; команди виконуються під autosaver.lock,
+        # щоб знімок завжди будувався з узгодженого стану
+        autosaver = start_autosave(book, notes)
+        lock = autosaver.lock
 
-    if "are_colors_enabled" in dir(styles):
-        styles.are_colors_enabled()
+        def run(command, args):
+            with lock:
+                return execute(command, args, book, notes)
 
-    COMMANDS = {
-        # --- Контакти ---
-        "add-contact": handlers.add_contact,
-        "update-contact": handlers.update_contact,
-        "show-contact": handlers.show_contact,
-        "show-all": handlers.show_all,
-        "birthdays": handlers.birthdays,
-        "find-contact": handlers.find_contact,
-        # --- Нотатки ---
-        "add-note": handlers.add_note,
-        "add-tag": handlers.add_tag,
-        "show-notes": handlers.show_notes,
-        "find-note": handlers.find_note,
-        "find-tag": handlers.find_tag,
-        "sort-notes": handlers.sort_notes_by_tags,
-        "delete-note": handlers.delete_note,
-        "update-note": handlers.update_note,
-        # --- Загальні ---
-        "help": handlers.show_help,
-    }
-
-    CONTACT_COMMANDS = [
-        "add-contact",
-        "update-contact",
-        "show-contact",
-        "show-all",
-        "birthdays",
-        "find-contact",
-    ]
+        def finish() -> str:
+            autosaver.stop()
+            save_data(book, notes)
+            get_backend().close()
+            return "Ваші дані збережено."
 
-    NOTE_COMMANDS = [
-        "add-note",
-        "add-tag",
-        "show-notes",
-        "find-note",
-        "find-tag",
-        "sort-notes",
-        "delete-note",
-        "update-note",
-    ]
+    else:
+        lock = nullcontext()
+        run = client.execute
 
-    GENERAL_COMMANDS = [
-        "help",
-    ]
+        def finish() -> str:
+            client.close()
+            return "Дані зберігає демон."
+
+        print(f"{styles.INFO}Під'єднано до демона ({client.path}).")
+    print(f"{styles.INFO}Вітаю у персональному помічнику! (Введіть 'help' для довідки)")
+
+    if "are_colors_enabled" in dir(styles):
+        styles.are_colors_enabled()
 
     while True:
         try:
@@ -91,37 +226,220 @@ def main():
                 continue
 
             if command in ["close", "exit"]:
-                save_data(book, notes)
-                print(f"{styles.WARNING}До побачення! Ваші дані збережено.")
+                print(f"{styles.WARNING}До побачення! {finish()}")
+                print_notices()
                 break
 
             elif command == "hello":
                 print(f"{styles.INFO}Чим можу допомогти?")
 
-            elif command in COMMANDS:
-                handler = COMMANDS[command]
-
-                if command in CONTACT_COMMANDS:
-                    result = handler(args, book)
-                elif command in NOTE_COMMANDS:
-                    result = handler(args, notes)
-                elif command in GENERAL_COMMANDS:
-                    result = handler(args)
-                else:
-                    result = f"{styles.ERROR}Помилка диспетчера: команда '{command}' не приєднана до жодної категорії."
-
-                print(result)
+            elif client is not None and command == daemon.SHUTDOWN_COMMAND:
+                print_result(run(command, args), lock)
+                finish()
+                break
 
             else:
-                print(f"{styles.ERROR}Невідома команда. Введіть 'help' для списку команд.")
+                print_result(run(command, args), lock)
+            print_notices()
 
         except KeyboardInterrupt:
-            save_data(book, notes)
-            print(f"\n{styles.WARNING}Вихід... Ваші дані збережено.")
+            print(f"\n{styles.WARNING}Вихід... {finish()}")
+            print_notices()
+            break
+        except ConnectionError as e:
+            print(f"{styles.ERROR}З'єднання з демоном втрачено: {e}")
             break
         except Exception as e:
             print(f"{styles.ERROR}Сталася критична помилка: {e}")
 
 
+def _one_line(text: str) -> str:
+    return " | ".join(line.strip() for line in text.splitlines() if line.strip())
+
+
+def run_batch(lines, out=None, save_every: int = 0, quiet: bool = False, client=None) -> int:
+    """
+    Пакетний режим: дані завантажуються один раз, команди читаються з 'lines'.
+    Якщо передано client (daemon.Client), команди виконує демон, а save_every
+    не використовується - дані зберігає демон.
+    Для кожної команди виводиться рядок стану, розділений табуляціями:
+        ok<TAB>номер рядка<TAB>команда
+        error<TAB>номер рядка<TAB>команда<TAB>повідомлення
+    Далі (якщо не quiet) - вивід команди, кожен рядок з табуляцією на початку.
+    Потоковий вивід дочитується до рядка стану, тож помилка посеред виводу
+    дає рядок error, після якого йде вже виведена частина.
+    Порожні рядки та рядки, що починаються з '#', пропускаються.
+    Зміни не пишуться в журнал по одній, а зберігаються в кінці
+    (та кожні save_every команд, якщо save_every > 0).
+    Повертає код завершення: EXIT_OK або EXIT_COMMAND_FAILED.
+    """
+    out = out or sys.stdout
+    if client is None:
+        book, notes = load_data()
+        backend = get_backend()
+        backend.set_autocommit(book, notes, False)
+
+        def run(command, args):
+            return execute(command, args, book, notes)
+
+    else:
+        run = client.execute
+    executed = failed = unsaved = 0
+    try:
+        for line_no, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                command, args = split_input(line)
+            except ValueError as e:
+                command = line.split()[0].lower()
+                result = handlers.ErrorResult(f"Помилка парсингу: {e} (можливо, незакриті лапки?)")
+            else:
+                if command in ["close", "exit"]:
+                    break
+                if command == "hello":
+                    result = "Чим можу допомогти?"
+                else:
+                    result = run(command, args)
+
+            executed += 1
+            output = ()
+            if isinstance(result, handlers.StreamResult):
+                # Потоковий вивід дочитується до рядка стану: помилка посеред
+                # виводу робить команду невдалою, а рядок стану - один на команду
+                output = handlers.spool_stream(result, keep=not quiet, keep_error=False)
+                if result.error:
+                    result = result.error
+            elif not quiet and not isinstance(result, handlers.ErrorResult):
+                output = (result,)
+            if isinstance(result, handlers.ErrorResult):
+                failed += 1
+                out.write(f"error\t{line_no}\t{command}\t{_one_line(result)}\n")
+            else:
+                out.write(f"ok\t{line_no}\t{command}\n")
+            for chunk in output:
+                for result_line in chunk.splitlines():
+                    out.write(f"\t{result_line}\n")
+            close = getattr(output, "close", None)
+            if close is not None:
+                close()
+
+            unsaved += 1
+            if client is None and save_every and unsaved >= save_every:
+                save_data(book, notes)
+                print_notices(sys.stderr)
+                unsaved = 0
+    finally:
+        if client is None:
+            save_data(book, notes)
+            backend.set_autocommit(book, notes, True)
+            # Від'єднує журнал сеансу (порожній файл журналу видаляється)
+            backend.close()
+            print_notices(sys.stderr)
+    print(f"Виконано команд: {executed}, з помилками: {failed}", file=sys.stderr)
+    return EXIT_COMMAND_FAILED if failed else EXIT_OK
+
+
+def cli(argv=None) -> int:
+    """
+    Точка входу: інтерактивний режим, або пакетний, якщо вказано --batch
+    чи команди подаються на stdin не з терміналу
+    """
+    parser = argparse.ArgumentParser(description="Персональний помічник")
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="виконати команди з файлу ('-' - зі stdin) і вийти",
+    )
+    parser.add_argument(
+        "--save-every",
+        type=int,
+        default=0,
+        metavar="N",
+        help="у пакетному режимі зберігати дані кожні N команд (за замовчуванням - лише в кінці)",
+    )
+    parser.add_argument(
+        "--quiet",
+        action="store_true",
+        help="у пакетному режимі виводити лише рядки стану",
+    )
+    parser.add_argument(
+        "--stats-json",
+        metavar="FILE",
+        help="при виході записати статистику команд (див. команду stats) у JSON-файл",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="FILE",
+        help="виконувати кожну команду під cProfile і при виході записати найгарячіші функції у файл",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="запустити демона: тримати дані в пам'яті та виконувати команди клієнтів через Unix-сокет",
+    )
+    parser.add_argument(
+        "--socket",
+        metavar="PATH",
+        help="шлях до сокета демона (за замовчуванням - config.DAEMON_SOCKET)",
+    )
+    options = parser.parse_args(argv)
+    if options.save_every < 0:
+        parser.error("--save-every не може бути від'ємним")
+
+    if options.profile:
+        STATS.enable_profiling()
+    try:
+        return _run(options)
+    finally:
+        _write_reports(options)
+
+
+def _run(options) -> int:
+    if options.daemon:
+        return daemon.run_daemon(execute, options.socket)
+
+    interactive = options.batch is None and sys.stdin.isatty()
+    # Поки працює демон, дані належать йому - працюємо як його клієнт
+    client = None
+    if daemon.is_running(options.socket):
+        client = daemon.Client(options.socket, plain=not interactive)
+    try:
+        if interactive:
+            main(client)
+            return EXIT_OK
+
+        styles.disable_colors()
+        batch_options = {"save_every": options.save_every, "quiet": options.quiet, "client": client}
+        if options.batch in (None, "-"):
+            return run_batch(sys.stdin, **batch_options)
+        try:
+            f = open(options.batch, encoding="utf-8")
+        except OSError as e:
+            print(f"Не вдалося відкрити файл команд: {e}", file=sys.stderr)
+            return EXIT_USAGE
+        with f:
+            return run_batch(f, **batch_options)
+    finally:
+        if client is not None:
+            client.close()
+
+
+def _write_reports(options):
+    """Записує статистику та звіт профілювання, якщо їх запитано"""
+    reports = [
+        (options.stats_json, STATS.export_json, "статистику"),
+        (options.profile, STATS.write_profile, "звіт профілювання"),
+    ]
+    for path, write, what in reports:
+        if not path:
+            continue
+        try:
+            write(path)
+        except OSError as e:
+            print(f"Не вдалося записати {what}: {e}", file=sys.stderr)
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(cli())
\ No newline at end of file